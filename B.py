@@ -1,13 +1,23 @@
 import cv2
 import numpy as np
-import skimage as ski
-from skimage import io
-from matplotlib import pyplot as plt
 import os
 import math
+from scipy import ndimage as ndi
+from processamento_lote import processar_lote
+from carregamento import carregar_cinza
+from renderizacao import mostrar_figura, aguardar_figuras
+from perfil import etapa
+from pilhas import em_quadro_alto
+from piramide import NIVEL_PREVIA, caminho_previa
+
+
+def mediana_adaptativa(img, max_ksize=9, min_ksize=3, modo="vetorizado"):
+    """Filtro da Mediana Adaptativa. modo="vetorizado" processa a imagem inteira (ou uma pilha (N, H, W) em uma chamada); modo="laco" é a versão pixel a pixel de referência."""
+    if modo == "vetorizado":
+        return mediana_adaptativa_vetorizada(img, max_ksize=max_ksize, min_ksize=min_ksize)
+    if modo != "laco":
+        raise ValueError(f"Modo desconhecido: {modo}")
 
-
-def mediana_adaptativa(img, max_ksize=9, min_ksize=3):
     H, W = img.shape
     imagem_final = img.copy()
     
@@ -37,10 +47,61 @@ def mediana_adaptativa(img, max_ksize=9, min_ksize=3):
                     tamanho_janela += 2 
                     if tamanho_janela > max_ksize:
                         imagem_final[linha, coluna] = valor_mediana
-                    break
     return imagem_final.astype(np.uint8)
 
 
+def _estatisticas_janela(img, ksize, cor=False):
+    """Retorna (mínimo, máximo, mediana) de cada janela ksize x ksize, com borda replicada (quadro a quadro em pilhas).
+
+    cor=True: img é H x W x C intercalada e cada canal tem suas próprias estatísticas.
+    """
+    if img.ndim == 3 and not cor:
+        if img.dtype == np.uint8:
+            # A pilha inteira em cada chamada do cv2, com os quadros empilhados na vertical
+            elemento = np.ones((ksize, ksize), np.uint8)
+            return tuple(em_quadro_alto(funcao, img, ksize // 2, "edge") for funcao in (
+                lambda alto: cv2.erode(alto, elemento, borderType=cv2.BORDER_REPLICATE),
+                lambda alto: cv2.dilate(alto, elemento, borderType=cv2.BORDER_REPLICATE),
+                lambda alto: cv2.medianBlur(alto, ksize)))
+        tamanho = (1, ksize, ksize)
+        return (ndi.minimum_filter(img, size=tamanho, mode='nearest'), ndi.maximum_filter(img, size=tamanho, mode='nearest'),
+                ndi.median_filter(img, size=tamanho, mode='nearest'))
+    if img.dtype == np.uint8:
+        elemento = np.ones((ksize, ksize), np.uint8)
+        minimo = cv2.erode(img, elemento, borderType=cv2.BORDER_REPLICATE)
+        maximo = cv2.dilate(img, elemento, borderType=cv2.BORDER_REPLICATE)
+        mediana = cv2.medianBlur(img, ksize)
+    else:
+        # O cv2 já trata os canais intercalados em uint8; em float a janela não cruza canais
+        tamanho = (ksize, ksize, 1) if cor else ksize
+        minimo = ndi.minimum_filter(img, size=tamanho, mode='nearest')
+        maximo = ndi.maximum_filter(img, size=tamanho, mode='nearest')
+        mediana = ndi.median_filter(img, size=tamanho, mode='nearest')
+    return minimo, maximo, mediana
+
+
+def mediana_adaptativa_vetorizada(img, max_ksize=9, min_ksize=3, cor=False):
+    """Mediana Adaptativa sobre a imagem inteira: calcula min/max/mediana por tamanho de janela e escolhe o nível de cada pixel com máscaras."""
+    imagem_final = img.copy()
+    resolvido = np.zeros(img.shape, dtype=bool)
+    mediana = img
+
+    for tamanho_janela in range(min_ksize, max_ksize + 1, 2):
+        minimo, maximo, mediana = _estatisticas_janela(img, tamanho_janela, cor)
+
+        # Nível A: a mediana não é impulso -> decide o pixel neste tamanho de janela
+        nivel_a = (mediana > minimo) & (mediana < maximo) & ~resolvido
+        # Nível B: mantém o pixel central se ele não for impulso, senão usa a mediana
+        central_valido = (img > minimo) & (img < maximo)
+        imagem_final[nivel_a] = np.where(central_valido, img, mediana)[nivel_a]
+        resolvido |= nivel_a
+
+        if resolvido.all():
+            break
+
+    # Pixels sem decisão até a maior janela recebem a mediana dela
+    imagem_final[~resolvido] = mediana[~resolvido]
+    return imagem_final.astype(np.uint8)
 
 
 diretorio_imgs = "Resultados/suavizacao"
@@ -49,89 +110,96 @@ sigma_values = [0.8, 1.6]
 MAX_AMF_KSIZE = 9
 FIG_WIDTH = 15
 FIG_HEIGHT_PER_ROW = 5
+# Processos em paralelo (None -> FILTRAGEM_WORKERS ou todos os núcleos)
+NUM_WORKERS = None
 
 
-if not os.path.exists(diretorio_imgs):
-    os.makedirs(diretorio_imgs)
-    print(f"Diretório de saída '{diretorio_imgs}' criado.")
-else:
-    print(f"Diretório de saída '{diretorio_imgs}' já existe.")
-
-for filename in os.listdir("imgs"):
-    filepath = os.path.join("imgs", filename)
-
-    if os.path.isfile(filepath):
-        print(f"\nProcessando e agrupando resultados para: **{filename}**")
-        base_name, ext = os.path.splitext(filename)
-
-        try:
-            img_original = cv2.imread(filepath) 
-            
-            if img_original is None:
-                print(f"Aviso: Não foi possível carregar o arquivo {filename}. Pulando.")
-                continue
-
-            if img_original.ndim == 3:
-                img_gray = cv2.cvtColor(img_original, cv2.COLOR_BGR2GRAY)
-            elif img_original.ndim == 2:
-                img_gray = img_original
-
-            img_proc = img_gray
-
-            groups = {
-                "Media": [("Original_Cinza", img_proc)],
-                "Gaussiano": [("Original_Cinza", img_proc)],
-                "Mediana_e_Adaptativo": [("Original_Cinza", img_proc)],
-            }
-
-            for k in kernel_sizes:
-                blurred = cv2.blur(img_proc, (k, k))
-                groups["Media"].append((f"Media_{k}x{k}", blurred))
-
-            for s in sigma_values:
-                blurred = cv2.GaussianBlur(img_proc, (0, 0), s)
-                s_str = str(s).replace('.', '')
-                groups["Gaussiano"].append((f"Gaussiano_S{s_str}", blurred))
-
-            for k in kernel_sizes:
-                blurred = cv2.medianBlur(img_proc, k)
-                groups["Mediana_e_Adaptativo"].append((f"Mediana_{k}x{k}", blurred))
-
-            print(f" -> Aplicando Mediana Adaptativa (Max K={MAX_AMF_KSIZE})...")
-            img_MA = mediana_adaptativa(img_proc, max_ksize=MAX_AMF_KSIZE)
-            groups["Mediana_e_Adaptativo"].append((f"Mediana_Adaptativa_Max{MAX_AMF_KSIZE}", img_MA))
-            
-            for group_name, results in groups.items():
-                num_results = len(results)
-                
-                cols = 3
-                rows = int(math.ceil(num_results / cols))
-                
-                fig, axes = plt.subplots(rows, cols, figsize=(FIG_WIDTH, rows * FIG_HEIGHT_PER_ROW)) 
-                fig.suptitle(f"Filtros {group_name.replace('_', ' ')} vs. Original: {filename}", fontsize=16, fontweight='bold')
-                
-                ax_flat = axes.flatten()
-                
-                for i, (title, img_out) in enumerate(results):
-                    ax = ax_flat[i]
-                    ax.imshow(img_out, cmap='gray')
-                    ax.set_title(title.replace('_', ' '), fontsize=12)
-                    ax.axis('off')
-
-                for j in range(num_results, len(ax_flat)):
-                    fig.delaxes(ax_flat[j])
-
-                plt.tight_layout(rect=[0, 0.03, 1, 0.96])
-                
-                output_filename = f"{base_name}_Grupo_{group_name}.png"
-                output_filepath = os.path.join(diretorio_imgs, output_filename)
-                
-                plt.savefig(output_filepath)
-                plt.close(fig) 
-                
-                print(f" -> Grupo '{group_name}' salvo em: {output_filename}")
-
-        except Exception as e:
-            print(f"Erro ao processar {filename}: {e}")
-            
-print("\nDeu certo.")
\ No newline at end of file
+def desenhar_grupo(fig, group_name, results, filename):
+    num_results = len(results)
+    
+    cols = 3
+    rows = int(math.ceil(num_results / cols))
+    
+    axes = fig.subplots(rows, cols) 
+    fig.suptitle(f"Filtros {group_name.replace('_', ' ')} vs. Original: {filename}", fontsize=16, fontweight='bold')
+    
+    ax_flat = axes.flatten()
+    
+    for i, (title, img_out) in enumerate(results):
+        ax = ax_flat[i]
+        ax.imshow(img_out, cmap='gray')
+        ax.set_title(title.replace('_', ' '), fontsize=12)
+        ax.axis('off')
+
+    for j in range(num_results, len(ax_flat)):
+        fig.delaxes(ax_flat[j])
+
+    fig.tight_layout(rect=[0, 0.03, 1, 0.96])
+
+
+def processar_imagem(filepath, filename):
+    """Aplica os filtros de suavização a uma imagem e salva os grupos de resultados; retorna os arquivos salvos."""
+    print(f"\nProcessando e agrupando resultados para: **{filename}**")
+    base_name, ext = os.path.splitext(filename)
+
+    with etapa("carregar", imagem=filename):
+        # FILTRAGEM_NIVEL_PREVIA > 0: prévia rápida num nível da pirâmide (em cache)
+        img_proc = carregar_cinza(filepath, dtype="uint8", conversao="opencv", nivel=NIVEL_PREVIA)
+
+    groups = {
+        "Media": [("Original_Cinza", img_proc)],
+        "Gaussiano": [("Original_Cinza", img_proc)],
+        "Mediana_e_Adaptativo": [("Original_Cinza", img_proc)],
+    }
+
+    with etapa("media", imagem=filename):
+        for k in kernel_sizes:
+            blurred = cv2.blur(img_proc, (k, k))
+            groups["Media"].append((f"Media_{k}x{k}", blurred))
+
+    with etapa("gaussiano", imagem=filename):
+        for s in sigma_values:
+            blurred = cv2.GaussianBlur(img_proc, (0, 0), s)
+            s_str = str(s).replace('.', '')
+            groups["Gaussiano"].append((f"Gaussiano_S{s_str}", blurred))
+
+    with etapa("mediana", imagem=filename):
+        for k in kernel_sizes:
+            blurred = cv2.medianBlur(img_proc, k)
+            groups["Mediana_e_Adaptativo"].append((f"Mediana_{k}x{k}", blurred))
+
+    print(f" -> Aplicando Mediana Adaptativa (Max K={MAX_AMF_KSIZE})...")
+    with etapa("mediana_adaptativa", imagem=filename):
+        img_MA = mediana_adaptativa(img_proc, max_ksize=MAX_AMF_KSIZE)
+    groups["Mediana_e_Adaptativo"].append((f"Mediana_Adaptativa_Max{MAX_AMF_KSIZE}", img_MA))
+
+    arquivos_salvos = []
+    for group_name, results in groups.items():
+        rows = int(math.ceil(len(results) / 3))
+        
+        output_filename = f"{base_name}_Grupo_{group_name}.png"
+        output_filepath = caminho_previa(os.path.join(diretorio_imgs, output_filename))
+        
+        mostrar_figura(desenhar_grupo, output_filepath, group_name, results, filename,
+                       figsize=(FIG_WIDTH, rows * FIG_HEIGHT_PER_ROW), paineis=results, exibir=False)
+        
+        print(f" -> Grupo '{group_name}' salvo em: {output_filename}")
+        arquivos_salvos.append(output_filepath)
+
+    return arquivos_salvos
+
+
+if __name__ == "__main__":
+    if not os.path.exists(diretorio_imgs):
+        os.makedirs(diretorio_imgs)
+        print(f"Diretório de saída '{diretorio_imgs}' criado.")
+    else:
+        print(f"Diretório de saída '{diretorio_imgs}' já existe.")
+
+    arquivos = [(os.path.join("imgs", f), f) for f in os.listdir("imgs") if os.path.isfile(os.path.join("imgs", f))]
+    for (filepath, filename), _, erro in processar_lote(processar_imagem, arquivos, NUM_WORKERS):
+        if erro is not None:
+            print(f"Erro ao processar {filename}: {erro}")
+
+    aguardar_figuras()
+    print("\nDeu certo.")
\ No newline at end of file
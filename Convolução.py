@@ -1,24 +1,14 @@
-import skimage as ski
-from skimage.color import rgb2gray
 from skimage.exposure import histogram
 from skimage.util import img_as_ubyte
-import matplotlib.pyplot as plt
 import os
+from carregamento import carregar_cinza
+from renderizacao import mostrar_figura
+from estatisticas_locais import media_local
 
-for filename in os.listdir('imgs'):
-    img = ski.io.imread(os.path.join('imgs', filename))
-    img = rgb2gray(img)
-    # Converter para uint8 [0, 255]
-    img = img_as_ubyte(img)
-    # Aplicar filtro da média
-    img_media = ski.filters.rank.mean(img.copy(), ski.morphology.square(3))
-
-    #histograma das imagens
-    hist_img, bins_img = histogram(img, source_range='dtype')
-    hist_img_media, bins_img_media = histogram(img_media, source_range='dtype')
 
+def desenhar_figura(fig, filename, img, img_media, hist_img, bins_img, hist_img_media, bins_img_media):
     # Plotar a imagem
-    fig, axes = plt.subplots(2, 2, figsize=(15, 8))
+    axes = fig.subplots(2, 2)
     axes[0, 0].imshow(img, cmap='gray')
     axes[0, 0].set_title(filename)
     axes[0, 0].axis('off')  # Remove os eixos
@@ -41,9 +31,20 @@ for filename in os.listdir('imgs'):
     axes[1, 1].set_xlim([0, 255])
     axes[1, 1].grid(True, alpha=0.3)
     
-    plt.tight_layout()
+    fig.tight_layout()
+
 
+for filename in os.listdir('imgs'):
+    img = carregar_cinza(os.path.join('imgs', filename), dtype="float64")
+    # Converter para uint8 [0, 255]
+    img = img_as_ubyte(img)
+    # Aplicar filtro da média
+    img_media = media_local(img, 3, borda="ignorar")  # igual ao ski.filters.rank.mean com quadrado 3x3
+
+    #histograma das imagens
+    hist_img, bins_img = histogram(img, source_range='dtype')
+    hist_img_media, bins_img_media = histogram(img_media, source_range='dtype')
 
-    os.makedirs('Resultados/convolução', exist_ok=True)
-    plt.savefig(f'Resultados//convolução/media_{filename}')
-    plt.show()
\ No newline at end of file
+    mostrar_figura(desenhar_figura, f'Resultados/convolução/media_{filename}',
+                   filename, img, img_media, hist_img, bins_img, hist_img_media, bins_img_media,
+                   figsize=(15, 8), paineis=[(filename, img), (f'{filename} - Média', img_media)])
\ No newline at end of file
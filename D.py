@@ -1,73 +1,80 @@
-import cv2
-import numpy as np
-import skimage as ski
-from skimage import filters
-from skimage.color import rgb2gray
-from skimage import io
-from matplotlib import pyplot as plt
 import os
+from carregamento import carregar_original, carregar_cinza
+from renderizacao import mostrar_figura, aguardar_figuras
+from bordas import calcular_bordas, calcular_bordas_grosso_fino
+from piramide import NIVEL_LIMIARES, NIVEL_PREVIA, caminho_previa
+from perfil import etapa
 
 
-for filename in os.listdir("imgs"):
- 
-    filepath = os.path.join("imgs", filename)
-
-    if os.path.isfile(filepath):
-        print(f"Processando imagem: {filename}")
-        
-        try:
-  
-            img_original = ski.io.imread(filepath)
-            if img_original.ndim == 3:
-                img_gray = rgb2gray(img_original)
-            elif img_original.ndim == 2:
-                img_gray = img_original / 255.0 if img_original.dtype == np.uint8 else img_original
-            else:
-                print(f"Pulando {filename}: Formato de imagem inesperado.")
-                continue
-
-            borda_sobel = filters.sobel(img_gray)
+def desenhar_figura(fig, filename, img_original, img_gray, borda_sobel, borda_prewitt, borda_sobel_otsu, borda_canny):
+    axes = fig.subplots(nrows=2, ncols=3, sharex=True, sharey=True)
+    ax = axes.ravel()
 
-            borda_prewitt = filters.prewitt(img_gray)
+    fig.suptitle(f"Detecção de Bordas - {filename}", fontsize=16)
 
-            img_blur = cv2.GaussianBlur((img_gray * 255).astype(np.uint8), (5, 5), 0)
-            borda_canny = cv2.Canny(img_blur, 50, 150) / 255.0 
+    ax[0].imshow(img_original)
+    ax[0].set_title("Original")
 
-            thresh = filters.threshold_otsu(borda_sobel)
-            borda_sobel_otsu = borda_sobel > thresh 
+    ax[1].imshow(img_gray, cmap='gray')
+    ax[1].set_title("Escala de Cinza")
 
-            fig, axes = plt.subplots(nrows=2, ncols=3, figsize=(15, 10), sharex=True, sharey=True)
-            ax = axes.ravel()
+    ax[2].imshow(borda_sobel, cmap='gray')
+    ax[2].set_title("Sobel (Gradiente)")
 
-            fig.suptitle(f"Detecção de Bordas - {filename}", fontsize=16)
+    ax[3].imshow(borda_prewitt, cmap='gray')
+    ax[3].set_title("Prewitt (Gradiente)")
 
-            ax[0].imshow(img_original)
-            ax[0].set_title("Original")
+    ax[4].imshow(borda_sobel_otsu, cmap='gray')
+    ax[4].set_title("Sobel + Otsu (Binarizado)")
 
-            ax[1].imshow(img_gray, cmap=plt.cm.gray)
-            ax[1].set_title("Escala de Cinza")
+    ax[5].imshow(borda_canny, cmap='gray')
+    ax[5].set_title("Canny (Referência)")
 
-            ax[2].imshow(borda_sobel, cmap=plt.cm.gray)
-            ax[2].set_title("Sobel (Gradiente)")
+    for a in ax:
+        a.axis('off')
 
-            ax[3].imshow(borda_prewitt, cmap=plt.cm.gray)
-            ax[3].set_title("Prewitt (Gradiente)")
+    fig.tight_layout(rect=[0, 0.03, 1, 0.95])
 
-            ax[4].imshow(borda_sobel_otsu, cmap=plt.cm.gray)
-            ax[4].set_title("Sobel + Otsu (Binarizado)")
 
-            ax[5].imshow(borda_canny, cmap=plt.cm.gray)
-            ax[5].set_title("Canny (Referência)")
-
-            for a in ax:
-                a.axis('off')
+for filename in os.listdir("imgs"):
+ 
+    filepath = os.path.join("imgs", filename)
 
-            plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-            os.makedirs('Resultados/bordas', exist_ok=True)
-            plt.savefig(f'Resultados//bordas/borda_{filename}')
-            plt.show()
+    if os.path.isfile(filepath):
+        print(f"Processando imagem: {filename}")
+        
+        try:
+  
+            with etapa("carregar", imagem=filename):
+                img_original = carregar_original(filepath, nivel=NIVEL_PREVIA)
+                img_gray = carregar_cinza(filepath, nivel=NIVEL_PREVIA)
+                # Entrada do Canny em uint8 direto do arquivo, como (img_gray * 255).astype(np.uint8) em float64
+                img_uint8 = carregar_cinza(filepath, dtype="uint8", nivel=NIVEL_PREVIA)
+
+            # Sobel, Prewitt, Otsu e Canny com as etapas comuns calculadas uma única vez;
+            # no modo grosso-fino os limiares saem de NIVEL_LIMIARES níveis acima na pirâmide
+            with etapa("bordas", imagem=filename):
+                if NIVEL_LIMIARES > 0:
+                    nivel_grosso = NIVEL_PREVIA + NIVEL_LIMIARES
+                    img_grossa = carregar_cinza(filepath, nivel=nivel_grosso)
+                    img_grossa_uint8 = carregar_cinza(filepath, dtype="uint8", nivel=nivel_grosso)
+                    bordas = calcular_bordas_grosso_fino(img_gray, img_grossa, img_uint8=img_uint8,
+                                                         img_grossa_uint8=img_grossa_uint8)
+                else:
+                    bordas = calcular_bordas(img_gray, img_uint8=img_uint8)
+            borda_sobel = bordas["sobel"]
+            borda_prewitt = bordas["prewitt"]
+            borda_canny = bordas["canny"] / 255.0 
+            borda_sobel_otsu = bordas["sobel_otsu"]
+
+            paineis = [("Sobel", borda_sobel), ("Prewitt", borda_prewitt),
+                       ("Sobel_Otsu", borda_sobel_otsu), ("Canny", borda_canny)]
+            mostrar_figura(desenhar_figura, caminho_previa(f'Resultados/bordas/borda_{filename}'),
+                           filename, img_original, img_gray, borda_sobel, borda_prewitt, borda_sobel_otsu, borda_canny,
+                           figsize=(15, 10), paineis=paineis)
 
         except Exception as e:
             print(f"Erro ao processar {filename}: {e}")
-            
+
+aguardar_figuras()
 print("Processamento concluído.")
\ No newline at end of file
@@ -1,20 +1,10 @@
 import cv2
-import numpy as np
-import skimage as ski
-from skimage.color import rgb2gray
-from skimage import io
 import os
-import pandas as pd
-
-
-def calcular_contraste_local(img_gray):
-    """Calcula o Desvio-Padrão Global como proxy para Contraste Local."""
-    return np.std(img_gray)
-
-def calcular_nitidez(img_gray):
-    """Calcula a Variância do Laplaciano como métrica de Nitidez."""
-    laplaciano = cv2.Laplacian(img_gray, cv2.CV_64F)
-    return laplaciano.var()
+import time
+from carregamento import carregar_cinza
+from metricas import calcular_nitidez_contraste_lote
+from perfil import etapa
+from tabela_metricas import TabelaMetricas
 
 
 FOTO_ARQUIVO = "pessoa.jpg"
@@ -27,72 +17,63 @@ RESULTADOS_DIR = "Resultados/metrica_mini_estudo"
 if not os.path.exists(RESULTADOS_DIR):
     os.makedirs(RESULTADOS_DIR)
 
+# Tabela colunar com todas as execuções; os .txt são visões da execução atual
+BASE_TABELA = os.path.join(RESULTADOS_DIR, "metricas")
+COLUNAS_METRICAS = ['Contraste (Desv. Padrão)', 'Contraste Local (Desv. 7x7)', 'Nitidez (Var. Laplaciano)']
+ESQUEMA_TABELA = [('Execução', 'i8'), ('Arquivo', 'categoria'), ('Tipo', 'categoria'), ('Kernel', 'categoria'),
+                  *[(coluna, 'f8') for coluna in COLUNAS_METRICAS], ('Tempo (s)', 'f8')]
+EXECUCAO = time.time_ns() // 1_000_000
+
 
 def realizar_mini_estudo(filename, tipo_imagem):
     filepath = os.path.join(INPUT_DIR, filename)
     
     try:
 
-        img_original = io.imread(filepath)
-
-        if img_original.ndim == 3:
-
-            if img_original.shape[-1] == 4:
-                img_rgb = img_original[:, :, :3]
-            else:
-                img_rgb = img_original
-            img_gray = (rgb2gray(img_rgb) * 255).astype(np.uint8)
-            
-        else:
-
-            img_gray = img_original
+        with etapa("carregar", imagem=filename):
+            img_gray = carregar_cinza(filepath, dtype="uint8")
     except FileNotFoundError:
         print(f"Erro: O arquivo '{filename}' não foi encontrado. Pulando.")
         return None
 
     print(f"\nProcessando {tipo_imagem}: {filename} ---")
     
-    dados = {
-        'Kernel': [], 
-        'Contraste (Desv. Padrão)': [], 
-        'Nitidez (Var. Laplaciano)': []
-    }
-
-    contraste_orig = calcular_contraste_local(img_gray)
-    nitidez_orig = calcular_nitidez(img_gray)
-    
-    dados['Kernel'].append('Original')
-    dados['Contraste (Desv. Padrão)'].append(f"{contraste_orig:.2f}")
-    dados['Nitidez (Var. Laplaciano)'].append(f"{nitidez_orig:.2f}")
-    
-    print(f"Original: Contraste={contraste_orig:.2f}, Nitidez={nitidez_orig:.2f}")
-
-    for k in KERNEL_SIZES:
-        
-        ksize = (k, k)
-        img_suavizada = cv2.blur(img_gray, ksize)
-        
-        contraste_filtrado = calcular_contraste_local(img_suavizada)
-        nitidez_filtrada = calcular_nitidez(img_suavizada)
-        
-        dados['Kernel'].append(f'Média {k}x{k}')
-        dados['Contraste (Desv. Padrão)'].append(f"{contraste_filtrado:.2f}")
-        dados['Nitidez (Var. Laplaciano)'].append(f"{nitidez_filtrada:.2f}")
-        
-        print(f"Média {k}x{k}: Contraste={contraste_filtrado:.2f}, Nitidez={nitidez_filtrada:.2f}")
-
-    df_resultado = pd.DataFrame(dados)
+    nomes = ['Original']
+    pilha = [img_gray]
+    # Tempo de cada filtro (a original não é filtrada)
+    tempos = [0.0]
+    with etapa("media", imagem=filename):
+        for k in KERNEL_SIZES:
+            inicio = time.perf_counter()
+            img_suavizada = cv2.blur(img_gray, (k, k))
+            tempos.append(time.perf_counter() - inicio)
+            nomes.append(f'Média {k}x{k}')
+            pilha.append(img_suavizada)
+
+    # Contraste e nitidez da pilha inteira em uma passada; as colunas ficam numéricas
+    with etapa("metricas", imagem=filename):
+        dados = {'Kernel': nomes, **calcular_nitidez_contraste_lote(pilha)}
+
+    for nome, contraste, contraste_local, nitidez in zip(nomes, dados['Contraste (Desv. Padrão)'],
+                                                         dados['Contraste Local (Desv. 7x7)'], dados['Nitidez (Var. Laplaciano)']):
+        print(f"{nome}: Contraste={contraste:.2f}, Contraste Local={contraste_local:.2f}, Nitidez={nitidez:.2f}")
+
+    tabela = TabelaMetricas(BASE_TABELA, ESQUEMA_TABELA)
+    tabela.anexar([{'Execução': EXECUCAO, 'Arquivo': filename, 'Tipo': tipo_imagem, 'Kernel': nome,
+                    **{coluna: dados[coluna][i] for coluna in COLUNAS_METRICAS}, 'Tempo (s)': tempos[i]}
+                   for i, nome in enumerate(nomes)])
+    desta_execucao = tabela.mascara(**{'Execução': EXECUCAO, 'Arquivo': filename})
 
     tipo_imagem_seguro = tipo_imagem.replace(' ', '_').replace('/', '-')
     output_filename = os.path.join(RESULTADOS_DIR, f"tabela_mini_estudo_{tipo_imagem_seguro}.txt")
     
     with open(output_filename, 'w') as f:
         f.write(f"Resultados para {tipo_imagem} ({filename}):\n\n")
-        f.write(df_resultado.to_string(index=False))
+        f.write(tabela.para_texto(['Kernel', *COLUNAS_METRICAS], desta_execucao, casas=2))
         f.write("\n\n")
         
     print(f"\nTabela salva em: {output_filename}")
-    return df_resultado
+    return tabela.para_dataframe(['Kernel', *COLUNAS_METRICAS], desta_execucao)
 
 if __name__ == "__main__":
 
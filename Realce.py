@@ -1,26 +1,14 @@
 #Unsharp masking, High boost, Laplaciano
-import skimage as ski
-
-from skimage.color import rgb2gray
-import matplotlib.pyplot as plt
 import os
-
-for filename in os.listdir("imgs"):
-    img = os.path.join("imgs", filename)
-    img = ski.io.imread(img)
-    img = rgb2gray(img)
-
-    import numpy as np
-    
-    img_nitido = ski.filters.unsharp_mask(img, radius=1, amount=1)
-    img_laplace = ski.filters.laplace(img)
-    # Adicionar 0.5 e clipar entre 0 e 1 para visualização correta
-    img_laplace_127 = np.clip(img_laplace + 0.5, 0, 1)
-    img_high_boost = img + 2.5 * img_nitido
+from carregamento import carregar_cinza
+from renderizacao import mostrar_figura
+from realce_fundido import realcar
+from piramide import NIVEL_PREVIA, caminho_previa
 
 
+def desenhar_figura(fig, filename, img, img_nitido, img_laplace, img_laplace_127, img_high_boost):
     # Plotar a imagem
-    fig, axes = plt.subplots(1, 5, figsize=(20, 8))
+    axes = fig.subplots(1, 5)
     axes[0].imshow(img, cmap='gray')
     axes[0].set_title(f'{filename}')
     axes[0].axis('off')  
@@ -41,4 +29,22 @@ for filename in os.listdir("imgs"):
     axes[4].set_title(f'{filename} - High Boost')
     axes[4].axis('off')  
 
-    plt.show()
\ No newline at end of file
+
+for filename in os.listdir("imgs"):
+    # FILTRAGEM_NIVEL_PREVIA > 0: prévia rápida num nível da pirâmide (em cache)
+    img = carregar_cinza(os.path.join("imgs", filename), nivel=NIVEL_PREVIA)
+
+    # Unsharp mask (raio 1, amount 1), Laplaciano, Laplaciano + 0.5 (clipado em [0, 1] para visualização)
+    # e high-boost (img + 2.5 * nitido) com um único desfoque. Buffers novos a cada imagem: a figura
+    # pode ser desenhada em segundo plano enquanto a próxima imagem é processada.
+    realces = realcar(img, raio=1, amount=1, fator_high_boost=2.5)
+    img_nitido = realces["nitido"]
+    img_laplace = realces["laplaciano"]
+    img_laplace_127 = realces["laplaciano_127"]
+    img_high_boost = realces["high_boost"]
+
+
+    paineis = [("Nitido", img_nitido), ("Laplaciano", img_laplace), ("High_Boost", img_high_boost)]
+    mostrar_figura(desenhar_figura, caminho_previa(f'Resultados/realce/realce_{filename}'),
+                   filename, img, img_nitido, img_laplace, img_laplace_127, img_high_boost,
+                   figsize=(20, 8), paineis=paineis)
\ No newline at end of file
@@ -1,77 +1,184 @@
 import numpy as np
-import skimage as ski
-from skimage.color import rgb2gray
 from skimage import io
-from skimage import metrics
 import os
-from scipy.ndimage import gaussian_filter
-import pandas as pd
+import json
+import time
+from processamento_lote import listar_imagens, processar_lote
+from carregamento import carregar_cinza
+from metricas import calcular_metricas_lote
+from ruido import GeradorRuido
+from pilhas import gaussiano_pilha, media_pilha, mediana_pilha
+from manifesto import Manifesto, descritor, hash_arquivo, versao_codigo
+from precisao import dtype_float, para_float, para_uint8
+from perfil import etapa
+from tabela_metricas import TabelaMetricas
+import carregamento
+import estatisticas_locais
+import metricas
+import pilhas
+import precisao
+import ruido
 
 DIR_IMGS = "imgs"
 DIR_RESULTADOS = "Resultados/resultados_analise" 
+# Um manifesto por imagem: cada processo do lote escreve só o seu
+DIR_MANIFESTO = os.path.join(DIR_RESULTADOS, ".manifesto")
 TAMANHO_KERNEL = 3
 SIGMA_GAUSSIANO = 1.6
+# Processos em paralelo (None -> FILTRAGEM_WORKERS ou todos os núcleos)
+NUM_WORKERS = None
 
 # Ruído Gaussiano: sigma=10 -> var=100. Normalizada para [0, 1].
 VAR_GAUSSIANO_NORMALIZADA = 100 / (255.0**2) 
 # Ruído Sal e Pimenta: 5% de pixels afetados
 AMOUNT_SP_5 = 0.05 
+PROPORCAO_SAL = 0.5
+# Semente fixa: a tabela de métricas é a mesma a cada execução
+SEMENTE_RUIDO = 42
+# Realizações de ruído por imagem; com mais de uma, as métricas são médias de Monte Carlo
+NUM_REALIZACOES = 1
 
+GERADOR_RUIDO = GeradorRuido(SEMENTE_RUIDO)
 
-def salvar_imagem_uint8(caminho_arquivo, imagem_float_0_1):
+RUIDOS = {
+    "Gaussiano": lambda img, realizacao: GERADOR_RUIDO.gaussiano(img, VAR_GAUSSIANO_NORMALIZADA, realizacao=realizacao),
+    "SalEPimenta": lambda img, realizacao: GERADOR_RUIDO.sal_e_pimenta(img, AMOUNT_SP_5, salt_vs_pepper=PROPORCAO_SAL, realizacao=realizacao)
+}
+
+
+def salvar_imagem_uint8(caminho_arquivo, imagem):
+    # Saídas uint8 (filtros nativos) são gravadas sem conversão
+    with etapa("png", imagem=os.path.basename(caminho_arquivo)):
+        if imagem.dtype != np.uint8:
+            imagem = np.clip(imagem, 0, 1.0)
+        io.imsave(caminho_arquivo, para_uint8(imagem))
+
+def linha_metricas(nome_base, nome_ruido, nome_filtro, mse=np.nan, psnr=np.nan, ssim=np.nan, tempo=np.nan, parametros=None):
+    # Valores numéricos (NaN em caso de erro); a formatação fica para a exibição
+    return {
+        "Arquivo": nome_base,
+        "Ruído": nome_ruido,
+        "Filtro": nome_filtro,
+        "MSE": float(mse),
+        "PSNR (dB)": float(psnr),
+        "SSIM": float(ssim),
+        # Tempo médio (s) do ruído ou do filtro por realização e parâmetros que geraram a linha
+        "Tempo (s)": float(tempo),
+        "Parâmetros": json.dumps(parametros, sort_keys=True) if parametros is not None else "",
+    }
 
-    imagem_uint8 = (np.clip(imagem_float_0_1, 0, 1.0) * 255).astype(np.uint8)
-    io.imsave(caminho_arquivo, imagem_uint8)
 
-def calcular_metricas(original, filtrada):
-    mse = metrics.mean_squared_error(original, filtrada)
-    psnr = metrics.peak_signal_noise_ratio(original, filtrada, data_range=1.0)
-    return mse, psnr
+# Tabela colunar com o histórico de execuções; o CSV é uma visão da última execução
+BASE_TABELA = os.path.join(DIR_RESULTADOS, "metricas")
+ESQUEMA_TABELA = [("Execução", "i8"), ("Arquivo", "categoria"), ("Ruído", "categoria"), ("Filtro", "categoria"),
+                  ("Parâmetros", "categoria"), ("MSE", "f8"), ("PSNR (dB)", "f8"), ("SSIM", "f8"), ("Tempo (s)", "f8")]
+COLUNAS_CSV = ["Arquivo", "Ruído", "Filtro", "MSE", "PSNR (dB)", "SSIM"]
 
 
-# Os filtros Média e Mediana são adaptados para uint8 e normalizados de volta.
-def filtro_media(img):
-    img_uint8 = (img * 255).astype(np.uint8)
-    # Filtro da Média (Mean)
-    resultado_uint8 = ski.filters.rank.mean(img_uint8, footprint=ski.morphology.square(TAMANHO_KERNEL))
-    return resultado_uint8.astype(np.float64) / 255.0
+# Os filtros Média e Mediana trabalham direto em uint8 (entrada e saída).
+# Os três aceitam uma imagem (H, W) ou uma pilha de quadros (N, H, W), filtrada em uma chamada.
+def filtro_media(img_uint8):
+    # Filtro da Média por imagem integral: mesmo resultado do ski.filters.rank.mean (borda ignorada, truncado)
+    return media_pilha(img_uint8, TAMANHO_KERNEL, borda="ignorar")
 
-def filtro_mediana(img):
-    img_uint8 = (img * 255).astype(np.uint8)
-    # Filtro da Mediana
-    resultado_uint8 = ski.filters.median(img_uint8, footprint=ski.morphology.square(TAMANHO_KERNEL))
-    return resultado_uint8.astype(np.float64) / 255.0
+def filtro_mediana(img_uint8):
+    # Filtro da Mediana pelo cv2.medianBlur (mesmo resultado do ski.filters.median, borda replicada)
+    return mediana_pilha(img_uint8, TAMANHO_KERNEL)
 
 def filtro_gaussiano_scipy(img):
-    # O filtro Gaussiano do scipy funciona bem em float[0, 1]
-    return gaussian_filter(img, sigma=SIGMA_GAUSSIANO)
+    # O filtro Gaussiano do scipy funciona bem em float[0, 1] (e preserva o dtype da política)
+    return gaussiano_pilha(img, SIGMA_GAUSSIANO)
 
 FILTROS = {
     "Media": filtro_media, 
     "Mediana": filtro_mediana, 
     "Gaussiano": filtro_gaussiano_scipy
 }
+# Filtros que recebem a imagem ruidosa em uint8 (convertida uma vez por realização)
+FILTROS_UINT8 = {"Media", "Mediana"}
+
+# --- Manifesto de Resultados ---
+# Parâmetros que determinam cada saída; mudar um deles recalcula só as linhas e imagens afetadas
+PARAMETROS_RUIDOS = {
+    "Gaussiano": {"var": VAR_GAUSSIANO_NORMALIZADA, "semente": SEMENTE_RUIDO, "realizacoes": NUM_REALIZACOES},
+    "SalEPimenta": {"amount": AMOUNT_SP_5, "salt_vs_pepper": PROPORCAO_SAL, "semente": SEMENTE_RUIDO, "realizacoes": NUM_REALIZACOES},
+}
+PARAMETROS_FILTROS = {
+    "Media": {"tamanho_kernel": TAMANHO_KERNEL},
+    "Mediana": {"tamanho_kernel": TAMANHO_KERNEL},
+    "Gaussiano": {"sigma": SIGMA_GAUSSIANO},
+}
+# Módulos que implementam cada filtro (as funções acima só os chamam): também entram na versão
+MODULOS_FILTROS = {
+    "Media": (pilhas, estatisticas_locais),
+    "Mediana": (pilhas,),
+    "Gaussiano": (pilhas,),
+}
+# Versão do código: carregamento, ruído, métricas, precisão e gravação (comuns) + cada filtro e seus módulos
+VERSAO_CODIGO = versao_codigo(carregamento, ruido, metricas, precisao, salvar_imagem_uint8)
+VERSOES_CODIGO_FILTROS = {nome: versao_codigo(funcao, *MODULOS_FILTROS[nome]) for nome, funcao in FILTROS.items()}
+
+
+def versao_base():
+    # O dtype da política também muda os resultados: entra na versão, lido a cada análise
+    return f"{VERSAO_CODIGO}-{dtype_float().name}"
+
+
+def planejar_saidas(nome_base, hash_entrada):
+    """{ruído: {filtro: (arquivo, descritor)}} de todas as saídas de uma imagem ("N/A (Ruído)" é a imagem ruidosa)."""
+    base = versao_base()
+    saidas = {}
+    for nome_ruido, parametros_ruido in PARAMETROS_RUIDOS.items():
+        saidas[nome_ruido] = {"N/A (Ruído)": (
+            os.path.join(DIR_RESULTADOS, f"{nome_base}_{nome_ruido}.png"),
+            descritor(hash_entrada, f"ruido:{nome_ruido}", parametros_ruido, base),
+        )}
+        for nome_filtro in FILTROS:
+            saidas[nome_ruido][nome_filtro] = (
+                os.path.join(DIR_RESULTADOS, f"{nome_base}_{nome_ruido}_{nome_filtro}.png"),
+                descritor(hash_entrada, f"{nome_ruido}/{nome_filtro}",
+                          {"ruido": parametros_ruido, "filtro": PARAMETROS_FILTROS[nome_filtro]},
+                          f"{base}-{VERSOES_CODIGO_FILTROS[nome_filtro]}"),
+            )
+    return saidas
+
 
 # --- Função Principal de Análise por Imagem ---
 
 def realizar_analise_imagem(caminho_completo, nome_arquivo):
-    """Carrega, adiciona ruído, filtra, calcula métricas e salva arquivos para uma única imagem."""
+    """Carrega, adiciona ruído, filtra, calcula métricas e salva arquivos para uma única imagem.
+
+    Saídas já registradas no manifesto com o mesmo descritor (conteúdo da entrada,
+    parâmetros e versão do código) não são recalculadas: suas métricas vêm do manifesto.
+    """
     
     nome_base = os.path.splitext(nome_arquivo)[0]
+
+    try:
+        hash_entrada = hash_arquivo(caminho_completo)
+    except OSError as e:
+        print(f"  [ERRO] Falha ao ler '{nome_arquivo}': {e}")
+        return []
+
+    manifesto = Manifesto(os.path.join(DIR_MANIFESTO, f"{nome_base}.json"))
+    arq_original = os.path.join(DIR_RESULTADOS, f"{nome_base}_original.png")
+    desc_original = descritor(hash_entrada, "original", {}, versao_base())
+    saidas = planejar_saidas(nome_base, hash_entrada)
+    pendentes = {nome_ruido: [nome for nome, (arquivo, desc) in itens.items() if not manifesto.valido(arquivo, desc)]
+                 for nome_ruido, itens in saidas.items()}
+
+    def linha_registrada(nome_ruido, nome_filtro):
+        arquivo, desc = saidas[nome_ruido][nome_filtro]
+        return linha_metricas(nome_base, nome_ruido, nome_filtro, **manifesto.metricas(arquivo), parametros=desc["parametros"])
+
+    if manifesto.valido(arq_original, desc_original) and not any(pendentes.values()):
+        print(f"  -> Sem alterações: {nome_arquivo}")
+        return [linha_registrada(nome_ruido, nome_filtro) for nome_ruido, itens in saidas.items() for nome_filtro in itens]
     
     try:
-        # 1. Carregamento e Normalização (0-1, float64)
-        original_rgb = ski.io.imread(caminho_completo)
-        if original_rgb.ndim == 3:
-            if original_rgb.shape[-1] == 4:
-                original_rgb = original_rgb[:, :, :3]
-            original = rgb2gray(original_rgb).astype(np.float64) 
-        elif original_rgb.ndim == 2:
-             # Trata imagem já em tons de cinza
-             original = original_rgb.astype(np.float64) / np.max(original_rgb)
-        else:
-             print(f"  [AVISO] Imagem '{nome_arquivo}' não é RGB nem Escala de Cinza, ignorando.")
-             return []
+        # 1. Carregamento e Normalização (0-1, dtype da política), decodificado uma única vez pelo cache
+        with etapa("carregar", imagem=nome_arquivo):
+            original = carregar_cinza(caminho_completo)
     
     except Exception as e:
         print(f"  [ERRO] Falha ao carregar ou converter '{nome_arquivo}': {e}")
@@ -80,62 +187,81 @@ def realizar_analise_imagem(caminho_completo, nome_arquivo):
     print(f"  -> Processando: {nome_arquivo}")
 
     # Salva a imagem original
-    salvar_imagem_uint8(os.path.join(DIR_RESULTADOS, f"{nome_base}_original.png"), original)
+    if not manifesto.valido(arq_original, desc_original):
+        salvar_imagem_uint8(arq_original, original)
+        manifesto.registrar(arq_original, desc_original)
+
+    resultados_imagem = []
 
     # 2. Adição de Ruído (e.i)
-    imagens_ruidosas = {
-        "Gaussiano": ski.util.random_noise(original, mode='gaussian', var=VAR_GAUSSIANO_NORMALIZADA),
-        "SalEPimenta": ski.util.random_noise(original, mode='s&p', amount=AMOUNT_SP_5, salt_vs_pepper=0.5)
-    }
+    for nome_ruido, gerar_ruido in RUIDOS.items():
+        a_calcular = pendentes[nome_ruido]
+        # Métricas de cada realização, por saída pendente
+        metricas_realizacoes = {nome: [] for nome in a_calcular}
+        tempos = {nome: 0.0 for nome in a_calcular}
 
-    resultados_imagem = []
+        # O ruído é reprodutível (semente fixa): regenerá-lo dá a mesma imagem das saídas já registradas
+        for realizacao in range(NUM_REALIZACOES if a_calcular else 0):
+            inicio = time.perf_counter()
+            with etapa(f"ruido:{nome_ruido}", imagem=nome_arquivo):
+                img_ruidosa = gerar_ruido(original, realizacao)
+            if "N/A (Ruído)" in tempos:
+                tempos["N/A (Ruído)"] += time.perf_counter() - inicio
+            # Só a primeira realização é salva em disco
+            salvar = realizacao == 0
 
-    for nome_ruido, img_ruidosa in imagens_ruidosas.items():
-        # Salva a imagem ruidosa: nomeArquivo_ruido.png
-        nome_arq_ruido = f"{nome_base}_{nome_ruido}.png"
-        salvar_imagem_uint8(os.path.join(DIR_RESULTADOS, nome_arq_ruido), img_ruidosa)
-
-        # Métrica da Imagem Ruidosa (base de comparação)
-        mse_ruido, psnr_ruido = calcular_metricas(original, img_ruidosa)
-        resultados_imagem.append({
-            "Arquivo": nome_base,
-            "Ruído": nome_ruido,
-            "Filtro": "N/A (Ruído)",
-            "MSE": f"{mse_ruido:.6f}",
-            "PSNR (dB)": f"{psnr_ruido:.2f}"
-        })
-        
-        # 3. Aplicação dos Filtros
-        for nome_filtro, filter_func in FILTROS.items():
-            try:
-                img_filtrada = filter_func(img_ruidosa)
-                img_filtrada = np.clip(img_filtrada, 0, 1.0)
-                
-                # Cálculo de Métricas
-                mse, psnr = calcular_metricas(original, img_filtrada)
-
-                nome_arq_filtrado = f"{nome_base}_{nome_ruido}_{nome_filtro}.png"
-                salvar_imagem_uint8(os.path.join(DIR_RESULTADOS, nome_arq_filtrado), img_filtrada)
-                
-                # Armazena métricas
-                resultados_imagem.append({
-                    "Arquivo": nome_base,
-                    "Ruído": nome_ruido,
-                    "Filtro": nome_filtro,
-                    "MSE": f"{mse:.6f}",
-                    "PSNR (dB)": f"{psnr:.2f}"
-                })
-
-            except Exception as e:
-                print(f"  [ERRO] Falha no filtro {nome_filtro} para ruído {nome_ruido}: {e}")
-                resultados_imagem.append({
-                    "Arquivo": nome_base,
-                    "Ruído": nome_ruido,
-                    "Filtro": nome_filtro,
-                    "MSE": "ERRO",
-                    "PSNR (dB)": "ERRO"
-                })
-                
+            # A imagem ruidosa entra na mesma pilha das filtradas
+            pilha = {}
+            if "N/A (Ruído)" in a_calcular:
+                pilha["N/A (Ruído)"] = img_ruidosa
+                if salvar:
+                    # Salva a imagem ruidosa: nomeArquivo_ruido.png
+                    salvar_imagem_uint8(saidas[nome_ruido]["N/A (Ruído)"][0], img_ruidosa)
+
+            # 3. Aplicação dos Filtros (só os pendentes)
+            img_ruidosa_uint8 = None
+            for nome_filtro, filter_func in FILTROS.items():
+                if nome_filtro not in a_calcular:
+                    continue
+                try:
+                    inicio = time.perf_counter()
+                    with etapa(f"filtro:{nome_filtro}", imagem=nome_arquivo):
+                        if nome_filtro in FILTROS_UINT8:
+                            if img_ruidosa_uint8 is None:
+                                img_ruidosa_uint8 = para_uint8(img_ruidosa)
+                            img_filtrada = filter_func(img_ruidosa_uint8)
+                        else:
+                            img_filtrada = np.clip(filter_func(img_ruidosa), 0, 1.0)
+                    tempos[nome_filtro] += time.perf_counter() - inicio
+
+                    if salvar:
+                        salvar_imagem_uint8(saidas[nome_ruido][nome_filtro][0], img_filtrada)
+                    # As métricas comparam tudo em [0, 1] no dtype da política
+                    pilha[nome_filtro] = para_float(img_filtrada)
+
+                except Exception as e:
+                    print(f"  [ERRO] Falha no filtro {nome_filtro} para ruído {nome_ruido}: {e}")
+
+            # Cálculo de Métricas: uma passada para a pilha inteira
+            if pilha:
+                with etapa("metricas", imagem=nome_arquivo):
+                    valores = calcular_metricas_lote(original, list(pilha.values()))
+                for i, nome_filtro in enumerate(pilha):
+                    metricas_realizacoes[nome_filtro].append((valores["MSE"][i], valores["PSNR (dB)"][i], valores["SSIM"][i]))
+
+        # Armazena métricas (média das realizações; filtros com erro ficam com NaN e fora do manifesto)
+        for nome_filtro, (arquivo, desc) in saidas[nome_ruido].items():
+            if nome_filtro not in a_calcular:
+                resultados_imagem.append(linha_registrada(nome_ruido, nome_filtro))
+            elif len(metricas_realizacoes[nome_filtro]) == NUM_REALIZACOES:
+                mse, psnr, ssim = np.mean(metricas_realizacoes[nome_filtro], axis=0)
+                tempo = tempos[nome_filtro] / NUM_REALIZACOES
+                manifesto.registrar(arquivo, desc, {"mse": float(mse), "psnr": float(psnr), "ssim": float(ssim), "tempo": tempo})
+                resultados_imagem.append(linha_metricas(nome_base, nome_ruido, nome_filtro, mse, psnr, ssim, tempo, desc["parametros"]))
+            else:
+                resultados_imagem.append(linha_metricas(nome_base, nome_ruido, nome_filtro, parametros=desc["parametros"]))
+
+    manifesto.salvar()
     return resultados_imagem
 
 
@@ -144,30 +270,46 @@ if __name__ == "__main__":
     os.makedirs(DIR_RESULTADOS, exist_ok=True)
     print(f"Os resultados serão salvos no diretório: '{DIR_RESULTADOS}'")
 
-    arquivos_imagem = [f for f in os.listdir(DIR_IMGS) if f.lower().endswith(('.png', '.jpg', '.jpeg', '.tif', '.tiff'))]
+    arquivos_imagem = listar_imagens(DIR_IMGS)
 
     if not arquivos_imagem:
         print(f"Erro: Nenhuma imagem encontrada no diretório '{DIR_IMGS}'. Certifique-se de ter colocado suas imagens lá.")
     else:
         todas_metricas = []
         
-        for nome_arquivo in arquivos_imagem:
-            caminho_completo = os.path.join(DIR_IMGS, nome_arquivo)
-            metricas_atuais = realizar_analise_imagem(caminho_completo, nome_arquivo)
+        # Cada imagem roda em um processo; os resultados voltam na ordem da lista
+        for (caminho_completo, nome_arquivo), metricas_atuais, erro in processar_lote(realizar_analise_imagem, arquivos_imagem, NUM_WORKERS):
+            if erro is not None:
+                print(f"  [ERRO] Falha ao processar '{nome_arquivo}': {erro}")
+                continue
             todas_metricas.extend(metricas_atuais)
 
         if todas_metricas:
-            df_resultados = pd.DataFrame(todas_metricas)
+            # Anexa a execução à tabela colunar; CSV e texto são visões dela
+            tabela = TabelaMetricas(BASE_TABELA, ESQUEMA_TABELA)
+            execucao = time.time_ns() // 1_000_000
+            tabela.anexar([{"Execução": execucao, **linha} for linha in todas_metricas])
+            desta_execucao = tabela.mascara(**{"Execução": execucao})
             caminho_tabela = os.path.join(DIR_RESULTADOS, "tabela_metricas_analise.csv")
 
-            df_resultados.to_csv(caminho_tabela, index=False)
+            # Só reescreve a tabela se o conteúdo mudou
+            conteudo = tabela.para_csv(COLUNAS_CSV, desta_execucao)
+            anterior = None
+            if os.path.exists(caminho_tabela):
+                with open(caminho_tabela, encoding="utf-8", newline="") as f:
+                    anterior = f.read()
+            if conteudo != anterior:
+                with open(caminho_tabela, "w", encoding="utf-8", newline="") as f:
+                    f.write(conteudo)
+            else:
+                print("\nTabela de métricas inalterada.")
 
             print("\n" + "="*80)
             print(f"Análise concluída para {len(arquivos_imagem)} imagem(s).")
             print(f"As imagens processadas e a tabela de métricas foram salvas em '{DIR_RESULTADOS}'.")
             print("\nConteúdo da Tabela Final (CSV):")
             print("="*80)
-            print(df_resultados.to_string(index=False)) # Imprime a tabela no console
+            print(tabela.para_texto(COLUNAS_CSV, desta_execucao)) # Imprime a tabela no console
             print("="*80)
         else:
             print("\nNenhum resultado de métrica gerado.")
\ No newline at end of file
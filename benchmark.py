@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+import skimage as ski
+from scipy.ndimage import gaussian_filter
+
+from B import mediana_adaptativa
+from convolução_manual import aplicar_convolucao_manual
+from estatisticas_locais import media_local
+
+DIR_BENCHMARK = "Resultados/benchmark"
+ARQUIVO_HISTORICO = os.path.join(DIR_BENCHMARK, "historico.json")
+ARQUIVO_BASELINE = os.path.join(DIR_BENCHMARK, "baseline.json")
+
+# (altura, largura) das imagens sintéticas: de 512² até 8K
+TAMANHOS = {
+    "512": (512, 512),
+    "1K": (1024, 1024),
+    "2K": (2048, 2048),
+    "4K": (2160, 3840),
+    "8K": (4320, 7680),
+}
+AQUECIMENTO = 1
+REPETICOES = 5
+# Regressão: mediana atual acima da mediana da baseline por mais que esta fração
+TOLERANCIA = 0.20
+# ... e por mais que esta margem absoluta (s), para não acusar ruído de medição em casos de microssegundos
+MARGEM_ABSOLUTA = 0.001
+
+KERNEL_MEDIA_3X3 = np.ones((3, 3), dtype=np.float32) / 9.0
+QUADRADO_3 = np.ones((3, 3), dtype=bool)
+
+# Cada filtro recebe uma imagem uint8 em escala de cinza
+FILTROS = {
+    "media_cv2": lambda img: cv2.blur(img, (3, 3)),
+    "media_skimage_rank": lambda img: ski.filters.rank.mean(img, footprint=QUADRADO_3),
+    "media_integral": lambda img: media_local(img, 3, borda="ignorar"),
+    "mediana_cv2": lambda img: cv2.medianBlur(img, 3),
+    "mediana_skimage": lambda img: ski.filters.median(img, footprint=QUADRADO_3),
+    "mediana_cv2_15": lambda img: cv2.medianBlur(img, 15),
+    "mediana_adaptativa": lambda img: mediana_adaptativa(img, max_ksize=9),
+    "gaussiano_cv2": lambda img: cv2.GaussianBlur(img, (0, 0), 1.6),
+    "gaussiano_scipy": lambda img: gaussian_filter(img.astype(np.float64) / 255.0, sigma=1.6),
+    "sobel": lambda img: ski.filters.sobel(img.astype(np.float64) / 255.0),
+    "prewitt": lambda img: ski.filters.prewitt(img.astype(np.float64) / 255.0),
+    "canny": lambda img: cv2.Canny(cv2.GaussianBlur(img, (5, 5), 0), 50, 150),
+    "unsharp_mask": lambda img: ski.filters.unsharp_mask(img.astype(np.float64) / 255.0, radius=1, amount=1),
+    "convolucao_manual": lambda img: aplicar_convolucao_manual(img, KERNEL_MEDIA_3X3),
+}
+
+
+def imagem_sintetica(altura, largura, semente=0):
+    """Imagem uint8 reprodutível com estrutura suave, bordas e 5% de sal e pimenta."""
+    rng = np.random.default_rng(semente)
+    img = cv2.GaussianBlur(rng.integers(0, 256, (altura, largura), dtype=np.uint8), (0, 0), 3)
+    img = cv2.normalize(img, None, 0, 255, cv2.NORM_MINMAX)
+    sorteio = rng.random((altura, largura))
+    img[sorteio < 0.025] = 0
+    img[sorteio > 0.975] = 255
+    return img
+
+
+def medir(funcao, img, aquecimento=AQUECIMENTO, repeticoes=REPETICOES):
+    """Tempos (s) de `repeticoes` execuções após `aquecimento` execuções descartadas."""
+    for _ in range(aquecimento):
+        funcao(img)
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(img)
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def resumir(tempos):
+    p50, p90 = np.percentile(tempos, [50, 90])
+    return {"min": min(tempos), "p50": float(p50), "p90": float(p90), "max": max(tempos), "repeticoes": len(tempos)}
+
+
+def executar(filtros, tamanhos, aquecimento=AQUECIMENTO, repeticoes=REPETICOES):
+    resultados = {}
+    for nome_tamanho in tamanhos:
+        altura, largura = TAMANHOS[nome_tamanho]
+        img = imagem_sintetica(altura, largura)
+        for nome_filtro in filtros:
+            chave = f"{nome_filtro}@{nome_tamanho}"
+            resultados[chave] = resumir(medir(FILTROS[nome_filtro], img, aquecimento, repeticoes))
+            print(f"{chave:<32} p50={resultados[chave]['p50'] * 1000:10.2f} ms  p90={resultados[chave]['p90'] * 1000:10.2f} ms")
+    return resultados
+
+
+def _ler_json(caminho, padrao):
+    if not os.path.exists(caminho):
+        return padrao
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _escrever_json(caminho, dados):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f, indent=2, ensure_ascii=False)
+
+
+def comparar(resultados, baseline, tolerancia=TOLERANCIA):
+    """Lista (chave, p50_atual, p50_baseline) dos casos mais lentos que a baseline além da tolerância."""
+    regressoes = []
+    for chave, atual in resultados.items():
+        referencia = baseline.get(chave)
+        if referencia and atual["p50"] > referencia["p50"] * (1 + tolerancia) and atual["p50"] - referencia["p50"] > MARGEM_ABSOLUTA:
+            regressoes.append((chave, atual["p50"], referencia["p50"]))
+    return regressoes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dos filtros do projeto com histórico e detecção de regressões.")
+    parser.add_argument("--filtros", nargs="+", default=list(FILTROS), choices=list(FILTROS))
+    parser.add_argument("--tamanhos", nargs="+", default=list(TAMANHOS), choices=list(TAMANHOS))
+    parser.add_argument("--aquecimento", type=int, default=AQUECIMENTO)
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES)
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava esta execução como a nova baseline")
+    args = parser.parse_args()
+
+    resultados = executar(args.filtros, args.tamanhos, args.aquecimento, args.repeticoes)
+
+    execucao = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "maquina": platform.platform(),
+        "python": platform.python_version(),
+        "versoes": {"numpy": np.__version__, "opencv": cv2.__version__, "skimage": ski.__version__},
+        "resultados": resultados,
+    }
+    historico = _ler_json(ARQUIVO_HISTORICO, [])
+    historico.append(execucao)
+    _escrever_json(ARQUIVO_HISTORICO, historico)
+    print(f"\nExecução adicionada ao histórico: {ARQUIVO_HISTORICO}")
+
+    if args.salvar_baseline:
+        # Mantém as entradas antigas que não foram medidas nesta execução
+        baseline = _ler_json(ARQUIVO_BASELINE, {})
+        baseline.update(resultados)
+        _escrever_json(ARQUIVO_BASELINE, baseline)
+        print(f"Baseline atualizada: {ARQUIVO_BASELINE}")
+        sys.exit(0)
+
+    regressoes = comparar(resultados, _ler_json(ARQUIVO_BASELINE, {}), args.tolerancia)
+    if regressoes:
+        print("\nREGRESSÕES DETECTADAS:")
+        for chave, atual, referencia in regressoes:
+            print(f"  {chave}: {atual * 1000:.2f} ms (baseline {referencia * 1000:.2f} ms, +{(atual / referencia - 1) * 100:.0f}%)")
+        sys.exit(1)
+    print("\nNenhuma regressão em relação à baseline.")
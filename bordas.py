@@ -0,0 +1,123 @@
+import cv2
+import numpy as np
+from skimage.filters import threshold_otsu
+
+from precisao import dtype_float, para_uint8
+
+# Mesmos parâmetros do D.py
+KSIZE_SUAVIZACAO_CANNY = (5, 5)
+LIMIARES_CANNY = (50, 150)
+NBINS_OTSU = 256
+
+
+def gradientes_sobel_prewitt(img, dtype=None):
+    """Gradientes (gx, gy) de Sobel e de Prewitt a partir de uma única passada de diferenças centrais.
+
+    Os dois operadores só diferem na suavização perpendicular ([1, 2, 1]/4 e
+    [1, 1, 1]/3), então as diferenças centrais são calculadas uma vez e
+    reaproveitadas. Borda refletida e normalização iguais às do skimage.filters.
+    """
+    img = np.asarray(img, dtype=dtype_float(dtype))
+    tipo = img.dtype.type
+    p = np.pad(img, 1, mode='symmetric')
+
+    # Diferenças centrais em cada linha/coluna da imagem com borda
+    dx = p[:, 2:] - p[:, :-2]
+    dy = p[2:, :] - p[:-2, :]
+
+    # Soma dos vizinhos perpendiculares, comum aos dois operadores
+    soma_dx = dx[:-2] + dx[2:]
+    soma_dy = dy[:, :-2] + dy[:, 2:]
+    centro_dx = dx[1:-1]
+    centro_dy = dy[:, 1:-1]
+
+    sobel = ((soma_dx + 2 * centro_dx) / tipo(4), (soma_dy + 2 * centro_dy) / tipo(4))
+    prewitt = ((soma_dx + centro_dx) / tipo(3), (soma_dy + centro_dy) / tipo(3))
+    return sobel, prewitt
+
+
+def magnitude(gx, gy):
+    # Como o skimage: raiz da média dos quadrados dos eixos
+    return np.sqrt((gx * gx + gy * gy) / gx.dtype.type(2))
+
+
+def limiar_otsu(valores, nbins=NBINS_OTSU):
+    """Limiar de Otsu a partir de um histograma de `nbins` classes montado com bincount."""
+    valores = np.ravel(valores)
+    minimo, maximo = float(valores.min()), float(valores.max())
+    if minimo == maximo:
+        return minimo
+    escala = nbins / (maximo - minimo)
+    indices = ((valores - minimo) * escala).astype(np.intp)
+    np.minimum(indices, nbins - 1, out=indices)
+    contagens = np.bincount(indices, minlength=nbins)
+    arestas = np.linspace(minimo, maximo, nbins + 1)
+    centros = (arestas[:-1] + arestas[1:]) / 2
+    return threshold_otsu(hist=(contagens, centros))
+
+
+def _gradiente_canny(img_uint8, ksize):
+    suavizada = cv2.GaussianBlur(img_uint8, ksize, 0)
+    # Mesmo Sobel 3x3 e mesma borda que o cv2.Canny usa internamente
+    dx = cv2.Sobel(suavizada, cv2.CV_16S, 1, 0, ksize=3, borderType=cv2.BORDER_REPLICATE)
+    dy = cv2.Sobel(suavizada, cv2.CV_16S, 0, 1, ksize=3, borderType=cv2.BORDER_REPLICATE)
+    return dx, dy
+
+
+def canny(img_uint8, limiares=LIMIARES_CANNY, ksize=KSIZE_SUAVIZACAO_CANNY):
+    """Canny do D.py (GaussianBlur 5x5 + cv2.Canny) com o gradiente calculado uma vez e entregue ao cv2.Canny."""
+    dx, dy = _gradiente_canny(img_uint8, ksize)
+    return cv2.Canny(dx, dy, limiares[0], limiares[1])
+
+
+def limiares_canny_otsu(img_uint8, ksize=KSIZE_SUAVIZACAO_CANNY):
+    """Limiares (baixo, alto) do Canny: alto = Otsu da magnitude L1 do gradiente (a mesma que o cv2.Canny compara), baixo = alto / 2."""
+    dx, dy = _gradiente_canny(img_uint8, ksize)
+    alto = limiar_otsu(np.abs(dx.astype(np.int32)) + np.abs(dy.astype(np.int32)))
+    return alto / 2, alto
+
+
+def calcular_bordas(img_gray, dtype=None, limiares_canny=LIMIARES_CANNY, limiar=None, img_uint8=None):
+    """Sobel, Prewitt, Sobel + Otsu e Canny de uma imagem em [0, 1] com as etapas comuns calculadas uma vez.
+
+    dtype=None usa o ponto flutuante da política (float32 por padrão: metade da memória e do tráfego).
+    `limiar` reaproveita um limiar de Otsu já calculado (ex.: num nível grosso da pirâmide).
+    `img_uint8` é a entrada do Canny; passe a imagem carregada direto em uint8
+    (carregar_cinza(..., dtype="uint8")): truncar a versão float32 desloca
+    alguns pixels em um nível de cinza e muda as bordas do Canny.
+    """
+    sobel, prewitt = gradientes_sobel_prewitt(img_gray, dtype)
+    borda_sobel = magnitude(*sobel)
+    borda_prewitt = magnitude(*prewitt)
+
+    if limiar is None:
+        limiar = limiar_otsu(borda_sobel)
+
+    if img_uint8 is None:
+        img_uint8 = para_uint8(img_gray)
+    borda_canny = canny(img_uint8, limiares_canny)
+
+    return {
+        "sobel": borda_sobel,
+        "prewitt": borda_prewitt,
+        "sobel_otsu": borda_sobel > limiar,
+        "limiar_otsu": limiar,
+        "canny": borda_canny,
+    }
+
+
+def calcular_bordas_grosso_fino(img_gray, img_grossa, dtype=None, img_uint8=None, img_grossa_uint8=None):
+    """Bordas em resolução cheia com os limiares de Otsu e do Canny calculados em `img_grossa` (nível da pirâmide).
+
+    Os histogramas do nível grosso têm 4**nivel vezes menos pixels; os limiares
+    são só reaproveitados na imagem cheia. No modo grosso-fino os limiares do
+    Canny vêm do Otsu do gradiente, e não dos valores fixos do D.py.
+    `img_uint8` e `img_grossa_uint8` são as versões uint8 carregadas direto (ver calcular_bordas).
+    """
+    limiar = limiar_otsu(magnitude(*gradientes_sobel_prewitt(img_grossa, dtype)[0]))
+    if img_grossa_uint8 is None:
+        img_grossa_uint8 = para_uint8(img_grossa)
+    limiares_canny = limiares_canny_otsu(img_grossa_uint8)
+    bordas = calcular_bordas(img_gray, dtype, limiares_canny=limiares_canny, limiar=limiar, img_uint8=img_uint8)
+    bordas["limiares_canny"] = limiares_canny
+    return bordas
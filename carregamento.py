@@ -0,0 +1,186 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+import skimage as ski
+from skimage.color import rgb2gray
+
+from perfil import etapa
+from piramide import reduzir
+from precisao import dtype_float
+
+# Orçamento do cache em memória (MB) e diretório do cache em disco (.npy), ambos configuráveis por ambiente
+LIMITE_CACHE_MB = float(os.environ.get("FILTRAGEM_CACHE_MB", 512))
+DIRETORIO_CACHE = os.environ.get("FILTRAGEM_CACHE_DIR") or None
+
+CONVERSOES = ("skimage", "opencv")
+DTYPES = ("float32", "float64", "uint8")
+
+
+class CacheLRU:
+    """Cache LRU de arrays limitado por bytes."""
+
+    def __init__(self, limite_bytes):
+        self.limite_bytes = int(limite_bytes)
+        self.total_bytes = 0
+        self._itens = OrderedDict()
+
+    def obter(self, chave):
+        array = self._itens.get(chave)
+        if array is not None:
+            self._itens.move_to_end(chave)
+        return array
+
+    def guardar(self, chave, array):
+        if array.nbytes > self.limite_bytes:
+            return
+        if chave in self._itens:
+            self.total_bytes -= self._itens.pop(chave).nbytes
+        self._itens[chave] = array
+        self.total_bytes += array.nbytes
+        self._remover_excedente()
+
+    def ajustar_limite(self, limite_bytes):
+        self.limite_bytes = int(limite_bytes)
+        self._remover_excedente()
+
+    def _remover_excedente(self):
+        # Descarta os itens usados há mais tempo até caber no orçamento
+        while self.total_bytes > self.limite_bytes and self._itens:
+            _, removido = self._itens.popitem(last=False)
+            self.total_bytes -= removido.nbytes
+
+    def limpar(self):
+        self._itens.clear()
+        self.total_bytes = 0
+
+
+_cache = CacheLRU(LIMITE_CACHE_MB * 1024 * 1024)
+
+
+def configurar_cache(limite_bytes=None, diretorio=None):
+    """Ajusta o orçamento do cache em memória e/ou o diretório do cache em disco ("" desativa o disco)."""
+    global DIRETORIO_CACHE
+    if limite_bytes is not None:
+        _cache.ajustar_limite(limite_bytes)
+    if diretorio is not None:
+        DIRETORIO_CACHE = diretorio or None
+
+
+def limpar_cache():
+    _cache.limpar()
+
+
+def _chave(caminho, conversao):
+    # Caminho absoluto + mtime + tamanho: qualquer alteração no arquivo invalida a entrada
+    info = os.stat(caminho)
+    return (os.path.abspath(caminho), info.st_mtime_ns, info.st_size, conversao)
+
+
+def _caminho_disco(chave):
+    nome = hashlib.sha1(repr(chave).encode("utf-8")).hexdigest()
+    return os.path.join(DIRETORIO_CACHE, f"{nome}.npy")
+
+
+def _buscar(chave, calcular):
+    array = _cache.obter(chave)
+    if array is not None:
+        return array
+
+    arquivo_cache = _caminho_disco(chave) if DIRETORIO_CACHE else None
+    if arquivo_cache and os.path.exists(arquivo_cache):
+        array = np.load(arquivo_cache)
+    else:
+        array = calcular()
+        if arquivo_cache:
+            os.makedirs(DIRETORIO_CACHE, exist_ok=True)
+            # Escreve em arquivo temporário e renomeia para não deixar .npy pela metade
+            temporario = f"{arquivo_cache}.{os.getpid()}.tmp.npy"
+            np.save(temporario, array)
+            os.replace(temporario, arquivo_cache)
+
+    # O mesmo array é compartilhado entre chamadas: somente leitura
+    array.setflags(write=False)
+    _cache.guardar(chave, array)
+    return array
+
+
+def _decodificar(caminho, conversao):
+    if conversao == "opencv":
+        img = cv2.imread(caminho)
+        if img is None:
+            raise ValueError(f"Não foi possível carregar o arquivo {caminho}.")
+        return img
+    return ski.io.imread(caminho)
+
+
+def carregar_original(caminho, conversao="skimage", nivel=0):
+    """Imagem decodificada sem conversão (RGB do skimage ou BGR do OpenCV), com cache.
+
+    nivel > 0: nível da pirâmide Gaussiana (1/2**nivel em cada eixo), montado a partir do nível anterior em cache.
+    """
+    if conversao not in CONVERSOES:
+        raise ValueError(f"Conversão desconhecida: {conversao}")
+    if nivel > 0:
+        return _buscar(_chave(caminho, ("original", conversao, nivel)),
+                       lambda: _nivel_piramide(carregar_original(caminho, conversao, nivel - 1)))
+
+    def calcular():
+        with etapa("decodificar"):
+            return _decodificar(caminho, conversao)
+
+    return _buscar(_chave(caminho, ("original", conversao)), calcular)
+
+
+def _converter_cinza(original, dtype, conversao):
+    if conversao == "opencv":
+        cinza = cv2.cvtColor(original, cv2.COLOR_BGR2GRAY) if original.ndim == 3 else original
+        return cinza if dtype == "uint8" else cinza.astype(np.float64) / 255.0
+
+    if original.ndim == 3:
+        # Descarta o canal alfa (RGBA) antes do rgb2gray
+        cinza = rgb2gray(original[:, :, :3])
+        return (cinza * 255).astype(np.uint8) if dtype == "uint8" else cinza
+    if original.ndim == 2:
+        if dtype == "uint8":
+            return original if original.dtype == np.uint8 else ski.util.img_as_ubyte(original)
+        return original / 255.0 if original.dtype == np.uint8 else ski.util.img_as_float(original)
+    raise ValueError(f"Formato de imagem inesperado: {original.shape}")
+
+
+def _nivel_piramide(anterior):
+    with etapa("piramide"):
+        return reduzir(anterior)
+
+
+def carregar_cinza(caminho, dtype=None, conversao="skimage", nivel=0):
+    """Imagem em escala de cinza: uint8 [0, 255] ou float [0, 1], com cache em memória e em disco.
+
+    dtype=None usa o ponto flutuante da política do processo (precisao.DTYPE_FLOAT).
+
+    conversao="skimage" usa rgb2gray (como Ruidos.py, D.py e Realce.py);
+    conversao="opencv" usa cv2.cvtColor BGR2GRAY (como B.py).
+
+    nivel > 0 devolve o nível da pirâmide Gaussiana (piramide.reduzir aplicado
+    `nivel` vezes); cada nível fica no cache e é montado a partir do anterior.
+    """
+    if dtype is None:
+        dtype = dtype_float().name
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype não suportado: {dtype}")
+    if conversao not in CONVERSOES:
+        raise ValueError(f"Conversão desconhecida: {conversao}")
+    if nivel > 0:
+        return _buscar(_chave(caminho, ("cinza", conversao, dtype, nivel)),
+                       lambda: _nivel_piramide(carregar_cinza(caminho, dtype, conversao, nivel - 1)))
+
+    def calcular():
+        original = carregar_original(caminho, conversao)
+        with etapa("converter_cinza"):
+            cinza = _converter_cinza(original, dtype, conversao)
+        # A conversão é feita em float64 e arredondada para o dtype pedido só no fim
+        return np.array(cinza, dtype=dtype, copy=True)
+
+    return _buscar(_chave(caminho, ("cinza", conversao, dtype)), calcular)
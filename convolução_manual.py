@@ -1,15 +1,13 @@
 import cv2
 import numpy as np
-import skimage as ski
-from skimage.color import rgb2gray
-from skimage import io
-import matplotlib.pyplot as plt
 import os
 import time
+from carregamento import carregar_cinza
+from renderizacao import mostrar_figura
 
 # --- Funções de Convolução ---
 
-def aplicar_convolucao_manual(imagem_entrada, kernel):
+def _convolucao_laco(imagem_entrada, kernel):
 
     imagem_float = imagem_entrada.astype(np.float32)
     
@@ -42,69 +40,120 @@ def aplicar_convolucao_manual(imagem_entrada, kernel):
             imagem_saida[y, x] = valor
             
     return imagem_saida
-for filename in os.listdir('imgs'):
-    # --- Configurações ---
-    NOME_ARQUIVO_IMAGEM = filename
-    DIRETORIO_ENTRADA = "imgs" 
-    caminho_completo_imagem = os.path.join(DIRETORIO_ENTRADA, NOME_ARQUIVO_IMAGEM)
-
-    # 1. Definição dos Kernels Manuais 3x3
-    # Kernel da Média 3x3: Suavização (todos os pesos iguais, somam 1)
-    kernel_media_3x3 = np.array([
-        [1, 1, 1],
-        [1, 1, 1],
-        [1, 1, 1]
-    ], dtype=np.float32) / 9.0
-
-    # Kernel Laplaciano 3x3: Detecção de Bordas / Nitidez (Soma dos elementos é zero)
-    kernel_laplaciano_3x3 = np.array([
-        [1, 1, 1],
-        [1, -8, 1],
-        [1, 1, 1]
-    ], dtype=np.float32)
-
-    # --- Processamento ---
-
-
-    imagem_original = io.imread(caminho_completo_imagem)
-    
-    # Garantir que a imagem esteja em escala de cinza e UINT8 (0-255)
-    if imagem_original.ndim == 3:
-        if imagem_original.shape[-1] == 4:
-            # Imagem RGBA (4 canais) -> remove o Alpha
-            imagem_rgb = imagem_original[:, :, :3]
-        else:
-            # Imagem RGB (3 canais)
-            imagem_rgb = imagem_original
-        
-        # Converte para escala de cinza
-        imagem_cinza = (rgb2gray(imagem_rgb) * 255).astype(np.uint8)
-    else:
-        imagem_cinza = imagem_original
-            
 
 
-    print(f"\n--- Aplicando Convolução Manual Pura ({imagem_cinza.shape[0]}x{imagem_cinza.shape[1]}) ---")
+# Limite (em número de elementos do kernel) a partir do qual a FFT compensa
+LIMIAR_FFT = 15 * 15
 
-    tempo_inicio = time.time()
 
-    # A) Convolução Média
-    imagem_media_float = aplicar_convolucao_manual(imagem_cinza, kernel_media_3x3)
-    imagem_media_uint8 = np.uint8(np.clip(imagem_media_float, 0, 255))
+def _preencher_zeros(imagem_float, kernel):
+    # Mesmo preenchimento de zeros da versão em laço: (largura_kernel - 1) // 2 em cada borda
+    padding = (kernel.shape[1] - 1) // 2
+    if imagem_float.ndim == 3:
+        # Pilha (N, H, W): só os eixos espaciais são preenchidos
+        return np.pad(imagem_float, ((0, 0), (padding, padding), (padding, padding)))
+    return cv2.copyMakeBorder(imagem_float, padding, padding, padding, padding, cv2.BORDER_CONSTANT, value=0)
 
-    #Laplaciano
-    imagem_laplaciano_float = aplicar_convolucao_manual(imagem_cinza, kernel_laplaciano_3x3)
 
-    tempo_fim = time.time()
-    print(f"Tempo de execução (Python Puro): {tempo_fim - tempo_inicio:.4f} segundos")
+def _convolucao_einsum(imagem_entrada, kernel):
+    imagem_float = imagem_entrada.astype(np.float32)
+    imagem_com_padding = _preencher_zeros(imagem_float, kernel)
+    # Visão com strides de todas as janelas (..., H, W, kh, kw), sem copiar os dados
+    janelas = np.lib.stride_tricks.sliding_window_view(imagem_com_padding, kernel.shape, axis=(-2, -1))
+    janelas = janelas[..., :imagem_float.shape[-2], :imagem_float.shape[-1], :, :]
+    # optimize=False: o laço interno do einsum percorre a visão direto; com optimize=True o
+    # tensordot copiaria as janelas para um (..., H, W, kh*kw) de kh*kw vezes o tamanho da imagem
+    return np.einsum('...ijkl,kl->...ij', janelas, kernel.astype(np.float32), optimize=False).astype(np.float32)
+
+
+def decompor_kernel_separavel(kernel, tolerancia=1e-6):
+    """Retorna (coluna, linha) tal que kernel = outer(coluna, linha), ou None se o kernel não tem posto 1."""
+    u, s, vt = np.linalg.svd(kernel.astype(np.float64))
+    if s[0] == 0 or np.any(s[1:] > tolerancia * s[0]):
+        return None
+    raiz = np.sqrt(s[0])
+    return (u[:, 0] * raiz).astype(np.float32), (vt[0] * raiz).astype(np.float32)
+
+
+def _convolucao_separavel(imagem_entrada, kernel, fatores=None):
+    if fatores is None:
+        fatores = decompor_kernel_separavel(kernel)
+    coluna, linha = fatores
+    imagem_float = imagem_entrada.astype(np.float32)
+    (altura_img, largura_img) = imagem_float.shape[-2:]
+    imagem_com_padding = _preencher_zeros(imagem_float, kernel)
+
+    # Passo horizontal: uma fatia deslocada por peso do kernel (1D)
+    horizontal = np.zeros(imagem_com_padding.shape[:-1] + (largura_img,), dtype=np.float32)
+    for j, peso in enumerate(linha):
+        horizontal += peso * imagem_com_padding[..., j:j + largura_img]
+
+    # Passo vertical
+    imagem_saida = np.zeros(imagem_float.shape, dtype=np.float32)
+    for i, peso in enumerate(coluna):
+        imagem_saida += peso * horizontal[..., i:i + altura_img, :]
+    return imagem_saida
 
-    # 3. Processamento do Laplaciano para Visualização
-    # O Laplaciano tem valores positivos e negativos. Para visualização (UINT8, 0-255), normalizamos.
-    imagem_laplaciano_norm = cv2.normalize(imagem_laplaciano_float, None, 0, 255, cv2.NORM_MINMAX)
-    imagem_laplaciano_uint8 = np.uint8(imagem_laplaciano_norm)
 
-    # --- Visualização ---
-    fig, axes = plt.subplots(1, 3, figsize=(18, 6))
+def _convolucao_fft(imagem_entrada, kernel):
+    imagem_float = imagem_entrada.astype(np.float32)
+    (altura_img, largura_img) = imagem_float.shape[-2:]
+    (altura_kernel, largura_kernel) = kernel.shape
+    imagem_com_padding = _preencher_zeros(imagem_float, kernel)
+
+    # Correlação = convolução com o kernel invertido; o tamanho total evita o aliasing circular
+    # (rfft2 transforma só os dois últimos eixos: uma pilha vai inteira em uma chamada)
+    forma = (imagem_com_padding.shape[-2] + altura_kernel - 1, imagem_com_padding.shape[-1] + largura_kernel - 1)
+    espectro = np.fft.rfft2(imagem_com_padding, forma) * np.fft.rfft2(kernel[::-1, ::-1].astype(np.float64), forma)
+    completa = np.fft.irfft2(espectro, forma)
+    inicio_y, inicio_x = altura_kernel - 1, largura_kernel - 1
+    return completa[..., inicio_y:inicio_y + altura_img, inicio_x:inicio_x + largura_img].astype(np.float32)
+
+
+ESTRATEGIAS = {
+    "laco": _convolucao_laco,
+    "einsum": _convolucao_einsum,
+    "separavel": _convolucao_separavel,
+    "fft": _convolucao_fft,
+}
+
+
+def _estrategia_automatica(kernel, fatores):
+    if fatores is not None:
+        return "separavel"
+    if kernel.size >= LIMIAR_FFT:
+        return "fft"
+    return "einsum"
+
+
+def escolher_estrategia(kernel):
+    """Escolhe a estratégia pelo tamanho e separabilidade do kernel."""
+    return _estrategia_automatica(kernel, decompor_kernel_separavel(kernel))
+
+
+def aplicar_convolucao_manual(imagem_entrada, kernel, estrategia="auto"):
+    """Convolução (correlação) com preenchimento de zeros; estrategia: "auto", "laco", "einsum", "separavel" ou "fft".
+
+    Aceita uma imagem (H, W) ou uma pilha (N, H, W); einsum, separável e FFT filtram a pilha em uma chamada.
+    """
+    # A SVD do kernel é feita uma única vez e serve à escolha e ao filtro separável
+    fatores = decompor_kernel_separavel(kernel) if estrategia in ("auto", "separavel") else None
+    if estrategia == "auto":
+        estrategia = _estrategia_automatica(kernel, fatores)
+    if estrategia not in ESTRATEGIAS:
+        raise ValueError(f"Estratégia desconhecida: {estrategia}")
+    if estrategia == "separavel":
+        if fatores is None:
+            raise ValueError("O kernel não é separável (posto diferente de 1).")
+        return _convolucao_separavel(imagem_entrada, kernel, fatores)
+    if estrategia == "laco" and imagem_entrada.ndim == 3:
+        # A referência pixel a pixel continua quadro a quadro
+        return np.stack([_convolucao_laco(quadro, kernel) for quadro in imagem_entrada])
+    return ESTRATEGIAS[estrategia](imagem_entrada, kernel)
+
+
+def desenhar_figura(fig, imagem_cinza, imagem_media_uint8, imagem_laplaciano_uint8):
+    axes = fig.subplots(1, 3)
     ax = axes.ravel()
 
     ax[0].imshow(imagem_cinza, cmap='gray')
@@ -119,7 +168,60 @@ for filename in os.listdir('imgs'):
     ax[2].set_title(f"3. Laplaciano 3x3 (Bordas Normalizado)")
     ax[2].axis('off')
 
-    plt.tight_layout()
-    os.makedirs('Resultados/convolução_manual', exist_ok=True)
-    plt.savefig(f'Resultados//convolução_manual/media_{filename}')
-    plt.show()
+    fig.tight_layout()
+
+
+if __name__ == "__main__":
+    for filename in os.listdir('imgs'):
+        # --- Configurações ---
+        NOME_ARQUIVO_IMAGEM = filename
+        DIRETORIO_ENTRADA = "imgs" 
+        caminho_completo_imagem = os.path.join(DIRETORIO_ENTRADA, NOME_ARQUIVO_IMAGEM)
+
+        # 1. Definição dos Kernels Manuais 3x3
+        # Kernel da Média 3x3: Suavização (todos os pesos iguais, somam 1)
+        kernel_media_3x3 = np.array([
+            [1, 1, 1],
+            [1, 1, 1],
+            [1, 1, 1]
+        ], dtype=np.float32) / 9.0
+
+        # Kernel Laplaciano 3x3: Detecção de Bordas / Nitidez (Soma dos elementos é zero)
+        kernel_laplaciano_3x3 = np.array([
+            [1, 1, 1],
+            [1, -8, 1],
+            [1, 1, 1]
+        ], dtype=np.float32)
+
+        # --- Processamento ---
+
+
+        # Escala de cinza em UINT8 (0-255); o RGBA perde o canal Alpha no carregamento
+        imagem_cinza = carregar_cinza(caminho_completo_imagem, dtype="uint8")
+            
+
+
+        print(f"\n--- Aplicando Convolução Manual ({imagem_cinza.shape[0]}x{imagem_cinza.shape[1]}) ---")
+
+        tempo_inicio = time.time()
+
+        # A) Convolução Média
+        imagem_media_float = aplicar_convolucao_manual(imagem_cinza, kernel_media_3x3)
+        imagem_media_uint8 = np.uint8(np.clip(imagem_media_float, 0, 255))
+
+        #Laplaciano
+        imagem_laplaciano_float = aplicar_convolucao_manual(imagem_cinza, kernel_laplaciano_3x3)
+
+        tempo_fim = time.time()
+        print(f"Tempo de execução (NumPy): {tempo_fim - tempo_inicio:.4f} segundos")
+
+        # 3. Processamento do Laplaciano para Visualização
+        # O Laplaciano tem valores positivos e negativos. Para visualização (UINT8, 0-255), normalizamos.
+        imagem_laplaciano_norm = cv2.normalize(imagem_laplaciano_float, None, 0, 255, cv2.NORM_MINMAX)
+        imagem_laplaciano_uint8 = np.uint8(imagem_laplaciano_norm)
+
+        # --- Visualização ---
+        paineis = [("Media_3x3", imagem_media_uint8), ("Laplaciano_3x3", imagem_laplaciano_uint8)]
+        mostrar_figura(desenhar_figura, f'Resultados/convolução_manual/media_{filename}',
+                       imagem_cinza, imagem_media_uint8, imagem_laplaciano_uint8,
+                       figsize=(18, 6), paineis=paineis)
\ No newline at end of file
@@ -0,0 +1,116 @@
+import cv2
+import numpy as np
+
+from precisao import dtype_float
+
+# reflect101: borda do cv2.blur (B.py, F.py); ignorar: só pixels dentro da imagem, como
+# ski.filters.rank.mean (Ruidos.py, Convolução.py); constante: fora da imagem vale `valor`
+BORDAS = ("reflect101", "ignorar", "constante")
+# Tipos em que media_local com "reflect101" delega ao cv2.blur
+DTYPES_CV2_BLUR = (np.uint8, np.float32, np.float64)
+
+
+class ImagemIntegral:
+    """Imagens integrais (soma e soma dos quadrados) de uma imagem com borda, para janelas k x k de até 2*raio_max+1.
+
+    Cada janela sai com 4 acessos por pixel, então o custo não depende de k.
+    A integral dos quadrados só é calculada quando a variância é pedida.
+    Somas em float64: exatas para uint8 mesmo em imagens de 8K.
+    """
+
+    def __init__(self, img, raio_max, borda="reflect101", valor=0.0):
+        if borda not in BORDAS:
+            raise ValueError(f"Borda desconhecida: {borda}")
+        self.forma = img.shape[:2]
+        self.raio_max = int(raio_max)
+        self.borda = borda
+        r = self.raio_max
+        if borda == "reflect101":
+            self._preenchida = cv2.copyMakeBorder(img, r, r, r, r, cv2.BORDER_REFLECT_101)
+        else:
+            self._preenchida = cv2.copyMakeBorder(img, r, r, r, r, cv2.BORDER_CONSTANT,
+                                                  value=0 if borda == "ignorar" else valor)
+        self._soma = cv2.integral(self._preenchida, sdepth=cv2.CV_64F)
+        self._quadrados = None
+        self._contagem = None
+        if borda == "ignorar":
+            # Quantos pixels de cada janela caem dentro da imagem
+            dentro = cv2.copyMakeBorder(np.ones(self.forma, dtype=np.uint8), r, r, r, r, cv2.BORDER_CONSTANT, value=0)
+            self._contagem = cv2.integral(dentro, sdepth=cv2.CV_64F)
+
+    def _janela(self, integral, k):
+        if k % 2 == 0 or k // 2 > self.raio_max:
+            raise ValueError(f"Janela {k} inválida para raio máximo {self.raio_max}")
+        altura, largura = self.forma
+        # Janela k x k centrada: canto superior esquerdo em (y - k//2, x - k//2) na imagem original
+        y0 = x0 = self.raio_max - k // 2
+        return cv2.add(cv2.subtract(integral[y0 + k:y0 + k + altura, x0 + k:x0 + k + largura],
+                                    integral[y0:y0 + altura, x0 + k:x0 + k + largura]),
+                       cv2.subtract(integral[y0:y0 + altura, x0:x0 + largura],
+                                    integral[y0 + k:y0 + k + altura, x0:x0 + largura]))
+
+    def soma(self, k):
+        return self._janela(self._soma, k)
+
+    def soma_quadrados(self, k):
+        if self._quadrados is None:
+            _, self._quadrados = cv2.integral2(self._preenchida, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+        return self._janela(self._quadrados, k)
+
+    def contagem(self, k):
+        """Pixels considerados em cada janela (k*k, exceto na borda "ignorar")."""
+        if self._contagem is None:
+            return float(k * k)
+        return self._janela(self._contagem, k)
+
+    def media(self, k):
+        """Média local em float64."""
+        return self.soma(k) / self.contagem(k)
+
+    def variancia(self, k):
+        """Variância local (populacional) em float64: E[x²] - E[x]², recortada em 0."""
+        contagem = self.contagem(k)
+        media = self.soma(k) / contagem
+        variancia = self.soma_quadrados(k) / contagem
+        variancia -= media * media
+        return np.maximum(variancia, 0, out=variancia)
+
+    def desvio(self, k):
+        return np.sqrt(self.variancia(k))
+
+
+def media_local(img, k, borda="reflect101", valor=0.0):
+    """Filtro da média k x k com custo O(1) por pixel, no dtype da entrada.
+
+    "reflect101" é o próprio cv2.blur (uint8, float32 e float64); "ignorar"
+    trunca em uint8 como ski.filters.rank.mean (resultado idêntico) e, como
+    "constante", sai da imagem integral.
+    """
+    if borda == "reflect101" and img.dtype in DTYPES_CV2_BLUR:
+        return cv2.blur(img, (k, k))
+    integral = ImagemIntegral(img, k // 2, borda, valor)
+    if img.dtype != np.uint8:
+        return (integral.soma(k) / integral.contagem(k)).astype(img.dtype, copy=False)
+    if borda == "ignorar":
+        return np.floor_divide(integral.soma(k), integral.contagem(k)).astype(np.uint8)
+    return cv2.convertScaleAbs(integral.soma(k), alpha=1.0 / (k * k))
+
+
+def variancia_local(img, k, borda="reflect101", valor=0.0, dtype=None):
+    return ImagemIntegral(img, k // 2, borda, valor).variancia(k).astype(dtype_float(dtype))
+
+
+def desvio_local(img, k, borda="reflect101", valor=0.0, dtype=None):
+    return ImagemIntegral(img, k // 2, borda, valor).desvio(k).astype(dtype_float(dtype))
+
+
+def estatisticas_locais(img, k, borda="reflect101", valor=0.0, dtype=None):
+    """(média, variância, desvio) locais k x k a partir de um único par de imagens integrais, no dtype da política."""
+    integral = ImagemIntegral(img, k // 2, borda, valor)
+    contagem = integral.contagem(k)
+    media = integral.soma(k) / contagem
+    variancia = integral.soma_quadrados(k) / contagem
+    variancia -= media * media
+    np.maximum(variancia, 0, out=variancia)
+    dtype = dtype_float(dtype)
+    return media.astype(dtype), variancia.astype(dtype), np.sqrt(variancia).astype(dtype)
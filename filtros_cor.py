@@ -0,0 +1,126 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+from B import mediana_adaptativa_vetorizada
+from carregamento import carregar_original
+from processamento_blocos import raio_gaussiano_scipy
+from realce_fundido import AMOUNT_UNSHARP, RAIO_UNSHARP
+
+# "canais": os três canais filtrados juntos, direto no buffer intercalado H x W x 3;
+# "luminancia": só o Y do YCrCb é filtrado (um canal em vez de três) e a crominância fica intacta
+MODOS = ("canais", "luminancia")
+# Ordem dos canais: "bgr" (cv2.imread, padrão) ou "rgb" (skimage.io.imread)
+CONVERSOES_YCRCB = {
+    "bgr": (cv2.COLOR_BGR2YCrCb, cv2.COLOR_YCrCb2BGR),
+    "rgb": (cv2.COLOR_RGB2YCrCb, cv2.COLOR_YCrCb2RGB),
+}
+
+
+def carregar_cor(caminho):
+    """Imagem colorida BGR uint8 (H x W x 3) gravável, a partir do cache do carregamento."""
+    return np.array(carregar_original(caminho, conversao="opencv"), copy=True)
+
+
+def filtrar_cor(img, funcao, modo="canais", ordem="bgr", out=None):
+    """Aplica `funcao(src, dst)` a uma imagem colorida uint8 H x W x 3 sem separar os canais.
+
+    `funcao` segue a convenção do cv2: grava em `dst` e o retorna; recebe um array
+    contíguo de 3 canais (modo "canais") ou de 1 canal (modo "luminancia").
+    out=img filtra no próprio buffer; out=None aloca a saída. No modo
+    "luminancia" a conversão para YCrCb e a volta são feitas dentro de `out` e
+    só o canal Y é copiado (uma vez) para ser filtrado.
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo desconhecido: {modo}")
+    if ordem not in CONVERSOES_YCRCB:
+        raise ValueError(f"Ordem de canais desconhecida: {ordem}")
+    if img.dtype != np.uint8 or img.ndim != 3 or img.shape[2] != 3:
+        raise ValueError(f"Esperada imagem uint8 H x W x 3, recebido {img.dtype} {img.shape}")
+    if out is None:
+        out = np.empty_like(img)
+
+    if modo == "canais":
+        return funcao(img, out)
+
+    ida, volta = CONVERSOES_YCRCB[ordem]
+    ycrcb = cv2.cvtColor(img, ida, dst=out)
+    luminancia = cv2.extractChannel(ycrcb, 0)
+    luminancia = funcao(luminancia, luminancia)
+    cv2.insertChannel(luminancia, ycrcb, 0)
+    return cv2.cvtColor(ycrcb, volta, dst=out)
+
+
+def media_cor(img, k, modo="canais", ordem="bgr", out=None):
+    """Média k x k (cv2.blur, borda refletida) da imagem colorida."""
+    return filtrar_cor(img, lambda src, dst: cv2.blur(src, (k, k), dst=dst), modo, ordem, out)
+
+
+def mediana_cor(img, k, modo="canais", ordem="bgr", out=None):
+    """Mediana k x k (cv2.medianBlur, borda replicada) da imagem colorida."""
+    return filtrar_cor(img, lambda src, dst: cv2.medianBlur(src, k, dst=dst), modo, ordem, out)
+
+
+def gaussiano_cor(img, sigma, modo="canais", ordem="bgr", out=None):
+    """Gaussiano do cv2 (tamanho do kernel derivado de sigma) da imagem colorida."""
+    return filtrar_cor(img, lambda src, dst: cv2.GaussianBlur(src, (0, 0), sigma, dst=dst), modo, ordem, out)
+
+
+def mediana_adaptativa_cor(img, max_ksize=9, min_ksize=3, modo="canais", ordem="bgr", out=None):
+    """Mediana adaptativa do B.py com as estatísticas de janela de cada canal calculadas em conjunto pelo cv2."""
+    def adaptativa(src, dst):
+        np.copyto(dst, mediana_adaptativa_vetorizada(src, max_ksize=max_ksize, min_ksize=min_ksize, cor=src.ndim == 3))
+        return dst
+    return filtrar_cor(img, adaptativa, modo, ordem, out)
+
+
+def unsharp_cor(img, raio=RAIO_UNSHARP, amount=AMOUNT_UNSHARP, modo="canais", ordem="bgr", out=None):
+    """Unsharp mask em uint8: img + amount * (img - gaussiano(img)), saturado em [0, 255].
+
+    Mesmo desfoque do realce_fundido (borda refletida, kernel truncado em 4 sigmas),
+    mas em aritmética de 8 bits do cv2; o resultado difere do caminho em float só
+    pelo arredondamento. No modo "luminancia" a cor não ganha halos.
+    """
+    ksize = 2 * raio_gaussiano_scipy(raio) + 1
+
+    def realcar(src, dst):
+        borrada = cv2.GaussianBlur(src, (ksize, ksize), raio, borderType=cv2.BORDER_REFLECT)
+        return cv2.addWeighted(src, 1 + amount, borrada, -amount, 0, dst=dst)
+    return filtrar_cor(img, realcar, modo, ordem, out)
+
+
+FILTROS = {
+    "media": lambda img, args, out: media_cor(img, args.k, args.modo, out=out),
+    "mediana": lambda img, args, out: mediana_cor(img, args.k, args.modo, out=out),
+    "gaussiano": lambda img, args, out: gaussiano_cor(img, args.sigma, args.modo, out=out),
+    "mediana_adaptativa": lambda img, args, out: mediana_adaptativa_cor(img, args.max_ksize, modo=args.modo, out=out),
+    "unsharp": lambda img, args, out: unsharp_cor(img, args.sigma, args.amount, args.modo, out=out),
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Filtra uma imagem colorida (canais intercalados ou só a luminância).")
+    parser.add_argument("imagem")
+    parser.add_argument("--filtro", default="mediana", choices=FILTROS)
+    parser.add_argument("--modo", default="canais", choices=MODOS)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--sigma", type=float, default=1.0)
+    parser.add_argument("--amount", type=float, default=AMOUNT_UNSHARP)
+    parser.add_argument("--max-ksize", type=int, default=9)
+    parser.add_argument("--saida-dir", default="Resultados/cor")
+    args = parser.parse_args()
+
+    img = carregar_cor(args.imagem)
+    inicio = time.perf_counter()
+    # Filtra no próprio buffer da imagem carregada
+    FILTROS[args.filtro](img, args, img)
+    print(f"{args.filtro} ({args.modo}): {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    os.makedirs(args.saida_dir, exist_ok=True)
+    base = os.path.splitext(os.path.basename(args.imagem))[0]
+    caminho = os.path.join(args.saida_dir, f"{base}_{args.filtro}_{args.modo}.png")
+    cv2.imwrite(caminho, img)
+    print(f"Imagem salva em: {caminho}")
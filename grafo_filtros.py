@@ -0,0 +1,406 @@
+import argparse
+import importlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+from skimage.util import img_as_ubyte
+
+from bordas import calcular_bordas
+from carregamento import carregar_cinza
+from estatisticas_locais import media_local
+from metricas import calcular_metricas_lote, calcular_nitidez_contraste_lote
+from perfil import etapa
+from precisao import para_float, para_uint8
+from processamento_blocos import filtro_em_blocos
+from processamento_lote import listar_imagens, numero_workers
+from realce_fundido import realcar
+from renderizacao import salvar_paineis
+from ruido import GeradorRuido
+from Ruidos import (AMOUNT_SP_5, PROPORCAO_SAL, SEMENTE_RUIDO, SIGMA_GAUSSIANO, TAMANHO_KERNEL,
+                    VAR_GAUSSIANO_NORMALIZADA)
+from tabela_metricas import TabelaMetricas
+
+convolucao_manual = importlib.import_module("convolução_manual")
+
+# Threads do grafo (FILTRAGEM_THREADS_GRAFO; padrão: todos os núcleos). cv2, scipy e
+# numpy liberam o GIL nos filtros, então ramos independentes rodam de fato em paralelo
+VARIAVEL_THREADS = "FILTRAGEM_THREADS_GRAFO"
+
+OPERACOES = {}
+
+# Kernels do convolução_manual.py, referenciados pelo nome na configuração
+KERNELS_CONVOLUCAO = {
+    "media_3x3": np.ones((3, 3), dtype=np.float32) / 9.0,
+    "laplaciano_3x3": np.array([[1, 1, 1], [1, -8, 1], [1, 1, 1]], dtype=np.float32),
+}
+
+
+def operacao(nome):
+    """Registra uma função como operação do grafo: recebe as saídas dos nós de entrada e os parâmetros."""
+    def registrar(funcao):
+        OPERACOES[nome] = funcao
+        return funcao
+    return registrar
+
+
+@operacao("carregar")
+def _carregar(caminho, dtype=None, conversao="skimage", nivel=0):
+    return carregar_cinza(caminho, dtype=dtype, conversao=conversao, nivel=nivel)
+
+
+@operacao("uint8")
+def _uint8(img):
+    return para_uint8(img)
+
+
+@operacao("ubyte")
+def _ubyte(img):
+    # Arredonda como o img_as_ubyte do Convolução.py (o "uint8" trunca)
+    return img_as_ubyte(img)
+
+
+@operacao("float")
+def _float(img):
+    return para_float(img)
+
+
+@operacao("filtro")
+def _filtro(img, nome, **params):
+    # Os mesmos filtros do processamento em blocos (media = cv2.blur, mediana, gaussiano, ...)
+    funcao, _ = filtro_em_blocos(nome, dtype=img.dtype, **params)
+    return funcao(img)
+
+
+@operacao("recortar")
+def _recortar(img, minimo=0.0, maximo=1.0, dtype=None):
+    recortada = np.clip(img, minimo, maximo)
+    return recortada.astype(dtype) if dtype else recortada
+
+
+@operacao("media_local")
+def _media_local(img, k, borda="reflect101"):
+    return media_local(img, k, borda)
+
+
+@operacao("ruido")
+def _ruido(img, tipo, semente=0, realizacao=0, **params):
+    gerador = GeradorRuido(semente)
+    if tipo == "gaussiano":
+        return gerador.gaussiano(img, params["var"], realizacao=realizacao)
+    if tipo == "sal_e_pimenta":
+        return gerador.sal_e_pimenta(img, params["amount"], params.get("salt_vs_pepper", 0.5), realizacao=realizacao)
+    raise ValueError(f"Ruído desconhecido: {tipo}")
+
+
+@operacao("convolucao_manual")
+def _convolucao_manual(img, kernel, estrategia="auto"):
+    # O kernel vai pelo nome: uma lista nos parâmetros viraria uma variante por valor
+    return convolucao_manual.aplicar_convolucao_manual(img, KERNELS_CONVOLUCAO[kernel], estrategia)
+
+
+@operacao("bordas")
+def _bordas(img, **params):
+    return calcular_bordas(img, **params)
+
+
+@operacao("realce")
+def _realce(img, **params):
+    return realcar(img, **params)
+
+
+@operacao("selecionar")
+def _selecionar(resultados, chave):
+    return resultados[chave]
+
+
+@operacao("qualidade")
+def _qualidade(referencia, img):
+    # MSE, PSNR e SSIM em [0, 1], como no Ruidos.py
+    return {nome: float(valores[0]) for nome, valores in calcular_metricas_lote(para_float(referencia), para_float(img)).items()}
+
+
+@operacao("nitidez_contraste")
+def _nitidez_contraste(img):
+    return {nome: float(valores[0]) for nome, valores in calcular_nitidez_contraste_lote(img).items()}
+
+
+@operacao("salvar")
+def _salvar(img, caminho, titulo):
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    return salvar_paineis(caminho, [(titulo, img)])
+
+
+class No:
+    def __init__(self, indice, operacao, params, entradas, imagem):
+        self.indice = indice
+        self.operacao = operacao
+        self.params = params
+        self.entradas = entradas
+        self.imagem = imagem
+        self.consumidores = []
+
+    def descricao(self):
+        params = ", ".join(f"{nome}={valor}" for nome, valor in self.params.items() if nome != "caminho")
+        return f"{self.operacao}({params})"
+
+
+class Grafo:
+    """Grafo acíclico de operações sobre imagens, com nós deduplicados e execução concorrente.
+
+    `no()` devolve o índice de um nó já existente quando operação, parâmetros e
+    entradas coincidem, então cada resultado intermediário é calculado uma única
+    vez mesmo que vários estudos o peçam. Na execução, cada nó roda assim que
+    suas entradas ficam prontas, e a saída de um nó é liberada logo que o último
+    consumidor termina (exceto os nós pedidos em `manter`).
+    """
+
+    def __init__(self):
+        self.nos = []
+        self._indice = {}
+
+    def no(self, operacao, *entradas, **params):
+        if operacao not in OPERACOES:
+            raise ValueError(f"Operação desconhecida: {operacao}")
+        chave = (operacao, json.dumps(params, sort_keys=True), entradas)
+        indice = self._indice.get(chave)
+        if indice is not None:
+            return indice
+
+        imagem = os.path.basename(params["caminho"]) if "caminho" in params else None
+        if imagem is None and entradas:
+            imagem = self.nos[entradas[0]].imagem
+        indice = len(self.nos)
+        self.nos.append(No(indice, operacao, params, entradas, imagem))
+        for entrada in set(entradas):
+            self.nos[entrada].consumidores.append(indice)
+        self._indice[chave] = indice
+        return indice
+
+    def caminho(self, indice):
+        """Descrição da cadeia de operações que leva ao nó (seguindo a primeira entrada)."""
+        partes = []
+        while True:
+            no = self.nos[indice]
+            partes.append(no.descricao())
+            if not no.entradas:
+                return " > ".join(reversed(partes))
+            indice = no.entradas[0]
+
+    def _rodar(self, no, valores):
+        with etapa(f"no:{no.operacao}", imagem=no.imagem):
+            return OPERACOES[no.operacao](*(valores[entrada] for entrada in no.entradas), **no.params)
+
+    def executar(self, manter=(), num_threads=None):
+        """Executa o grafo e retorna (resultados dos nós em `manter`, erros por nó).
+
+        Um nó que falha não derruba o resto: só os nós que dependem dele deixam de rodar.
+        """
+        manter = set(manter)
+        faltando = [len(set(no.entradas)) for no in self.nos]
+        restantes = [len(no.consumidores) for no in self.nos]
+        valores, resultados, erros = {}, {}, {}
+
+        def liberar_entradas(no):
+            for entrada in set(no.entradas):
+                restantes[entrada] -= 1
+                if restantes[entrada] == 0 and entrada not in manter:
+                    valores.pop(entrada, None)
+
+        def cancelar(no, motivo):
+            for indice in no.consumidores:
+                consumidor = self.nos[indice]
+                if indice not in erros:
+                    erros[indice] = motivo
+                    liberar_entradas(consumidor)
+                    cancelar(consumidor, motivo)
+
+        with ThreadPoolExecutor(max_workers=numero_workers(num_threads, VARIAVEL_THREADS), thread_name_prefix="grafo") as executor:
+            em_execucao = {executor.submit(self._rodar, no, valores): no for no in self.nos if faltando[no.indice] == 0}
+            while em_execucao:
+                concluidos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                for futuro in concluidos:
+                    no = em_execucao.pop(futuro)
+                    try:
+                        valor = futuro.result()
+                    except Exception as e:
+                        erros[no.indice] = f"{type(e).__name__}: {e}"
+                        cancelar(no, f"entrada com erro ({no.descricao()})")
+                        liberar_entradas(no)
+                        continue
+
+                    if restantes[no.indice] > 0 or no.indice in manter:
+                        valores[no.indice] = valor
+                    if no.indice in manter:
+                        resultados[no.indice] = valor
+                    liberar_entradas(no)
+                    for indice in no.consumidores:
+                        faltando[indice] -= 1
+                        if faltando[indice] == 0 and indice not in erros:
+                            em_execucao[executor.submit(self._rodar, self.nos[indice], valores)] = self.nos[indice]
+        return resultados, erros
+
+
+# --- Configuração de execução ---
+# Cada estudo carrega a imagem de um jeito e aplica ramos (cadeias de passos) sobre ela.
+# Um parâmetro com lista de valores gera uma variante por valor; as variantes de todos os
+# passos são combinadas. Os nós repetidos entre estudos (mesma carga, mesmo filtro) são
+# calculados uma vez. Equivale aos scripts B, F, Ruidos, D, Realce, Convolução e convolução_manual.
+
+# Ruídos e filtros do Ruidos.py, com as mesmas constantes: Média e Mediana em uint8, Gaussiano em float recortado em [0, 1]
+RUIDOS_ESTUDO = [
+    {"tipo": "gaussiano", "var": VAR_GAUSSIANO_NORMALIZADA, "semente": SEMENTE_RUIDO},
+    {"tipo": "sal_e_pimenta", "amount": AMOUNT_SP_5, "salt_vs_pepper": PROPORCAO_SAL, "semente": SEMENTE_RUIDO},
+]
+FILTROS_ESTUDO_RUIDOS = [
+    [],
+    [{"op": "uint8"}, {"op": "media_local", "k": TAMANHO_KERNEL, "borda": "ignorar"}],
+    [{"op": "uint8"}, {"op": "filtro", "nome": "mediana", "k": TAMANHO_KERNEL}],
+    [{"op": "filtro", "nome": "gaussiano_scipy", "sigma": SIGMA_GAUSSIANO}, {"op": "recortar"}],
+]
+
+CONFIG_PADRAO = {
+    "imagens": "imgs",
+    "saida": "Resultados/grafo",
+    "estudos": {
+        "suavizacao": {
+            "carregar": {"dtype": "uint8", "conversao": "opencv"},
+            "ramos": [
+                [{"op": "filtro", "nome": "media", "k": [3, 5, 7]}],
+                [{"op": "filtro", "nome": "gaussiano", "sigma": [0.8, 1.6]}],
+                [{"op": "filtro", "nome": "mediana", "k": [3, 5, 7]}],
+                [{"op": "filtro", "nome": "mediana_adaptativa", "max_ksize": 9}],
+            ],
+            "salvar": True,
+        },
+        "mini_estudo": {
+            "carregar": {"dtype": "uint8"},
+            "ramos": [[], [{"op": "filtro", "nome": "media", "k": [3, 5, 9]}]],
+            "metricas": ["nitidez_contraste"],
+        },
+        "ruidos": {
+            "carregar": {},
+            "ramos": [[{"op": "ruido", **ruido}, *filtro] for ruido in RUIDOS_ESTUDO for filtro in FILTROS_ESTUDO_RUIDOS],
+            "metricas": ["qualidade"],
+            "salvar": True,
+        },
+        "bordas": {
+            "carregar": {},
+            "ramos": [[{"op": "bordas"}, {"op": "selecionar", "chave": ["sobel", "prewitt", "sobel_otsu", "canny"]}]],
+            "salvar": True,
+        },
+        "realce": {
+            "carregar": {},
+            "ramos": [[{"op": "realce", "raio": 1, "amount": 1, "fator_high_boost": 2.5},
+                       {"op": "selecionar", "chave": ["nitido", "laplaciano", "high_boost"]}]],
+            "salvar": True,
+        },
+        "convolucao": {
+            "carregar": {"dtype": "float64"},
+            "ramos": [[{"op": "ubyte"}, {"op": "media_local", "k": 3, "borda": "ignorar"}]],
+            "salvar": True,
+        },
+        "convolucao_manual": {
+            "carregar": {"dtype": "uint8"},
+            "ramos": [
+                # Como no script: a média é saturada em uint8 e o Laplaciano é normalizado ao salvar
+                [{"op": "convolucao_manual", "kernel": "media_3x3"}, {"op": "recortar", "maximo": 255, "dtype": "uint8"}],
+                [{"op": "convolucao_manual", "kernel": "laplaciano_3x3"}],
+            ],
+            "salvar": True,
+        },
+    },
+}
+
+ESQUEMA_TABELA = [("Execução", "i8"), ("Estudo", "categoria"), ("Arquivo", "categoria"),
+                  ("Cadeia", "categoria"), ("Métrica", "categoria"), ("Valor", "f8")]
+
+
+def variantes(passo):
+    """Expande um passo com parâmetros em lista em uma lista de (op, params)."""
+    params = {nome: valor for nome, valor in passo.items() if nome != "op"}
+    nomes = list(params)
+    grades = [valor if isinstance(valor, list) else [valor] for valor in params.values()]
+    return [(passo["op"], dict(zip(nomes, combinacao))) for combinacao in itertools.product(*grades)]
+
+
+def montar_grafo(config, imagens):
+    """Monta o grafo de todos os estudos para as imagens; retorna (grafo, nós de métrica, nós salvos)."""
+    grafo = Grafo()
+    nos_metricas = []
+    nos_salvos = []
+    for nome_estudo, estudo in config["estudos"].items():
+        diretorio = os.path.join(config["saida"], nome_estudo)
+        for caminho, nome in imagens:
+            original = grafo.no("carregar", caminho=caminho, **estudo.get("carregar", {}))
+            for ramo in estudo["ramos"]:
+                for cadeia in itertools.product(*(variantes(passo) for passo in ramo)):
+                    atual = original
+                    for op, params in cadeia:
+                        atual = grafo.no(op, atual, **params)
+
+                    for metrica in estudo.get("metricas", []):
+                        entradas = (original, atual) if metrica == "qualidade" else (atual,)
+                        nos_metricas.append((nome_estudo, nome, atual, grafo.no(metrica, *entradas)))
+                    if estudo.get("salvar") and atual != original:
+                        base = os.path.join(diretorio, os.path.splitext(nome)[0])
+                        titulo = "_".join(grafo.nos[indice].descricao() for indice in _cadeia(grafo, atual, original))
+                        nos_salvos.append(grafo.no("salvar", atual, caminho=base, titulo=titulo))
+    return grafo, nos_metricas, nos_salvos
+
+
+def _cadeia(grafo, atual, original):
+    indices = []
+    while atual != original:
+        indices.append(atual)
+        atual = grafo.nos[atual].entradas[0]
+    return reversed(indices)
+
+
+def executar_config(config, num_threads=None):
+    imagens = listar_imagens(config["imagens"])
+    grafo, nos_metricas, nos_salvos = montar_grafo(config, imagens)
+    print(f"{len(grafo.nos)} nó(s) para {len(imagens)} imagem(ns) e {len(config['estudos'])} estudo(s).")
+
+    inicio = time.perf_counter()
+    resultados, erros = grafo.executar(manter=[no for *_, no in nos_metricas], num_threads=num_threads)
+    print(f"Grafo executado em {time.perf_counter() - inicio:.2f} s.")
+
+    for indice, erro in erros.items():
+        print(f"Erro em {grafo.caminho(indice)} [{grafo.nos[indice].imagem}]: {erro}")
+
+    linhas = []
+    execucao = time.time_ns() // 1_000_000
+    for nome_estudo, nome, atual, indice in nos_metricas:
+        for metrica, valor in resultados.get(indice, {}).items():
+            linhas.append({"Execução": execucao, "Estudo": nome_estudo, "Arquivo": nome,
+                           "Cadeia": grafo.caminho(atual), "Métrica": metrica, "Valor": valor})
+    if linhas:
+        tabela = TabelaMetricas(os.path.join(config["saida"], "metricas"), ESQUEMA_TABELA)
+        tabela.anexar(linhas)
+        print(tabela.para_texto(["Estudo", "Arquivo", "Cadeia", "Métrica", "Valor"],
+                                tabela.mascara(**{"Execução": execucao})))
+    print(f"{len(nos_salvos) - sum(indice in erros for indice in nos_salvos)} imagem(ns) salva(s) em '{config['saida']}'.")
+    return resultados, erros
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Executa todos os estudos como um único grafo de filtros.")
+    parser.add_argument("config", nargs="?", help="JSON de configuração (padrão: CONFIG_PADRAO)")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--exportar-config", help="Grava a configuração padrão neste JSON e sai")
+    args = parser.parse_args()
+
+    if args.exportar_config:
+        with open(args.exportar_config, "w", encoding="utf-8") as f:
+            json.dump(CONFIG_PADRAO, f, ensure_ascii=False, indent=2)
+        print(f"Configuração salva em: {args.exportar_config}")
+    else:
+        config = CONFIG_PADRAO
+        if args.config:
+            with open(args.config, encoding="utf-8") as f:
+                config = json.load(f)
+        executar_config(config, args.threads)
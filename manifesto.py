@@ -0,0 +1,67 @@
+import hashlib
+import inspect
+import json
+import os
+
+_hashes = {}
+
+
+def hash_arquivo(caminho, tamanho_bloco=1 << 20):
+    """SHA-256 do conteúdo do arquivo (memorizado por caminho, mtime e tamanho)."""
+    info = os.stat(caminho)
+    chave = (os.path.abspath(caminho), info.st_mtime_ns, info.st_size)
+    if chave not in _hashes:
+        h = hashlib.sha256()
+        with open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+                h.update(bloco)
+        _hashes[chave] = h.hexdigest()
+    return _hashes[chave]
+
+
+def versao_codigo(*objetos):
+    """Hash curto do código-fonte de funções ou módulos; muda quando a implementação muda."""
+    h = hashlib.sha1()
+    for objeto in objetos:
+        h.update(inspect.getsource(objeto).encode("utf-8"))
+    return h.hexdigest()[:12]
+
+
+def descritor(hash_entrada, filtro, parametros, versao):
+    """O que determina uma saída: conteúdo da entrada, filtro, parâmetros e versão do código."""
+    # Ida e volta pelo JSON para comparar exatamente com o que foi salvo
+    return json.loads(json.dumps({
+        "hash_entrada": hash_entrada,
+        "filtro": filtro,
+        "parametros": parametros,
+        "versao_codigo": versao,
+    }, sort_keys=True))
+
+
+class Manifesto:
+    """Registro das saídas geradas: para cada arquivo, o descritor que o produziu e suas métricas."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.saidas = {}
+        if os.path.exists(caminho):
+            with open(caminho, encoding="utf-8") as f:
+                self.saidas = json.load(f).get("saidas", {})
+
+    def valido(self, saida, descritor_atual):
+        """True se `saida` existe e foi gerada exatamente com este descritor."""
+        entrada = self.saidas.get(saida)
+        return entrada is not None and entrada["descritor"] == descritor_atual and os.path.exists(saida)
+
+    def metricas(self, saida):
+        return self.saidas[saida].get("metricas")
+
+    def registrar(self, saida, descritor_atual, metricas=None):
+        self.saidas[saida] = {"descritor": descritor_atual, "metricas": metricas}
+
+    def salvar(self):
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        temporario = f"{self.caminho}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"saidas": self.saidas}, f, indent=1, ensure_ascii=False, sort_keys=True)
+        os.replace(temporario, self.caminho)
@@ -0,0 +1,118 @@
+import numpy as np
+from scipy.ndimage import uniform_filter
+
+from precisao import dtype_float
+
+# Parâmetros do SSIM iguais aos padrões do skimage.metrics.structural_similarity
+SSIM_JANELA = 7
+SSIM_K1 = 0.01
+SSIM_K2 = 0.03
+# Janela do contraste local (desvio-padrão em cada vizinhança)
+JANELA_CONTRASTE_LOCAL = 7
+
+
+def _como_pilha(imagens):
+    # Aceita uma imagem (H, W), uma pilha (N, H, W) ou uma lista de imagens do mesmo tamanho
+    pilha = np.asarray(imagens) if not isinstance(imagens, (list, tuple)) else np.stack(imagens)
+    return pilha[np.newaxis] if pilha.ndim == 2 else pilha
+
+
+def _para_float(pilha):
+    # Pixels no dtype da política (float32 por padrão: representa exatamente valores uint8
+    # e tem precisão de sobra para imagens em [0, 1]); as somas são sempre em float64
+    return pilha.astype(dtype_float(), copy=False)
+
+
+def mse_lote(referencia, pilha):
+    """MSE de cada imagem da pilha contra a referência (diferenças no dtype da política, soma em float64)."""
+    pilha = _para_float(_como_pilha(pilha))
+    diferenca = pilha - _para_float(np.asarray(referencia))
+    return np.square(diferenca).mean(axis=(1, 2), dtype=np.float64)
+
+
+def psnr_de_mse(mse, data_range=1.0):
+    mse = np.asarray(mse, dtype=np.float64)
+    with np.errstate(divide='ignore'):
+        return 10 * np.log10((data_range ** 2) / mse)
+
+
+def ssim_lote(referencia, pilha, data_range=1.0):
+    """SSIM médio (janela uniforme 7x7, covariância amostral) de cada imagem da pilha contra a referência."""
+    pilha = _para_float(_como_pilha(pilha))
+    ref = _para_float(np.asarray(referencia))[np.newaxis]
+    tamanho = (1, SSIM_JANELA, SSIM_JANELA)
+    n = SSIM_JANELA ** 2
+    cov_norm = n / (n - 1)
+
+    # As estatísticas da referência são calculadas uma única vez para a pilha toda
+    ux = uniform_filter(ref, size=tamanho)
+    vx = cov_norm * (uniform_filter(ref * ref, size=tamanho) - ux * ux)
+    uy = uniform_filter(pilha, size=tamanho)
+    vy = cov_norm * (uniform_filter(pilha * pilha, size=tamanho) - uy * uy)
+    vxy = cov_norm * (uniform_filter(pilha * ref, size=tamanho) - ux * uy)
+
+    c1 = (SSIM_K1 * data_range) ** 2
+    c2 = (SSIM_K2 * data_range) ** 2
+    s = ((2 * ux * uy + c1) * (2 * vxy + c2)) / ((ux ** 2 + uy ** 2 + c1) * (vx + vy + c2))
+
+    # Ignora a faixa da borda com o raio da janela, como o skimage
+    pad = (SSIM_JANELA - 1) // 2
+    return s[:, pad:-pad, pad:-pad].mean(axis=(1, 2), dtype=np.float64)
+
+
+def desvio_padrao_lote(pilha):
+    """Desvio-padrão global de cada imagem da pilha."""
+    return _para_float(_como_pilha(pilha)).std(axis=(1, 2), dtype=np.float64)
+
+
+def _somas_janela(pilha, janela):
+    # Soma janela x janela em cada imagem da pilha por imagem integral (borda refletida como no cv2);
+    # em float64 as somas de valores uint8 e dos seus quadrados são exatas
+    r = janela // 2
+    p = np.pad(pilha, ((0, 0), (r, r), (r, r)), mode='reflect')
+    integral = np.zeros((p.shape[0], p.shape[1] + 1, p.shape[2] + 1))
+    np.cumsum(np.cumsum(p, axis=1), axis=2, out=integral[:, 1:, 1:])
+    return (integral[:, janela:, janela:] - integral[:, :-janela, janela:]
+            - integral[:, janela:, :-janela] + integral[:, :-janela, :-janela])
+
+
+def contraste_local_lote(pilha, janela=JANELA_CONTRASTE_LOCAL):
+    """Média do desvio-padrão local (janela x janela, borda refletida) de cada imagem da pilha.
+
+    A pilha inteira passa de uma vez pelas imagens integrais, como estatisticas_locais.desvio_local faz com uma imagem.
+    """
+    pilha = _para_float(_como_pilha(pilha)).astype(np.float64)
+    n = janela * janela
+    media = _somas_janela(pilha, janela) / n
+    variancia = _somas_janela(pilha * pilha, janela) / n
+    variancia -= media * media
+    np.maximum(variancia, 0, out=variancia)
+    return np.sqrt(variancia).mean(axis=(1, 2))
+
+
+def variancia_laplaciano_lote(pilha):
+    """Variância do Laplaciano 4-vizinhos (como cv2.Laplacian com ksize=1 e borda refletida) de cada imagem."""
+    pilha = _para_float(_como_pilha(pilha))
+    p = np.pad(pilha, ((0, 0), (1, 1), (1, 1)), mode='reflect')
+    laplaciano = p[:, :-2, 1:-1] + p[:, 2:, 1:-1] + p[:, 1:-1, :-2] + p[:, 1:-1, 2:] - 4 * pilha
+    return laplaciano.var(axis=(1, 2), dtype=np.float64)
+
+
+def calcular_metricas_lote(referencia, pilha, data_range=1.0, ssim=True):
+    """MSE, PSNR e SSIM de uma pilha de imagens contra uma referência, em uma única passada por métrica.
+
+    Retorna um dict de arrays numéricos (um valor por imagem), prontos para virar colunas.
+    """
+    mse = mse_lote(referencia, pilha)
+    metricas = {"MSE": mse, "PSNR (dB)": psnr_de_mse(mse, data_range)}
+    if ssim:
+        metricas["SSIM"] = ssim_lote(referencia, pilha, data_range)
+    return metricas
+
+
+def calcular_nitidez_contraste_lote(pilha):
+    """Desvio-padrão global, contraste local e variância do Laplaciano de cada imagem da pilha (métricas do F.py)."""
+    pilha = _como_pilha(pilha)
+    return {"Contraste (Desv. Padrão)": desvio_padrao_lote(pilha),
+            f"Contraste Local (Desv. {JANELA_CONTRASTE_LOCAL}x{JANELA_CONTRASTE_LOCAL})": contraste_local_lote(pilha),
+            "Nitidez (Var. Laplaciano)": variancia_laplaciano_lote(pilha)}
@@ -0,0 +1,224 @@
+import argparse
+import csv
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from processamento_lote import listar_imagens, numero_workers
+
+INTERVALO_VARREDURA = 2.0
+# Máximo de arquivos aguardando processamento; acima disso a varredura espera (backpressure)
+TAMANHO_FILA = 8
+ARQUIVO_ESTADO = ".monitoramento_estado.json"
+# Tentativas de um arquivo que falha sem mudar; depois disso ele só volta se for alterado (ou com --repetir-falhas)
+TENTATIVAS_MAX = 3
+
+
+def _assinatura(caminho):
+    info = os.stat(caminho)
+    return [info.st_mtime_ns, info.st_size]
+
+
+class AnexadorCSV:
+    """Anexa linhas de métricas a um CSV, escrevendo o cabeçalho só quando o arquivo é novo."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._trava = threading.Lock()
+
+    def anexar(self, linhas):
+        if not linhas:
+            return
+        with self._trava:
+            novo = not os.path.exists(self.caminho) or os.path.getsize(self.caminho) == 0
+            with open(self.caminho, "a", newline="", encoding="utf-8") as f:
+                escritor = csv.DictWriter(f, fieldnames=list(linhas[0]))
+                if novo:
+                    escritor.writeheader()
+                escritor.writerows(linhas)
+
+
+class Monitor:
+    """Observa um diretório por varredura periódica e processa apenas arquivos novos ou alterados.
+
+    `processar(caminho, nome)` roda em um pool de processos; `ao_concluir(caminho, nome, resultado)`
+    recebe o resultado na thread de consumo (ex.: anexar linhas ao CSV). O estado (mtime e
+    tamanho de cada arquivo já processado) é salvo em disco, então reiniciar o monitor não
+    reprocessa o conjunto inteiro.
+
+    Só entra no estado o arquivo processado com sucesso: sem exceção e com `sucesso(resultado)`
+    verdadeiro. As falhas ficam registradas à parte, com o erro, e o arquivo é tentado de novo
+    até TENTATIVAS_MAX vezes, ou sempre que mudar.
+    """
+
+    def __init__(self, diretorio, processar, ao_concluir=None, arquivo_estado=None,
+                 intervalo=INTERVALO_VARREDURA, tamanho_fila=TAMANHO_FILA, num_workers=None,
+                 sucesso=None, tentativas_max=TENTATIVAS_MAX):
+        self.diretorio = diretorio
+        self.processar = processar
+        self.ao_concluir = ao_concluir
+        self.sucesso = sucesso
+        self.tentativas_max = tentativas_max
+        self.arquivo_estado = arquivo_estado or os.path.join(diretorio, ARQUIVO_ESTADO)
+        self.intervalo = intervalo
+        self.num_workers = numero_workers(num_workers)
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self._trava = threading.Lock()
+        self._estado, self.falhas = self._carregar_estado()
+        self._pendentes = {}
+        self._em_andamento = set()
+
+    def _carregar_estado(self):
+        """(processados, falhas): {caminho: assinatura} e {caminho: {assinatura, erro, tentativas}}."""
+        if not os.path.exists(self.arquivo_estado):
+            return {}, {}
+        with open(self.arquivo_estado, encoding="utf-8") as f:
+            estado = json.load(f)
+        return estado["processados"], estado.get("falhas", {})
+
+    def _salvar_estado(self):
+        temporario = f"{self.arquivo_estado}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"processados": self._estado, "falhas": self.falhas}, f, indent=1)
+        os.replace(temporario, self.arquivo_estado)
+
+    def repetir_falhas(self):
+        """Esquece as falhas registradas: os arquivos voltam a ser tentados na próxima varredura."""
+        with self._trava:
+            self.falhas.clear()
+            self._salvar_estado()
+
+    def _esgotado(self, caminho, assinatura):
+        falha = self.falhas.get(caminho)
+        return falha is not None and falha["assinatura"] == assinatura and falha["tentativas"] >= self.tentativas_max
+
+    def _registrar(self, caminho, assinatura, erro=None):
+        with self._trava:
+            if erro is None:
+                self._estado[caminho] = assinatura
+                self.falhas.pop(caminho, None)
+            else:
+                anterior = self.falhas.get(caminho)
+                tentativas = anterior["tentativas"] + 1 if anterior and anterior["assinatura"] == assinatura else 1
+                self.falhas[caminho] = {"assinatura": assinatura, "erro": erro, "tentativas": tentativas}
+            self._salvar_estado()
+
+    def novos_arquivos(self, exigir_estavel=True):
+        """Arquivos novos ou alterados desde o último processamento.
+
+        Com exigir_estavel, um arquivo só é liberado quando mtime e tamanho se
+        repetem em duas varreduras seguidas (evita ler arquivos ainda em cópia).
+        """
+        prontos = []
+        for caminho, nome in listar_imagens(self.diretorio):
+            try:
+                assinatura = _assinatura(caminho)
+            except FileNotFoundError:
+                continue
+            with self._trava:
+                if (self._estado.get(caminho) == assinatura or caminho in self._em_andamento
+                        or self._esgotado(caminho, assinatura)):
+                    continue
+                if exigir_estavel and self._pendentes.get(caminho) != assinatura:
+                    self._pendentes[caminho] = assinatura
+                    continue
+                self._pendentes.pop(caminho, None)
+                self._em_andamento.add(caminho)
+            prontos.append((caminho, nome, assinatura))
+        return prontos
+
+    def _consumir(self, executor):
+        while True:
+            item = self.fila.get()
+            if item is None:
+                self.fila.task_done()
+                return
+            caminho, nome, assinatura = item
+            try:
+                resultado = executor.submit(self.processar, caminho, nome).result()
+                if self.sucesso is not None and not self.sucesso(resultado):
+                    raise RuntimeError("o processamento não produziu resultado")
+                if self.ao_concluir is not None:
+                    self.ao_concluir(caminho, nome, resultado)
+                self._registrar(caminho, assinatura)
+            except Exception as e:
+                # O arquivo fica fora do estado: a falha é registrada e ele será tentado de novo
+                erro = f"{type(e).__name__}: {e}"
+                print(f"  [ERRO] Falha ao processar '{nome}': {erro}")
+                self._registrar(caminho, assinatura, erro)
+            finally:
+                with self._trava:
+                    self._em_andamento.discard(caminho)
+                self.fila.task_done()
+
+    def executar(self, uma_vez=False):
+        """Roda até Ctrl+C (ou uma única varredura, com uma_vez=True)."""
+        with ProcessPoolExecutor(max_workers=self.num_workers) as executor:
+            consumidores = [threading.Thread(target=self._consumir, args=(executor,), daemon=True)
+                            for _ in range(self.num_workers)]
+            for consumidor in consumidores:
+                consumidor.start()
+            try:
+                while True:
+                    for item in self.novos_arquivos(exigir_estavel=not uma_vez):
+                        print(f"  -> Na fila: {item[1]}")
+                        # Bloqueia enquanto a fila estiver cheia
+                        self.fila.put(item)
+                    if uma_vez:
+                        break
+                    time.sleep(self.intervalo)
+            except KeyboardInterrupt:
+                print("\nEncerrando: aguardando os arquivos em processamento...")
+            finally:
+                for _ in consumidores:
+                    self.fila.put(None)
+                for consumidor in consumidores:
+                    consumidor.join()
+
+
+def monitor_ruidos(diretorio, **opcoes):
+    """Monitor com a análise de ruído do Ruidos.py, anexando as métricas ao CSV a cada imagem."""
+    import Ruidos
+
+    os.makedirs(Ruidos.DIR_RESULTADOS, exist_ok=True)
+    anexador = AnexadorCSV(os.path.join(Ruidos.DIR_RESULTADOS, "tabela_metricas_monitoramento.csv"))
+    # realizar_analise_imagem devolve [] quando a imagem não pôde ser lida
+    return Monitor(diretorio, Ruidos.realizar_analise_imagem,
+                   ao_concluir=lambda caminho, nome, linhas: anexador.anexar(linhas), sucesso=bool,
+                   arquivo_estado=os.path.join(Ruidos.DIR_RESULTADOS, ARQUIVO_ESTADO), **opcoes)
+
+
+def monitor_suavizacao(diretorio, **opcoes):
+    """Monitor com os filtros de suavização do B.py."""
+    import B
+
+    os.makedirs(B.diretorio_imgs, exist_ok=True)
+    return Monitor(diretorio, B.processar_imagem,
+                   ao_concluir=lambda caminho, nome, arquivos: print(f"  -> {nome}: {len(arquivos)} grupo(s) salvo(s)"),
+                   arquivo_estado=os.path.join(B.diretorio_imgs, ARQUIVO_ESTADO), **opcoes)
+
+
+MODOS = {"ruidos": monitor_ruidos, "suavizacao": monitor_suavizacao}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Processamento contínuo de imagens que chegam em um diretório.")
+    parser.add_argument("--entrada", default="imgs")
+    parser.add_argument("--modo", choices=list(MODOS), default="ruidos")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_VARREDURA, help="Segundos entre varreduras")
+    parser.add_argument("--fila", type=int, default=TAMANHO_FILA, help="Tamanho máximo da fila de trabalho")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--uma-vez", action="store_true", help="Processa o que houver de novo e termina")
+    parser.add_argument("--repetir-falhas", action="store_true", help="Tenta de novo os arquivos que falharam")
+    args = parser.parse_args()
+
+    monitor = MODOS[args.modo](args.entrada, intervalo=args.intervalo, tamanho_fila=args.fila, num_workers=args.workers)
+    if args.repetir_falhas:
+        monitor.repetir_falhas()
+    print(f"Monitorando '{args.entrada}' (modo {args.modo}). Ctrl+C para encerrar.")
+    monitor.executar(uma_vez=args.uma_vez)
+    for caminho, falha in monitor.falhas.items():
+        print(f"  [FALHA] {caminho} ({falha['tentativas']} tentativa(s)): {falha['erro']}")
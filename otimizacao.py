@@ -0,0 +1,170 @@
+import argparse
+import itertools
+import json
+import math
+import os
+import time
+
+import cv2
+import numpy as np
+
+from B import mediana_adaptativa
+from carregamento import carregar_cinza
+from metricas import mse_lote, psnr_de_mse
+from perfil import etapa
+from pilhas import gaussiano_pilha, media_pilha, mediana_pilha
+from precisao import para_float, para_uint8
+from Ruidos import DIR_IMGS, RUIDOS
+from tabela_metricas import TabelaMetricas
+
+DIR_RESULTADOS = "Resultados/otimizacao"
+
+# Espaço de busca: cada combinação de parâmetros de um filtro é um candidato
+ESPACO_BUSCA = {
+    "Media": {"k": [3, 5, 7, 9]},
+    "Mediana": {"k": [3, 5, 7, 9]},
+    "Gaussiano": {"sigma": [0.6, 0.8, 1.0, 1.3, 1.6, 2.0, 2.5]},
+    "Mediana Adaptativa": {"max_ksize": [5, 7, 9, 11]},
+}
+# Filtros que recebem a imagem ruidosa em uint8, como no Ruidos.py
+FILTROS_BUSCA = {
+    "Media": (lambda img, k: media_pilha(img, k, borda="ignorar"), True),
+    "Mediana": (lambda img, k: mediana_pilha(img, k), True),
+    "Gaussiano": (lambda img, sigma: np.clip(gaussiano_pilha(img, sigma), 0, 1.0), False),
+    "Mediana Adaptativa": (lambda img, max_ksize: mediana_adaptativa(img, max_ksize=max_ksize), True),
+}
+
+# Successive halving: todos os candidatos na menor escala; a cada degrau só o
+# melhor 1/ETA segue para a escala seguinte, e a última escala é a resolução cheia
+ESCALAS = (0.25, 0.5, 1.0)
+ETA = 3
+
+# Classes de imagem (nomes dos arquivos em DIR_IMGS); a busca é feita por classe e por ruído
+CLASSES_PADRAO = {
+    "documento": ["documento.jpg"],
+    "foto": ["pessoa.jpg", "natureza.jpg", "urbana.jpg"],
+}
+
+ESQUEMA_TABELA = [("Execução", "i8"), ("Classe", "categoria"), ("Ruído", "categoria"), ("Filtro", "categoria"),
+                  ("Parâmetros", "categoria"), ("Escala", "f8"), ("PSNR (dB)", "f8"), ("Tempo (s)", "f8")]
+
+
+def candidatos(espaco=ESPACO_BUSCA):
+    """Lista de (filtro, parâmetros) com todas as combinações do espaço de busca."""
+    lista = []
+    for filtro, grade in espaco.items():
+        nomes = list(grade)
+        for valores in itertools.product(*grade.values()):
+            lista.append((filtro, dict(zip(nomes, valores))))
+    return lista
+
+
+def reduzir(img, escala):
+    """Proxy da imagem limpa na escala pedida (INTER_AREA: média da área, sem aliasing)."""
+    if escala == 1.0:
+        return img
+    return cv2.resize(img, None, fx=escala, fy=escala, interpolation=cv2.INTER_AREA)
+
+
+class Avaliador:
+    """PSNR médio de um candidato sobre as imagens de uma classe, em uma escala.
+
+    O ruído é somado depois da redução: o proxy tem a mesma estatística de ruído
+    por pixel que a imagem cheia. Proxies, imagens ruidosas e suas versões uint8
+    ficam em cache por (imagem, escala).
+    """
+
+    def __init__(self, imagens, nome_ruido):
+        self.imagens = imagens
+        self.nome_ruido = nome_ruido
+        self._entradas = {}
+
+    def _entrada(self, nome, escala):
+        chave = (nome, escala)
+        if chave not in self._entradas:
+            limpa = reduzir(self.imagens[nome], escala)
+            ruidosa = RUIDOS[self.nome_ruido](limpa, 0)
+            self._entradas[chave] = (limpa, ruidosa, para_uint8(ruidosa))
+        return self._entradas[chave]
+
+    def avaliar(self, filtro, params, escala):
+        funcao, usa_uint8 = FILTROS_BUSCA[filtro]
+        psnrs = []
+        for nome in self.imagens:
+            limpa, ruidosa, ruidosa_uint8 = self._entrada(nome, escala)
+            filtrada = funcao(ruidosa_uint8 if usa_uint8 else ruidosa, **params)
+            psnrs.append(psnr_de_mse(mse_lote(limpa, para_float(filtrada)))[0])
+        return float(np.mean(psnrs))
+
+
+def successive_halving(lista, avaliar, escalas=ESCALAS, eta=ETA):
+    """Avalia os candidatos escala a escala, mantendo o melhor 1/eta em cada degrau.
+
+    Retorna (ranking final na maior escala, histórico de (escala, candidato, psnr, tempo)).
+    """
+    historico = []
+    sobreviventes = list(lista)
+    for degrau, escala in enumerate(escalas):
+        notas = []
+        for filtro, params in sobreviventes:
+            inicio = time.perf_counter()
+            psnr = avaliar(filtro, params, escala)
+            tempo = time.perf_counter() - inicio
+            notas.append((psnr, filtro, params))
+            historico.append((escala, filtro, params, psnr, tempo))
+        notas.sort(key=lambda nota: nota[0], reverse=True)
+        if degrau == len(escalas) - 1:
+            return notas, historico
+        manter = max(1, math.ceil(len(notas) / eta))
+        sobreviventes = [(filtro, params) for _, filtro, params in notas[:manter]]
+
+
+def otimizar(classes, dir_imgs=DIR_IMGS, escalas=ESCALAS, eta=ETA):
+    """Busca o melhor filtro e parâmetros por classe de imagem e por ruído; retorna {classe: {ruído: ranking}}."""
+    lista = candidatos()
+    tabela = TabelaMetricas(os.path.join(DIR_RESULTADOS, "avaliacoes"), ESQUEMA_TABELA)
+    execucao = time.time_ns() // 1_000_000
+    melhores = {}
+    for classe, arquivos in classes.items():
+        caminhos = [(nome, os.path.join(dir_imgs, nome)) for nome in arquivos]
+        imagens = {nome: carregar_cinza(caminho) for nome, caminho in caminhos if os.path.isfile(caminho)}
+        if not imagens:
+            print(f"Classe '{classe}': nenhuma imagem encontrada. Pulando.")
+            continue
+
+        for nome_ruido in RUIDOS:
+            avaliador = Avaliador(imagens, nome_ruido)
+            with etapa(f"otimizar:{nome_ruido}", imagem=classe):
+                ranking, historico = successive_halving(lista, avaliador.avaliar, escalas, eta)
+            melhores.setdefault(classe, {})[nome_ruido] = [
+                {"filtro": filtro, "parametros": params, "psnr": psnr} for psnr, filtro, params in ranking]
+            tabela.anexar([{"Execução": execucao, "Classe": classe, "Ruído": nome_ruido, "Filtro": filtro,
+                            "Parâmetros": json.dumps(params, sort_keys=True), "Escala": escala,
+                            "PSNR (dB)": psnr, "Tempo (s)": tempo}
+                           for escala, filtro, params, psnr, tempo in historico])
+
+            psnr, filtro, params = ranking[0]
+            avaliacoes = len(historico)
+            print(f"{classe} / {nome_ruido}: {filtro} {params} -> {psnr:.2f} dB "
+                  f"({avaliacoes} avaliações, {len(ranking)} na resolução cheia de {len(lista)} candidatos)")
+    return melhores
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Busca filtro e parâmetros por classe de imagem (successive halving em PSNR).")
+    parser.add_argument("--classes", help="JSON {classe: [arquivos]} (padrão: CLASSES_PADRAO)")
+    parser.add_argument("--escalas", type=float, nargs="+", default=list(ESCALAS))
+    parser.add_argument("--eta", type=int, default=ETA)
+    args = parser.parse_args()
+
+    classes = CLASSES_PADRAO
+    if args.classes:
+        with open(args.classes, encoding="utf-8") as f:
+            classes = json.load(f)
+
+    os.makedirs(DIR_RESULTADOS, exist_ok=True)
+    melhores = otimizar(classes, escalas=tuple(args.escalas), eta=args.eta)
+    caminho = os.path.join(DIR_RESULTADOS, "melhores.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(melhores, f, ensure_ascii=False, indent=2)
+    print(f"Rankings salvos em: {caminho}")
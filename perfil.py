@@ -0,0 +1,219 @@
+import atexit
+import contextlib
+import functools
+import glob
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+
+# FILTRAGEM_PERFIL=1 liga a medição; desligada, `etapa` devolve um contexto vazio
+PERFIL_ATIVO = os.environ.get("FILTRAGEM_PERFIL", "0") == "1"
+DIR_PERFIL = os.environ.get("FILTRAGEM_PERFIL_DIR", "Resultados/perfil")
+# Identifica a execução; os processos do lote herdam a variável e gravam na mesma pasta
+VARIAVEL_EXECUCAO = "FILTRAGEM_PERFIL_EXECUCAO"
+
+_NULO = contextlib.nullcontext()
+_local = threading.local()
+_trava = threading.Lock()
+_eventos = []
+_pid_dono = None
+
+
+def _diretorio_execucao():
+    return os.path.join(DIR_PERFIL, os.environ[VARIAVEL_EXECUCAO])
+
+
+def _pilha():
+    pilha = getattr(_local, "pilha", None)
+    if pilha is None:
+        pilha = _local.pilha = []
+    return pilha
+
+
+def _descarregar():
+    """Anexa os eventos deste processo ao seu arquivo .jsonl (chamado ao fim de cada etapa de nível mais alto).
+
+    Os processos do lote terminam sem rodar o atexit, então os eventos não podem esperar o fim.
+    """
+    with _trava:
+        if not _eventos:
+            return
+        pendentes = _eventos[:]
+        _eventos.clear()
+        os.makedirs(_diretorio_execucao(), exist_ok=True)
+        with open(os.path.join(_diretorio_execucao(), f"eventos_{os.getpid()}.jsonl"), "a", encoding="utf-8") as f:
+            for evento in pendentes:
+                f.write(json.dumps(evento, ensure_ascii=False) + "\n")
+
+
+class _Etapa:
+    """Mede tempo de parede, tempo de CPU da thread e pico de memória (tracemalloc) de um trecho."""
+
+    def __init__(self, nome, imagem):
+        self.nome = nome
+        self.imagem = imagem
+
+    def __enter__(self):
+        pilha = _pilha()
+        if self.imagem is None and pilha:
+            self.imagem = pilha[-1].imagem
+        self.pico = 0
+        self.memoria_inicial = tracemalloc.get_traced_memory()[0]
+        if pilha:
+            # reset_peak apaga o pico da etapa de fora: ele é guardado antes
+            pilha[-1].pico = max(pilha[-1].pico, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        pilha.append(self)
+        self.inicio = time.time()
+        self.inicio_parede = time.perf_counter()
+        self.inicio_cpu = time.thread_time()
+        return self
+
+    def __exit__(self, *excecao):
+        parede = time.perf_counter() - self.inicio_parede
+        cpu = time.thread_time() - self.inicio_cpu
+        pilha = _pilha()
+        pilha.pop()
+        self.pico = max(self.pico, tracemalloc.get_traced_memory()[1])
+        if pilha:
+            pilha[-1].pico = max(pilha[-1].pico, self.pico)
+
+        with _trava:
+            _eventos.append({
+                "etapa": self.nome,
+                "imagem": self.imagem,
+                "inicio": self.inicio,
+                "parede": parede,
+                "cpu": cpu,
+                "pico_mb": max(0, self.pico - self.memoria_inicial) / (1024 * 1024),
+                "pid": os.getpid(),
+                "tid": threading.get_native_id(),
+            })
+        if not pilha:
+            _descarregar()
+        return False
+
+
+def etapa(nome, imagem=None):
+    """Contexto que mede uma etapa do pipeline; etapas internas herdam a imagem da etapa de fora.
+
+        with etapa("filtro:Media", imagem=nome_arquivo):
+            ...
+    """
+    if not PERFIL_ATIVO:
+        return _NULO
+    return _Etapa(nome, imagem)
+
+
+def medido(nome=None):
+    """Decorador equivalente a envolver a função inteira em `etapa`."""
+    def decorar(funcao):
+        if not PERFIL_ATIVO:
+            return funcao
+        nome_etapa = nome or funcao.__name__
+
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with _Etapa(nome_etapa, None):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorar
+
+
+def carregar_eventos(diretorio):
+    eventos = []
+    for arquivo in sorted(glob.glob(os.path.join(diretorio, "eventos_*.jsonl"))):
+        with open(arquivo, encoding="utf-8") as f:
+            eventos.extend(json.loads(linha) for linha in f if linha.strip())
+    return eventos
+
+
+def resumir(eventos):
+    """Linhas por etapa: chamadas, parede total/média, CPU total e maior pico de memória."""
+    grupos = defaultdict(list)
+    for evento in eventos:
+        grupos[evento["etapa"]].append(evento)
+    linhas = []
+    for nome, itens in grupos.items():
+        parede = sum(e["parede"] for e in itens)
+        linhas.append({
+            "etapa": nome,
+            "chamadas": len(itens),
+            "parede_s": parede,
+            "media_ms": parede / len(itens) * 1000,
+            "cpu_s": sum(e["cpu"] for e in itens),
+            "pico_mb": max(e["pico_mb"] for e in itens),
+        })
+    return sorted(linhas, key=lambda linha: linha["parede_s"], reverse=True)
+
+
+def formatar_resumo(linhas):
+    cabecalho = f"{'Etapa':<32} {'Chamadas':>8} {'Parede (s)':>11} {'Média (ms)':>11} {'CPU (s)':>9} {'Pico (MB)':>10}"
+    saida = [cabecalho, "-" * len(cabecalho)]
+    for linha in linhas:
+        saida.append(f"{linha['etapa']:<32} {linha['chamadas']:>8} {linha['parede_s']:>11.3f} "
+                     f"{linha['media_ms']:>11.2f} {linha['cpu_s']:>9.3f} {linha['pico_mb']:>10.1f}")
+    return "\n".join(saida)
+
+
+def trace_chrome(eventos):
+    """Eventos no formato Chrome trace (chrome://tracing, Perfetto)."""
+    origem = min((e["inicio"] for e in eventos), default=0)
+    return {"traceEvents": [{
+        "name": e["etapa"],
+        "cat": "filtragem",
+        "ph": "X",
+        "ts": (e["inicio"] - origem) * 1e6,
+        "dur": e["parede"] * 1e6,
+        "pid": e["pid"],
+        "tid": e["tid"],
+        "args": {"imagem": e["imagem"], "cpu_ms": e["cpu"] * 1000, "pico_mb": e["pico_mb"]},
+    } for e in eventos], "displayTimeUnit": "ms"}
+
+
+def relatorio():
+    """Junta os eventos de todos os processos da execução, imprime o resumo e grava resumo.csv e trace.json."""
+    _descarregar()
+    diretorio = _diretorio_execucao()
+    eventos = carregar_eventos(diretorio)
+    if not eventos:
+        return None
+    linhas = resumir(eventos)
+    print("\nPerfil por etapa (FILTRAGEM_PERFIL=1):")
+    print(formatar_resumo(linhas))
+
+    # Uma linha por etapa e imagem
+    por_imagem = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+    for e in eventos:
+        acumulado = por_imagem[(e["etapa"], e["imagem"] or "")]
+        acumulado[0] += 1
+        acumulado[1] += e["parede"]
+        acumulado[2] += e["cpu"]
+        acumulado[3] = max(acumulado[3], e["pico_mb"])
+    with open(os.path.join(diretorio, "resumo.csv"), "w", encoding="utf-8") as f:
+        f.write("etapa,imagem,chamadas,parede_s,cpu_s,pico_mb\n")
+        for (nome, imagem), (chamadas, parede, cpu, pico) in sorted(por_imagem.items()):
+            f.write(f"\"{nome}\",\"{imagem}\",{chamadas},{parede:.6f},{cpu:.6f},{pico:.3f}\n")
+
+    with open(os.path.join(diretorio, "trace.json"), "w", encoding="utf-8") as f:
+        json.dump(trace_chrome(eventos), f)
+    print(f"Resumo e trace (chrome://tracing) salvos em '{diretorio}'.")
+    return linhas
+
+
+def _ao_sair():
+    if os.getpid() == _pid_dono:
+        relatorio()
+
+
+if PERFIL_ATIVO:
+    tracemalloc.start()
+    if VARIAVEL_EXECUCAO not in os.environ:
+        # Só o processo que abre a execução imprime o relatório no fim
+        os.environ[VARIAVEL_EXECUCAO] = f"{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}"
+        _pid_dono = os.getpid()
+    atexit.register(_ao_sair)
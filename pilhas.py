@@ -0,0 +1,227 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+import skimage as ski
+from scipy import ndimage as ndi
+from skimage.color import rgb2gray
+
+from carregamento import carregar_cinza
+from estatisticas_locais import DTYPES_CV2_BLUR, media_local
+from precisao import dtype_float
+from processamento_lote import listar_imagens
+
+# Pilhas (N, H, W): quadros de vídeo, séries de imagens ou TIFFs de várias páginas.
+# Os filtros recebem uma imagem 2D ou uma pilha e processam a pilha inteira em uma chamada;
+# `temporal` (ímpar) é o tamanho da janela no eixo dos quadros (1 = só espacial).
+BORDAS_MEDIA = ("reflect101", "ignorar")
+
+
+def como_pilha(img):
+    """(pilha 3D, era_2d): uma imagem 2D vira uma pilha de um quadro (view, sem cópia)."""
+    img = np.asarray(img)
+    if img.ndim == 2:
+        return img[np.newaxis], True
+    if img.ndim != 3:
+        raise ValueError(f"Esperada imagem (H, W) ou pilha (N, H, W), recebido {img.shape}")
+    return img, False
+
+
+def _validar_janelas(k, temporal):
+    if k % 2 == 0 or temporal % 2 == 0:
+        raise ValueError(f"As janelas devem ser ímpares (k={k}, temporal={temporal})")
+
+
+def em_quadro_alto(funcao, pilha, raio, modo):
+    """Aplica um filtro 2D do cv2 à pilha inteira em uma chamada, empilhando os quadros na vertical.
+
+    Cada quadro ganha `raio` linhas de borda (np.pad com `modo`, ex.: "edge" para
+    BORDER_REPLICATE e "reflect" para BORDER_REFLECT_101) acima e abaixo, então a
+    janela de um pixel nunca alcança o quadro vizinho e o resultado é idêntico ao
+    do filtro aplicado quadro a quadro. Nas colunas a borda é a do próprio filtro.
+    """
+    n, altura, largura = pilha.shape
+    if raio == 0:
+        return funcao(pilha.reshape(n * altura, largura)).reshape(pilha.shape)
+    preenchida = np.pad(pilha, ((0, 0), (raio, raio), (0, 0)), mode=modo)
+    alto = funcao(preenchida.reshape(n * (altura + 2 * raio), largura))
+    return alto.reshape(n, altura + 2 * raio, largura)[:, raio:raio + altura]
+
+
+def _soma_caixa(pilha, tamanhos, modo):
+    """Soma em janelas (t, k, k) por somas acumuladas em cada eixo: exata para uint8 (int64) e float (float64)."""
+    acumulador = np.int64 if np.issubdtype(pilha.dtype, np.integer) else np.float64
+    raios = [tamanho // 2 for tamanho in tamanhos]
+    if modo == "ignorar":
+        soma = np.pad(pilha.astype(acumulador), [(r, r) for r in raios], mode="constant")
+    else:
+        soma = np.pad(pilha, [(r, r) for r in raios], mode="reflect").astype(acumulador)
+    for eixo, tamanho in enumerate(tamanhos):
+        if tamanho == 1:
+            continue
+        acumulada = np.cumsum(soma, axis=eixo)
+        zeros = np.zeros_like(np.take(acumulada, [0], axis=eixo))
+        acumulada = np.concatenate([zeros, acumulada], axis=eixo)
+        n = pilha.shape[eixo]
+        soma = np.take(acumulada, np.arange(tamanho, tamanho + n), axis=eixo) - np.take(acumulada, np.arange(n), axis=eixo)
+    return soma
+
+
+def _contagem_ignorar(forma, tamanhos):
+    # Pixels de cada janela dentro da pilha: produto das contagens de cada eixo
+    contagem = np.ones((1,) * len(forma), dtype=np.int64)
+    for eixo, (n, tamanho) in enumerate(zip(forma, tamanhos)):
+        posicoes = np.arange(n)
+        por_eixo = np.minimum(posicoes + tamanho // 2, n - 1) - np.maximum(posicoes - tamanho // 2, 0) + 1
+        contagem = contagem * por_eixo.reshape([-1 if i == eixo else 1 for i in range(len(forma))])
+    return contagem
+
+
+def media_pilha(img, k, temporal=1, borda="reflect101"):
+    """Média em janelas (temporal, k, k), no dtype da entrada.
+
+    borda="reflect101" com temporal=1 é idêntica ao cv2.blur quadro a quadro
+    (uint8, float32 e float64);
+    borda="ignorar" é idêntica ao ski.filters.rank.mean (média só dos pixels
+    dentro da pilha, truncada em uint8). Com temporal > 1 a janela também cobre
+    os quadros vizinhos, com a mesma regra de borda no eixo do tempo.
+    """
+    if borda not in BORDAS_MEDIA:
+        raise ValueError(f"Borda desconhecida: {borda}")
+    _validar_janelas(k, temporal)
+    pilha, era_2d = como_pilha(img)
+    if era_2d:
+        return media_local(pilha[0], k, borda)
+
+    tamanhos = (temporal, k, k)
+    if temporal == 1 and borda == "reflect101" and pilha.dtype in DTYPES_CV2_BLUR:
+        # Só espacial: o cv2 filtra a pilha inteira em um quadro alto. Em float64 a soma
+        # deslizante do cv2 atravessaria os quadros e mudaria o arredondamento: quadro a quadro
+        if pilha.dtype == np.float64:
+            resultado = np.empty_like(pilha)
+            for quadro, saida in zip(pilha, resultado):
+                saida[...] = cv2.blur(quadro, (k, k))
+            return resultado
+        return em_quadro_alto(lambda alto: cv2.blur(alto, (k, k)), pilha, k // 2, "reflect")
+    if temporal == 1 and pilha.dtype == np.uint8:
+        soma = em_quadro_alto(lambda alto: cv2.boxFilter(alto, cv2.CV_32S, (k, k), normalize=False,
+                                                         borderType=cv2.BORDER_CONSTANT), pilha, k // 2, "constant")
+        return np.floor_divide(soma, _contagem_ignorar(pilha.shape, tamanhos)).astype(np.uint8)
+
+    soma = _soma_caixa(pilha, tamanhos, borda)
+    if borda == "ignorar":
+        contagem = _contagem_ignorar(pilha.shape, tamanhos)
+        if pilha.dtype == np.uint8:
+            return np.floor_divide(soma, contagem).astype(np.uint8)
+        return (soma / contagem).astype(pilha.dtype)
+    if pilha.dtype == np.uint8:
+        # Escala e arredonda como o cv2.blur
+        return cv2.convertScaleAbs(soma.astype(np.float64).reshape(-1, pilha.shape[2]),
+                                   alpha=1.0 / (temporal * k * k)).reshape(pilha.shape)
+    return (soma / (temporal * k * k)).astype(pilha.dtype)
+
+
+def mediana_pilha(img, k, temporal=1):
+    """Mediana em janelas (temporal, k, k) com borda replicada (como ski.filters.median).
+
+    Só espacial em uint8: a pilha inteira passa de uma vez pelo cv2.medianBlur
+    (idêntico para qualquer k ímpar) em um quadro alto. Com temporal > 1, ou em
+    float, usa ndimage.median_filter sobre a pilha 3D.
+    """
+    _validar_janelas(k, temporal)
+    pilha, era_2d = como_pilha(img)
+    if era_2d and temporal == 1 and pilha.dtype == np.uint8:
+        return cv2.medianBlur(pilha[0], k)
+    if temporal == 1 and pilha.dtype == np.uint8:
+        resultado = em_quadro_alto(lambda alto: cv2.medianBlur(alto, k), pilha, k // 2, "edge")
+    else:
+        resultado = ndi.median_filter(pilha, size=(temporal, k, k), mode="nearest")
+    return resultado[0] if era_2d else resultado
+
+
+def gaussiano_pilha(img, sigma, sigma_temporal=0.0):
+    """Gaussiano do scipy (borda refletida) com `sigma` nos eixos espaciais e `sigma_temporal` entre quadros.
+
+    sigma_temporal=0 não suaviza no tempo: o resultado é o mesmo de gaussian_filter em cada quadro.
+    """
+    pilha, era_2d = como_pilha(img)
+    resultado = ndi.gaussian_filter(pilha, sigma=(sigma_temporal, sigma, sigma), mode="reflect")
+    return resultado[0] if era_2d else resultado
+
+
+FILTROS = {
+    "media": lambda pilha, args: media_pilha(pilha, args.k, args.temporal, args.borda),
+    "mediana": lambda pilha, args: mediana_pilha(pilha, args.k, args.temporal),
+    "gaussiano": lambda pilha, args: gaussiano_pilha(pilha, args.sigma, args.sigma_temporal),
+}
+
+
+# --- Entrada e saída ---
+
+def _tiff_para_cinza(dados, eixos, dtype):
+    if "S" in eixos:
+        # Amostras (canais) no último eixo: RGB(A) -> cinza como o carregar_cinza
+        dados = rgb2gray(np.moveaxis(dados, eixos.index("S"), -1)[..., :3])
+        cinza = (dados * 255).astype(np.uint8) if dtype == "uint8" else dados
+    elif dtype == "uint8":
+        cinza = dados if dados.dtype == np.uint8 else ski.util.img_as_ubyte(dados)
+    else:
+        cinza = dados / 255.0 if dados.dtype == np.uint8 else ski.util.img_as_float(dados)
+    return cinza.reshape((-1,) + cinza.shape[-2:])
+
+
+def carregar_pilha(caminho, dtype=None):
+    """Pilha (N, H, W) em escala de cinza de um TIFF de várias páginas ou de uma pasta de imagens do mesmo tamanho.
+
+    dtype=None usa o ponto flutuante da política (precisao.DTYPE_FLOAT), como carregar_cinza.
+    """
+    dtype = dtype or dtype_float().name
+    if os.path.isdir(caminho):
+        return np.stack([carregar_cinza(arquivo, dtype=dtype) for arquivo, _ in listar_imagens(caminho)])
+
+    import tifffile
+    with tifffile.TiffFile(caminho) as tif:
+        serie = tif.series[0]
+        dados = serie.asarray()
+        eixos = serie.axes
+    return np.asarray(_tiff_para_cinza(dados, eixos, dtype), dtype=dtype)
+
+
+def salvar_pilha(caminho, pilha):
+    import tifffile
+    tifffile.imwrite(caminho, np.asarray(pilha))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Filtra uma pilha (TIFF de várias páginas ou pasta) e compara com o laço por quadro.")
+    parser.add_argument("entrada")
+    parser.add_argument("--filtro", default="mediana", choices=FILTROS)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--temporal", type=int, default=1)
+    parser.add_argument("--borda", default="reflect101", choices=BORDAS_MEDIA)
+    parser.add_argument("--sigma", type=float, default=1.0)
+    parser.add_argument("--sigma-temporal", type=float, default=0.0)
+    parser.add_argument("--dtype", default="uint8", choices=("float32", "float64", "uint8"))
+    parser.add_argument("--saida", help="Grava a pilha filtrada neste TIFF")
+    args = parser.parse_args()
+
+    pilha = carregar_pilha(args.entrada, args.dtype)
+    print(f"Pilha {pilha.shape} {pilha.dtype}")
+
+    inicio = time.perf_counter()
+    resultado = FILTROS[args.filtro](pilha, args)
+    tempo_pilha = time.perf_counter() - inicio
+    print(f"Pilha inteira: {tempo_pilha * 1000:.1f} ms")
+
+    if args.temporal == 1 and args.sigma_temporal == 0:
+        inicio = time.perf_counter()
+        quadros = np.stack([FILTROS[args.filtro](quadro, args) for quadro in pilha])
+        tempo_quadros = time.perf_counter() - inicio
+        print(f"Quadro a quadro: {tempo_quadros * 1000:.1f} ms (speedup {tempo_quadros / tempo_pilha:.2f}x)")
+        print(f"Idêntico: {np.array_equal(resultado, quadros)}")
+
+    if args.saida:
+        salvar_pilha(args.saida, resultado)
+        print(f"Pilha salva em: {args.saida}")
@@ -0,0 +1,59 @@
+import os
+
+import cv2
+import numpy as np
+
+# Nível de prévia (FILTRAGEM_NIVEL_PREVIA): 0 = resolução cheia (saída final); n = 1/2**n em cada eixo.
+# B.py, D.py e Realce.py filtram no nível pedido e gravam as figuras com o sufixo _previa<n>.
+NIVEL_PREVIA = int(os.environ.get("FILTRAGEM_NIVEL_PREVIA", 0))
+# Nível em que o D.py calcula os limiares de Otsu e Canny no modo grosso-fino (0 = desligado)
+NIVEL_LIMIARES = int(os.environ.get("FILTRAGEM_NIVEL_LIMIARES", 0))
+
+
+def reduzir(img):
+    """Um nível acima na pirâmide Gaussiana: suaviza 5x5 e descarta linhas e colunas ímpares (cv2.pyrDown)."""
+    return cv2.pyrDown(img)
+
+
+def expandir(img, forma):
+    """Volta um nível (cv2.pyrUp) para a forma (H, W) do nível de baixo."""
+    return cv2.pyrUp(img, dstsize=(forma[1], forma[0]))
+
+
+def piramide_gaussiana(img, niveis):
+    """[nível 0 (a própria imagem), nível 1, ..., nível `niveis`]."""
+    piramide = [img]
+    for _ in range(niveis):
+        piramide.append(reduzir(piramide[-1]))
+    return piramide
+
+
+def piramide_laplaciana(img, niveis, dtype=np.float32):
+    """Detalhes de cada nível (G_i - expandir(G_i+1)) e, por último, o nível Gaussiano mais grosso, em float."""
+    gaussiana = [nivel.astype(dtype, copy=False) for nivel in piramide_gaussiana(img, niveis)]
+    detalhes = [fina - expandir(grossa, fina.shape) for fina, grossa in zip(gaussiana[:-1], gaussiana[1:])]
+    return detalhes + [gaussiana[-1]]
+
+
+def reconstruir(laplaciana):
+    """Inverso de `piramide_laplaciana` (exato a menos do arredondamento em ponto flutuante)."""
+    img = laplaciana[-1]
+    for detalhe in reversed(laplaciana[:-1]):
+        img = expandir(img, detalhe.shape) + detalhe
+    return img
+
+
+def forma_nivel(forma, nivel):
+    """Forma (H, W) de um nível, com o mesmo arredondamento do cv2.pyrDown."""
+    altura, largura = forma[:2]
+    for _ in range(nivel):
+        altura, largura = (altura + 1) // 2, (largura + 1) // 2
+    return altura, largura
+
+
+def caminho_previa(caminho, nivel=NIVEL_PREVIA):
+    """Caminho da figura de prévia: o mesmo nome com _previa<n>, para não sobrescrever a saída final."""
+    if nivel == 0:
+        return caminho
+    base, extensao = os.path.splitext(caminho)
+    return f"{base}_previa{nivel}{extensao}"
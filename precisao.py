@@ -0,0 +1,34 @@
+import os
+
+import numpy as np
+
+# Ponto flutuante usado por carregamento, ruído, filtros e métricas.
+# float32 reduz pela metade a memória e o tráfego; FILTRAGEM_DTYPE=float64 volta ao comportamento antigo.
+DTYPE_FLOAT = np.dtype(os.environ.get("FILTRAGEM_DTYPE", "float32"))
+if DTYPE_FLOAT not in (np.float32, np.float64):
+    raise ValueError(f"FILTRAGEM_DTYPE deve ser float32 ou float64 (recebido {DTYPE_FLOAT})")
+
+
+def dtype_float(dtype=None):
+    """O dtype pedido ou, se None, o da política do processo."""
+    return DTYPE_FLOAT if dtype is None else np.dtype(dtype)
+
+
+def para_float(img, dtype=None):
+    """Imagem em [0, 1] no dtype da política: uint8 é dividido por 255, float só é convertido se preciso."""
+    dtype = dtype_float(dtype)
+    img = np.asarray(img)
+    if img.dtype == np.uint8:
+        return img.astype(dtype) / dtype.type(255)
+    return img.astype(dtype, copy=False)
+
+
+def para_uint8(img):
+    """Imagem float em [0, 1] para uint8 por truncamento, como `(img * 255).astype(np.uint8)`; uint8 passa direto.
+
+    k/255 em float32 ou float64 volta exatamente para k, então a ida e volta não perde níveis.
+    """
+    img = np.asarray(img)
+    if img.dtype == np.uint8:
+        return img
+    return (img * img.dtype.type(255)).astype(np.uint8)
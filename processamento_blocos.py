@@ -0,0 +1,141 @@
+import argparse
+import os
+
+import cv2
+import numpy as np
+from scipy.ndimage import gaussian_filter
+
+from B import mediana_adaptativa
+from bordas import gradientes_sobel_prewitt, magnitude
+
+# Tamanho padrão dos blocos (linhas x colunas); o pico de memória é proporcional a ele, não à imagem
+ALTURA_BLOCO = 1024
+LARGURA_BLOCO = 1024
+
+
+# --- Filtros com o raio de vizinhança que cada um lê ---
+
+def raio_gaussiano_cv2(sigma, dtype):
+    # Mesmo tamanho automático de kernel do cv2.GaussianBlur com ksize=(0, 0)
+    ksize = int(round(sigma * (3 if dtype == np.uint8 else 4) * 2 + 1)) | 1
+    return ksize // 2
+
+
+def raio_gaussiano_scipy(sigma, truncate=4.0):
+    # Mesmo raio usado pelo scipy.ndimage.gaussian_filter
+    return int(truncate * float(sigma) + 0.5)
+
+
+FILTROS = ("media", "mediana", "gaussiano", "gaussiano_scipy", "mediana_adaptativa", "sobel", "prewitt")
+# Filtros do cv2 que, em float, acumulam somas cuja ordem depende de onde o bloco começa
+FILTROS_SOMA_CV2 = ("media", "gaussiano")
+
+
+def exato_em_blocos(nome, dtype):
+    """Se o filtro, aplicado por blocos ou bandas com halo, é idêntico à chamada sobre a imagem inteira.
+
+    A mediana, a mediana adaptativa, o scipy.ndimage e as diferenças do D.py calculam
+    cada pixel só da sua vizinhança, na mesma ordem. O cv2.blur e o cv2.GaussianBlur
+    são exatos em uint8 (aritmética inteira), mas em float o resultado muda com o
+    início do bloco (soma deslizante e vetorização por colunas).
+    """
+    return nome not in FILTROS_SOMA_CV2 or np.dtype(dtype) == np.uint8
+
+
+def filtro_em_blocos(nome, dtype=np.uint8, **params):
+    """Retorna (funcao, raio) para um dos filtros do projeto (ver FILTROS)."""
+    if nome == "media":
+        k = params["k"]
+        return (lambda bloco: cv2.blur(bloco, (k, k))), k // 2
+    if nome == "mediana":
+        k = params["k"]
+        return (lambda bloco: cv2.medianBlur(bloco, k)), k // 2
+    if nome == "gaussiano":
+        sigma = params["sigma"]
+        return (lambda bloco: cv2.GaussianBlur(bloco, (0, 0), sigma)), raio_gaussiano_cv2(sigma, dtype)
+    if nome == "gaussiano_scipy":
+        sigma = params["sigma"]
+        return (lambda bloco: gaussian_filter(bloco, sigma=sigma)), raio_gaussiano_scipy(sigma)
+    if nome == "mediana_adaptativa":
+        max_ksize = params.get("max_ksize", 9)
+        return (lambda bloco: mediana_adaptativa(bloco, max_ksize=max_ksize)), max_ksize // 2
+    if nome in ("sobel", "prewitt"):
+        # Magnitude do gradiente do D.py (entrada em [0, 1])
+        indice = 0 if nome == "sobel" else 1
+        return (lambda bloco: magnitude(*gradientes_sobel_prewitt(bloco)[indice])), 1
+    raise ValueError(f"Filtro desconhecido: {nome}")
+
+
+# --- Entrada e saída mapeadas em disco ---
+
+def abrir_entrada(caminho):
+    """Abre um .npy ou TIFF sem compressão como memmap somente leitura."""
+    if caminho.lower().endswith(('.tif', '.tiff')):
+        import tifffile
+        return tifffile.memmap(caminho, mode='r')
+    return np.load(caminho, mmap_mode='r')
+
+
+def criar_saida(caminho, forma, dtype):
+    """Cria um .npy mapeado em disco para receber o resultado."""
+    return np.lib.format.open_memmap(caminho, mode='w+', dtype=dtype, shape=tuple(forma))
+
+
+def iterar_blocos(forma, raio, altura_bloco=ALTURA_BLOCO, largura_bloco=LARGURA_BLOCO):
+    """Gera (bloco_com_halo, bloco_saida, recorte) como fatias: o halo tem `raio` pixels, limitado à borda da imagem."""
+    altura, largura = forma[:2]
+    for y0 in range(0, altura, altura_bloco):
+        y1 = min(y0 + altura_bloco, altura)
+        ys0, ys1 = max(0, y0 - raio), min(altura, y1 + raio)
+        for x0 in range(0, largura, largura_bloco):
+            x1 = min(x0 + largura_bloco, largura)
+            xs0, xs1 = max(0, x0 - raio), min(largura, x1 + raio)
+            yield ((slice(ys0, ys1), slice(xs0, xs1)),
+                   (slice(y0, y1), slice(x0, x1)),
+                   (slice(y0 - ys0, y1 - ys0), slice(x0 - xs0, x1 - xs0)))
+
+
+def filtrar_em_blocos(entrada, saida, funcao, raio, altura_bloco=ALTURA_BLOCO, largura_bloco=LARGURA_BLOCO):
+    """Aplica `funcao` bloco a bloco, com halo igual ao raio do kernel.
+
+    O halo contém toda a vizinhança lida pelo filtro e a borda de cada bloco só
+    coincide com a borda real da imagem; para os filtros em que cada pixel sai
+    só da vizinhança (ver exato_em_blocos) o resultado é idêntico ao da chamada
+    sobre a imagem inteira.
+    """
+    for fatia_halo, fatia_saida, recorte in iterar_blocos(entrada.shape, raio, altura_bloco, largura_bloco):
+        bloco = np.ascontiguousarray(entrada[fatia_halo])
+        saida[fatia_saida] = funcao(bloco)[recorte]
+    if isinstance(saida, np.memmap):
+        saida.flush()
+    return saida
+
+
+def filtrar_arquivo_em_blocos(caminho_entrada, caminho_saida, nome_filtro, altura_bloco=ALTURA_BLOCO, largura_bloco=LARGURA_BLOCO, **params):
+    """Lê um .npy/TIFF grande via memmap, filtra por blocos e grava o resultado em um .npy mapeado.
+
+    Só aceita as combinações de filtro e dtype exatas por blocos (ver exato_em_blocos).
+    """
+    entrada = abrir_entrada(caminho_entrada)
+    if not exato_em_blocos(nome_filtro, entrada.dtype):
+        raise ValueError(f"O filtro '{nome_filtro}' em {entrada.dtype} não é exato por blocos; "
+                         f"use uint8 ou o gaussiano_scipy")
+    funcao, raio = filtro_em_blocos(nome_filtro, dtype=entrada.dtype, **params)
+    saida = criar_saida(caminho_saida, entrada.shape, entrada.dtype)
+    return filtrar_em_blocos(entrada, saida, funcao, raio, altura_bloco, largura_bloco)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Filtragem por blocos de imagens maiores que a memória.")
+    parser.add_argument("entrada", help="Arquivo .npy ou TIFF sem compressão (escala de cinza)")
+    parser.add_argument("saida", help="Arquivo .npy de saída")
+    parser.add_argument("--filtro", default="mediana", choices=FILTROS)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--sigma", type=float, default=1.6)
+    parser.add_argument("--max-ksize", type=int, default=9)
+    parser.add_argument("--bloco", type=int, nargs=2, default=[ALTURA_BLOCO, LARGURA_BLOCO], metavar=("ALTURA", "LARGURA"))
+    args = parser.parse_args()
+
+    filtrar_arquivo_em_blocos(args.entrada, args.saida, args.filtro, args.bloco[0], args.bloco[1],
+                              k=args.k, sigma=args.sigma, max_ksize=args.max_ksize)
+    print(f"Resultado salvo em: {os.path.abspath(args.saida)}")
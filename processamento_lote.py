@@ -0,0 +1,53 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+EXTENSOES_IMAGEM = ('.png', '.jpg', '.jpeg', '.tif', '.tiff')
+
+# Número de processos: variável de ambiente FILTRAGEM_WORKERS ou todos os núcleos
+VARIAVEL_WORKERS = "FILTRAGEM_WORKERS"
+
+
+def listar_imagens(diretorio="imgs", extensoes=EXTENSOES_IMAGEM):
+    """Lista (caminho, nome) das imagens do diretório, em ordem alfabética."""
+    nomes = sorted(f for f in os.listdir(diretorio) if f.lower().endswith(extensoes))
+    return [(os.path.join(diretorio, nome), nome) for nome in nomes if os.path.isfile(os.path.join(diretorio, nome))]
+
+
+def numero_workers(num_workers=None, variavel=VARIAVEL_WORKERS):
+    """Resolve o número de processos (ou threads): argumento explícito, a variável de ambiente `variavel` ou os.cpu_count()."""
+    if num_workers is None:
+        num_workers = int(os.environ.get(variavel, 0)) or os.cpu_count() or 1
+    return max(1, int(num_workers))
+
+
+def _executar_item(funcao, argumentos):
+    # Captura a exceção no próprio processo para que um arquivo ruim não derrube o lote
+    try:
+        return funcao(*argumentos), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def processar_lote(funcao, itens, num_workers=None):
+    """Aplica funcao(*item) a cada item em um pool de processos.
+
+    Retorna uma lista de (item, resultado, erro) na mesma ordem de `itens`;
+    erro é None em caso de sucesso e resultado é None em caso de falha.
+    """
+    itens = [item if isinstance(item, tuple) else (item,) for item in itens]
+    num_workers = min(numero_workers(num_workers), max(1, len(itens)))
+
+    if num_workers == 1:
+        return [(item, *_executar_item(funcao, item)) for item in itens]
+
+    saida = []
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futuros = [executor.submit(_executar_item, funcao, item) for item in itens]
+        for item, futuro in zip(itens, futuros):
+            try:
+                resultado, erro = futuro.result()
+            except Exception as e:
+                # Ex.: processo filho encerrado abruptamente (BrokenProcessPool)
+                resultado, erro = None, f"{type(e).__name__}: {e}"
+            saida.append((item, resultado, erro))
+    return saida
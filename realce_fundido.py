@@ -0,0 +1,81 @@
+import numpy as np
+from scipy import ndimage as ndi
+
+from precisao import dtype_float, para_float
+
+# Parâmetros do Realce.py
+RAIO_UNSHARP = 1.0
+AMOUNT_UNSHARP = 1.0
+FATOR_HIGH_BOOST = 2.5
+# Mesmo operador do ski.filters.laplace (centro positivo, borda refletida)
+KERNEL_LAPLACIANO = np.array([[0, -1, 0], [-1, 4, -1], [0, -1, 0]], dtype=np.float64)
+
+SAIDAS = ("nitido", "laplaciano", "laplaciano_127", "high_boost")
+
+
+def alocar_saidas(forma, dtype=None):
+    """Buffers de saída do `realcar`, para reaproveitar entre imagens de mesmo tamanho."""
+    return {nome: np.empty(forma, dtype=dtype_float(dtype)) for nome in SAIDAS}
+
+
+def detalhe(img, raio=RAIO_UNSHARP, out=None):
+    """img - gaussiano(img): a máscara de nitidez, com o desfoque calculado uma única vez.
+
+    Mesmo desfoque do ski.filters.unsharp_mask (gaussian com mode="reflect").
+    """
+    out = ndi.gaussian_filter(img, raio, mode="reflect", output=out)
+    return np.subtract(img, out, out=out)
+
+
+def unsharp(img, mascara, amount=AMOUNT_UNSHARP, out=None):
+    """img + amount * mascara recortado em [0, 1] (igual ao ski.filters.unsharp_mask)."""
+    out = np.multiply(mascara, amount, out=out)
+    out += img
+    return np.clip(out, 0, 1, out=out)
+
+
+def realcar(img, raio=RAIO_UNSHARP, amount=AMOUNT_UNSHARP, fator_high_boost=FATOR_HIGH_BOOST, out=None):
+    """Unsharp mask, Laplaciano, Laplaciano + 0.5 e high-boost do Realce.py sem temporários de imagem inteira.
+
+    O desfoque é feito uma vez e a máscara é montada no próprio buffer do
+    high-boost, que depois é sobrescrito. `out` é um dict de `alocar_saidas`;
+    sem ele, os buffers são alocados aqui. A imagem é convertida para o dtype
+    da política. O high-boost segue o Realce.py: img + fator * nitido.
+    """
+    img = para_float(img)
+    if out is None:
+        out = alocar_saidas(img.shape, img.dtype)
+
+    mascara = detalhe(img, raio, out=out["high_boost"])
+    nitido = unsharp(img, mascara, amount, out=out["nitido"])
+
+    high_boost = np.multiply(nitido, fator_high_boost, out=out["high_boost"])
+    high_boost += img
+
+    laplaciano = ndi.correlate(img, KERNEL_LAPLACIANO, mode="reflect", output=out["laplaciano"])
+    laplaciano_127 = np.add(laplaciano, 0.5, out=out["laplaciano_127"])
+    np.clip(laplaciano_127, 0, 1, out=laplaciano_127)
+    return out
+
+
+def grade_unsharp(img, amounts, raio=RAIO_UNSHARP, out=None):
+    """Unsharp mask para cada valor de `amounts`, (N, H, W), a partir de um único desfoque."""
+    img = para_float(img)
+    mascara = detalhe(img, raio)
+    if out is None:
+        out = np.empty((len(amounts), *img.shape), dtype=mascara.dtype)
+    for i, amount in enumerate(amounts):
+        unsharp(img, mascara, amount, out=out[i])
+    return out
+
+
+def grade_high_boost(img, fatores, raio=RAIO_UNSHARP, amount=AMOUNT_UNSHARP, out=None):
+    """High-boost (img + k * nitido) para cada k de `fatores`, (N, H, W), com um único desfoque."""
+    img = para_float(img)
+    nitido = unsharp(img, detalhe(img, raio), amount)
+    if out is None:
+        out = np.empty((len(fatores), *img.shape), dtype=nitido.dtype)
+    for i, fator in enumerate(fatores):
+        np.multiply(nitido, fator, out=out[i])
+        out[i] += img
+    return out
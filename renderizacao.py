@@ -0,0 +1,128 @@
+import atexit
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from skimage import io
+
+from perfil import etapa
+
+# FILTRAGEM_HEADLESS=1: figuras renderizadas em segundo plano com Agg, sem plt.show()
+MODO_HEADLESS = os.environ.get("FILTRAGEM_HEADLESS", "0") == "1"
+# FILTRAGEM_PAINEIS_BRUTOS=1: grava cada painel como PNG próprio, sem montar a figura
+PAINEIS_BRUTOS = os.environ.get("FILTRAGEM_PAINEIS_BRUTOS", "0") == "1"
+# Threads de escrita; o padrão (1) mantém a renderização do matplotlib serializada
+NUM_THREADS_RENDER = int(os.environ.get("FILTRAGEM_RENDER_THREADS", 1))
+
+if MODO_HEADLESS:
+    matplotlib.use("Agg")
+
+_executor = None
+_pendentes = []
+
+
+def _obter_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max(1, NUM_THREADS_RENDER), thread_name_prefix="render")
+    return _executor
+
+
+def _nome_seguro(texto):
+    return re.sub(r"[^\w\-]+", "_", texto).strip("_")
+
+
+def _para_uint8(img):
+    img = np.asarray(img)
+    if img.dtype == np.uint8:
+        return img
+    if img.dtype == bool:
+        return img.astype(np.uint8) * 255
+    img = img.astype(np.float64)
+    minimo, maximo = img.min(), img.max()
+    if minimo >= 0 and maximo <= 1:
+        return (img * 255).astype(np.uint8)
+    # Fora de [0, 1] (ex.: Laplaciano): normaliza pelo mínimo e máximo
+    escala = (maximo - minimo) or 1.0
+    return ((img - minimo) / escala * 255).astype(np.uint8)
+
+
+def salvar_paineis(caminho, paineis):
+    """Grava cada painel (titulo, imagem) como PNG ao lado de `caminho`, sem compor a figura."""
+    base = os.path.splitext(caminho)[0]
+    salvos = []
+    for titulo, img in paineis:
+        arquivo = f"{base}_{_nome_seguro(titulo)}.png"
+        with etapa("png", imagem=os.path.basename(caminho)):
+            io.imsave(arquivo, _para_uint8(img), check_contrast=False)
+        salvos.append(arquivo)
+    return salvos
+
+
+def _informar_erro(futuro):
+    erro = futuro.exception()
+    if erro is not None:
+        print(f"Erro ao salvar figura: {erro}")
+
+
+def _renderizar(desenhar, caminho, figsize, argumentos):
+    imagem = os.path.basename(caminho)
+    with etapa("figura", imagem=imagem):
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        desenhar(fig, *argumentos)
+    with etapa("png", imagem=imagem):
+        fig.savefig(caminho)
+    return caminho
+
+
+def mostrar_figura(desenhar, caminho, *argumentos, figsize=(15, 8), paineis=None, exibir=True):
+    """Desenha uma figura com `desenhar(fig, *argumentos)` e a salva em `caminho`.
+
+    Modo interativo (padrão): desenha, salva e chama plt.show() (se `exibir`) como antes.
+    Modo headless: a renderização e o PNG vão para uma thread de escrita e
+    a função retorna imediatamente. Com FILTRAGEM_PAINEIS_BRUTOS=1 e
+    `paineis` informados, grava só os painéis de imagem, sem montar a figura.
+    """
+    if caminho:
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+
+    if not MODO_HEADLESS:
+        import matplotlib.pyplot as plt
+        imagem = os.path.basename(caminho) if caminho else None
+        with etapa("figura", imagem=imagem):
+            fig = plt.figure(figsize=figsize)
+            desenhar(fig, *argumentos)
+        if caminho:
+            with etapa("png", imagem=imagem):
+                fig.savefig(caminho)
+        if exibir:
+            plt.show()
+        plt.close(fig)
+        return None
+
+    if PAINEIS_BRUTOS and paineis is not None:
+        futuro = _obter_executor().submit(salvar_paineis, caminho, paineis)
+    else:
+        futuro = _obter_executor().submit(_renderizar, desenhar, caminho, figsize, argumentos)
+    # Erros de escrita são informados assim que ocorrem, mesmo se ninguém aguardar a figura
+    futuro.add_done_callback(_informar_erro)
+    _pendentes.append(futuro)
+    return futuro
+
+
+def aguardar_figuras():
+    """Espera as figuras enfileiradas; retorna os erros de escrita encontrados."""
+    erros = []
+    while _pendentes:
+        erro = _pendentes.pop(0).exception()
+        if erro is not None:
+            erros.append(erro)
+    return erros
+
+
+atexit.register(aguardar_figuras)
@@ -0,0 +1,82 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from precisao import dtype_float
+
+# Códigos que separam os fluxos aleatórios de cada tipo de campo
+_CAMPO_GAUSSIANO = 0
+_CAMPO_UNIFORME = 1
+
+
+class GeradorRuido:
+    """Gerador de ruído reprodutível (numpy Generator com semente explícita) no dtype da política (float32 por padrão).
+
+    Cada campo de ruído depende só de (semente, tipo, forma, realização), e não
+    da ordem das chamadas. Assim, o mesmo campo pode ser reaproveitado por todas
+    as imagens de mesmo tamanho e o resultado é igual em processos diferentes.
+    """
+
+    def __init__(self, semente=0, max_campos=8, dtype=None):
+        self.semente = int(semente)
+        self.dtype = dtype_float(dtype)
+        self.max_campos = max_campos
+        self._campos = OrderedDict()
+
+    def _gerador(self, tipo, forma, realizacao):
+        return np.random.default_rng([self.semente, tipo, realizacao, *forma])
+
+    def _campo(self, tipo, forma, realizacao, reutilizar):
+        chave = (tipo, tuple(forma), realizacao)
+        campo = self._campos.get(chave)
+        if campo is not None:
+            self._campos.move_to_end(chave)
+            return campo
+
+        rng = self._gerador(tipo, forma, realizacao)
+        # O sorteio é sempre em float32: a política de dtype muda a precisão, não a realização do ruído
+        if tipo == _CAMPO_GAUSSIANO:
+            campo = rng.standard_normal(forma, dtype=np.float32)
+        else:
+            campo = rng.random(forma, dtype=np.float32)
+        campo = campo.astype(self.dtype, copy=False)
+
+        if reutilizar:
+            campo.setflags(write=False)
+            self._campos[chave] = campo
+            while len(self._campos) > self.max_campos:
+                self._campos.popitem(last=False)
+        return campo
+
+    def campo_gaussiano(self, forma, realizacao=0, reutilizar=True):
+        """Campo normal padrão (média 0, variância 1)."""
+        return self._campo(_CAMPO_GAUSSIANO, forma, realizacao, reutilizar)
+
+    def campo_uniforme(self, forma, realizacao=0, reutilizar=True):
+        """Campo uniforme em [0, 1)."""
+        return self._campo(_CAMPO_UNIFORME, forma, realizacao, reutilizar)
+
+    def gaussiano(self, img, var, realizacao=0, reutilizar=True):
+        """Ruído Gaussiano aditivo de variância `var` sobre imagem em [0, 1], recortado em [0, 1]."""
+        campo = self.campo_gaussiano(img.shape, realizacao, reutilizar)
+        ruidosa = np.asarray(img, dtype=self.dtype) + self.dtype.type(np.sqrt(var)) * campo
+        return np.clip(ruidosa, 0, 1, out=ruidosa)
+
+    def sal_e_pimenta(self, img, amount, salt_vs_pepper=0.5, realizacao=0, reutilizar=True):
+        """Substitui a fração `amount` dos pixels por 0 (pimenta) ou 1 (sal), na proporção salt_vs_pepper."""
+        campo = self.campo_uniforme(img.shape, realizacao, reutilizar)
+        ruidosa = np.array(img, dtype=self.dtype)
+        ruidosa[campo < amount * (1 - salt_vs_pepper)] = 0
+        ruidosa[campo >= 1 - amount * salt_vs_pepper] = 1
+        return ruidosa
+
+    def realizacoes(self, img, modo, n, **params):
+        """Gera `n` realizações independentes de ruído sobre a imagem (para médias de Monte Carlo).
+
+        As realizações não ficam em cache: cada uma é gerada, usada e descartada.
+        """
+        gerar = {"gaussian": self.gaussiano, "s&p": self.sal_e_pimenta}.get(modo)
+        if gerar is None:
+            raise ValueError(f"Modo de ruído desconhecido: {modo}")
+        for realizacao in range(n):
+            yield gerar(img, realizacao=realizacao, reutilizar=False, **params)
@@ -0,0 +1,210 @@
+import argparse
+import csv
+import io
+import json
+import os
+
+import numpy as np
+
+# Tipos de coluna: textos repetidos viram códigos int32 com dicionário no cabeçalho
+TIPOS = {"categoria": "<i4", "f8": "<f8", "i8": "<i8"}
+AGREGACOES = ("media", "soma", "contagem", "min", "max")
+VERSAO_FORMATO = 1
+
+
+class TabelaMetricas:
+    """Tabela colunar de métricas em disco: registros binários (array estruturado do numpy) + cabeçalho JSON.
+
+    `<base>.bin` só cresce por anexação; `<base>.json` guarda o esquema, os
+    dicionários das colunas de categoria e o número de linhas válidas (o
+    cabeçalho é gravado depois dos dados, então uma anexação interrompida não
+    aparece na leitura). A leitura é um memmap: consultas e agrupamentos são
+    feitos em numpy sobre milhões de linhas sem passar pelo pandas, que só
+    entra nas exportações em texto. Um único processo deve escrever por vez.
+    """
+
+    def __init__(self, base, esquema=None):
+        self.caminho_dados = f"{base}.bin"
+        self.caminho_cabecalho = f"{base}.json"
+        if os.path.exists(self.caminho_cabecalho):
+            with open(self.caminho_cabecalho, encoding="utf-8") as f:
+                cabecalho = json.load(f)
+            self.esquema = [tuple(coluna) for coluna in cabecalho["colunas"]]
+            if esquema is not None and [tuple(c) for c in esquema] != self.esquema:
+                raise ValueError(f"Esquema diferente do já gravado em {self.caminho_cabecalho}")
+            self.categorias = cabecalho["categorias"]
+            self.linhas = cabecalho["linhas"]
+        else:
+            if esquema is None:
+                raise FileNotFoundError(self.caminho_cabecalho)
+            self.esquema = [tuple(coluna) for coluna in esquema]
+            self.categorias = {nome: [] for nome, tipo in self.esquema if tipo == "categoria"}
+            self.linhas = 0
+        self.dtype = np.dtype([(nome, TIPOS[tipo]) for nome, tipo in self.esquema])
+        self._codigos = {nome: {valor: i for i, valor in enumerate(valores)} for nome, valores in self.categorias.items()}
+
+    @property
+    def colunas(self):
+        return [nome for nome, _ in self.esquema]
+
+    def _salvar_cabecalho(self):
+        temporario = f"{self.caminho_cabecalho}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"versao": VERSAO_FORMATO, "colunas": self.esquema,
+                       "categorias": self.categorias, "linhas": self.linhas}, f, ensure_ascii=False)
+        os.replace(temporario, self.caminho_cabecalho)
+
+    def _codigo(self, nome, valor):
+        valor = "" if valor is None else str(valor)
+        codigos = self._codigos[nome]
+        if valor not in codigos:
+            codigos[valor] = len(self.categorias[nome])
+            self.categorias[nome].append(valor)
+        return codigos[valor]
+
+    def anexar(self, linhas):
+        """Anexa uma lista de dicts (colunas ausentes ficam NaN, 0 ou texto vazio)."""
+        if not linhas:
+            return
+        registros = np.zeros(len(linhas), dtype=self.dtype)
+        for nome, tipo in self.esquema:
+            if tipo == "categoria":
+                registros[nome] = [self._codigo(nome, linha.get(nome)) for linha in linhas]
+            elif tipo == "f8":
+                registros[nome] = [linha.get(nome, np.nan) for linha in linhas]
+            else:
+                registros[nome] = [linha.get(nome, 0) for linha in linhas]
+
+        os.makedirs(os.path.dirname(self.caminho_dados) or ".", exist_ok=True)
+        with open(self.caminho_dados, "ab") as f:
+            # Descarta o que sobrou de uma anexação interrompida
+            f.truncate(self.linhas * self.dtype.itemsize)
+            f.write(registros.tobytes())
+        self.linhas += len(linhas)
+        self._salvar_cabecalho()
+
+    def registros(self):
+        """Array estruturado (memmap somente leitura) com os códigos e valores brutos."""
+        if self.linhas == 0:
+            return np.zeros(0, dtype=self.dtype)
+        return np.memmap(self.caminho_dados, dtype=self.dtype, mode="r", shape=(self.linhas,))
+
+    def coluna(self, nome, mascara=None):
+        """Valores de uma coluna (categorias decodificadas), opcionalmente filtrados por uma máscara."""
+        valores = self.registros()[nome]
+        if mascara is not None:
+            valores = valores[mascara]
+        if nome in self.categorias:
+            return np.array(self.categorias[nome], dtype=object)[valores]
+        return np.asarray(valores)
+
+    def mascara(self, **igualdades):
+        """Máscara das linhas em que cada coluna é igual ao valor dado (colunas com espaço: use **{"PSNR (dB)": ...})."""
+        registros = self.registros()
+        resultado = np.ones(len(registros), dtype=bool)
+        for nome, valor in igualdades.items():
+            if nome in self._codigos:
+                codigo = self._codigos[nome].get(str(valor))
+                if codigo is None:
+                    return np.zeros(len(registros), dtype=bool)
+                resultado &= registros[nome] == codigo
+            else:
+                resultado &= registros[nome] == valor
+        return resultado
+
+    def agrupar(self, por, valores, agregacao="media", mascara=None):
+        """Agrupa pelas colunas `por` e agrega as colunas `valores` (media, soma, contagem, min ou max).
+
+        Retorna um dict de colunas: as chaves do grupo (decodificadas), "contagem" e uma coluna por valor.
+        NaN é ignorado na média, na soma, no mínimo e no máximo.
+        """
+        if agregacao not in AGREGACOES:
+            raise ValueError(f"Agregação desconhecida: {agregacao}")
+        registros = self.registros()
+        if mascara is not None:
+            registros = registros[mascara]
+        if len(registros) == 0:
+            return {nome: np.array([]) for nome in [*por, "contagem", *valores]}
+
+        # Códigos de categoria e inteiros até 2**53 são exatos em float64
+        chaves = np.stack([np.asarray(registros[nome], dtype=np.float64) for nome in por], axis=1)
+        grupos, inverso = np.unique(chaves, axis=0, return_inverse=True)
+        inverso = inverso.ravel()
+        n_grupos = len(grupos)
+
+        resultado = {}
+        for i, nome in enumerate(por):
+            chave = grupos[:, i]
+            if nome in self.categorias:
+                resultado[nome] = np.array(self.categorias[nome], dtype=object)[chave.astype(np.intp)]
+            else:
+                resultado[nome] = chave.astype(self.dtype[nome])
+        resultado["contagem"] = np.bincount(inverso, minlength=n_grupos)
+
+        for nome in valores:
+            coluna = np.asarray(registros[nome], dtype=np.float64)
+            validos = ~np.isnan(coluna)
+            if agregacao in ("media", "soma", "contagem"):
+                soma = np.bincount(inverso[validos], weights=coluna[validos], minlength=n_grupos)
+                contagem = np.bincount(inverso[validos], minlength=n_grupos)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    resultado[nome] = {"media": soma / contagem, "soma": soma, "contagem": contagem}[agregacao]
+            else:
+                extremo = np.full(n_grupos, np.inf if agregacao == "min" else -np.inf)
+                (np.minimum if agregacao == "min" else np.maximum).at(extremo, inverso[validos], coluna[validos])
+                extremo[np.isinf(extremo) & (np.bincount(inverso[validos], minlength=n_grupos) == 0)] = np.nan
+                resultado[nome] = extremo
+        return resultado
+
+    # --- Exportações (visões da tabela) ---
+
+    def para_csv(self, colunas=None, mascara=None):
+        """Texto CSV das colunas pedidas, no mesmo formato do pandas.to_csv (NaN vazio, floats com repr)."""
+        colunas = colunas or self.colunas
+        dados = [self.coluna(nome, mascara) for nome in colunas]
+        saida = io.StringIO()
+        escritor = csv.writer(saida, lineterminator="\n")
+        escritor.writerow(colunas)
+        for linha in zip(*dados):
+            escritor.writerow(["" if isinstance(v, float) and np.isnan(v) else (repr(float(v)) if isinstance(v, (float, np.floating)) else v)
+                               for v in linha])
+        return saida.getvalue()
+
+    def para_dataframe(self, colunas=None, mascara=None):
+        import pandas as pd
+        colunas = colunas or self.colunas
+        return pd.DataFrame({nome: self.coluna(nome, mascara) for nome in colunas})
+
+    def para_texto(self, colunas=None, mascara=None, casas=6):
+        """Tabela alinhada em texto (como o DataFrame.to_string usado nos scripts)."""
+        return self.para_dataframe(colunas, mascara).to_string(index=False, float_format=lambda v: f"{v:.{casas}f}")
+
+
+def formatar_grupos(grupos, casas=6):
+    nomes = list(grupos)
+    linhas = [[str(v) if not isinstance(v, (float, np.floating)) else f"{v:.{casas}f}" for v in valores]
+              for valores in zip(*(grupos[nome] for nome in nomes))]
+    larguras = [max([len(nome)] + [len(linha[i]) for linha in linhas]) for i, nome in enumerate(nomes)]
+    saida = ["  ".join(nome.rjust(largura) for nome, largura in zip(nomes, larguras))]
+    saida += ["  ".join(valor.rjust(largura) for valor, largura in zip(linha, larguras)) for linha in linhas]
+    return "\n".join(saida)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consulta uma tabela de métricas colunar.")
+    parser.add_argument("base", help="Caminho da tabela sem extensão (ex.: Resultados/resultados_analise/metricas)")
+    parser.add_argument("--agrupar", nargs="+", help="Colunas de agrupamento")
+    parser.add_argument("--valores", nargs="+", help="Colunas agregadas")
+    parser.add_argument("--agregacao", choices=AGREGACOES, default="media")
+    parser.add_argument("--csv", help="Exporta a tabela inteira para este CSV")
+    args = parser.parse_args()
+
+    tabela = TabelaMetricas(args.base)
+    print(f"{tabela.linhas} linha(s); colunas: {', '.join(tabela.colunas)}")
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as f:
+            f.write(tabela.para_csv())
+        print(f"CSV salvo em: {args.csv}")
+    if args.agrupar:
+        valores = args.valores or [nome for nome, tipo in tabela.esquema if tipo == "f8"]
+        print(formatar_grupos(tabela.agrupar(args.agrupar, valores, args.agregacao)))
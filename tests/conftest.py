@@ -0,0 +1,37 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import precisao  # noqa: E402
+from carregamento import carregar_cinza  # noqa: E402
+
+DIR_IMGS = os.path.join(RAIZ, "imgs")
+# Recorte central de cada imagem: pequeno o bastante para a referência em laço
+TAMANHO_RECORTE = 64
+
+
+def _recorte(img, tamanho=TAMANHO_RECORTE):
+    altura, largura = img.shape[:2]
+    y0, x0 = (altura - tamanho) // 2, (largura - tamanho) // 2
+    return np.array(img[y0:y0 + tamanho, x0:x0 + tamanho])
+
+
+@pytest.fixture(scope="session")
+def recortes():
+    """{arquivo: recorte uint8 em escala de cinza} de cada imagem de imgs/."""
+    arquivos = sorted(os.listdir(DIR_IMGS))
+    return {nome: _recorte(carregar_cinza(os.path.join(DIR_IMGS, nome), dtype="uint8")) for nome in arquivos}
+
+
+@pytest.fixture
+def politica(monkeypatch):
+    """Troca a política de ponto flutuante (precisao.DTYPE_FLOAT) só durante o teste."""
+    def trocar(dtype):
+        monkeypatch.setattr(precisao, "DTYPE_FLOAT", np.dtype(dtype))
+    return trocar
@@ -0,0 +1,48 @@
+"""Estratégias da convolução manual contra o laço pixel a pixel de referência."""
+import importlib
+
+import numpy as np
+import pytest
+
+convolucao_manual = importlib.import_module("convolução_manual")
+
+KERNELS = {
+    "media_3x3": np.ones((3, 3), dtype=np.float32) / 9.0,
+    "laplaciano_3x3": np.array([[1, 1, 1], [1, -8, 1], [1, 1, 1]], dtype=np.float32),
+    # Não separável e acima do LIMIAR_FFT
+    "aleatorio_15x15": np.random.default_rng(0).random((15, 15)).astype(np.float32),
+}
+# Somas de até 15*15 pixels de 0..255 em float32: tolerância relativa ao valor
+TOLERANCIA_RELATIVA = 1e-5
+
+
+@pytest.mark.parametrize("nome_kernel", KERNELS)
+@pytest.mark.parametrize("estrategia", ("auto", "einsum", "fft", "separavel"))
+def test_estrategia_igual_ao_laco(recortes, nome_kernel, estrategia):
+    kernel = KERNELS[nome_kernel]
+    pilha = np.stack(list(recortes.values()))
+    referencia = convolucao_manual.aplicar_convolucao_manual(pilha, kernel, "laco")
+    if estrategia == "separavel" and convolucao_manual.decompor_kernel_separavel(kernel) is None:
+        with pytest.raises(ValueError):
+            convolucao_manual.aplicar_convolucao_manual(pilha, kernel, estrategia)
+        return
+    resultado = convolucao_manual.aplicar_convolucao_manual(pilha, kernel, estrategia)
+    assert resultado.dtype == np.float32
+    escala = np.abs(kernel).sum() * 255
+    np.testing.assert_allclose(resultado, referencia, rtol=0, atol=TOLERANCIA_RELATIVA * escala)
+
+
+def test_svd_uma_vez_por_chamada(recortes, monkeypatch):
+    chamadas = []
+    original = convolucao_manual.decompor_kernel_separavel
+
+    def contar(kernel, *args, **kwargs):
+        chamadas.append(kernel)
+        return original(kernel, *args, **kwargs)
+
+    monkeypatch.setattr(convolucao_manual, "decompor_kernel_separavel", contar)
+    img = next(iter(recortes.values()))
+    for estrategia in ("auto", "separavel"):
+        chamadas.clear()
+        convolucao_manual.aplicar_convolucao_manual(img, KERNELS["media_3x3"], estrategia)
+        assert len(chamadas) == 1, estrategia
@@ -0,0 +1,33 @@
+"""A mediana adaptativa vetorizada (padrão do B.py) contra o laço pixel a pixel de referência."""
+import numpy as np
+import pytest
+
+from B import mediana_adaptativa
+from precisao import para_uint8
+from ruido import GeradorRuido
+
+# Densidades de sal e pimenta: 0 (imagem limpa) até o ponto em que a janela precisa crescer até o máximo
+AMOUNTS = (0.0, 0.05, 0.3)
+
+
+def _ruidosa(img_uint8, amount):
+    if amount == 0:
+        return img_uint8
+    return para_uint8(GeradorRuido(0).sal_e_pimenta(img_uint8 / 255.0, amount))
+
+
+@pytest.mark.parametrize("amount", AMOUNTS)
+@pytest.mark.parametrize("max_ksize", (5, 9))
+def test_vetorizado_igual_ao_laco(recortes, amount, max_ksize):
+    for arquivo, img_uint8 in recortes.items():
+        img = _ruidosa(img_uint8, amount)
+        vetorizado = mediana_adaptativa(img, max_ksize=max_ksize)
+        laco = mediana_adaptativa(img, max_ksize=max_ksize, modo="laco")
+        assert vetorizado.dtype == laco.dtype
+        assert np.array_equal(vetorizado, laco), f"{arquivo} (amount={amount}, max_ksize={max_ksize})"
+
+
+def test_pilha_igual_a_quadro_a_quadro(recortes):
+    pilha = np.stack([_ruidosa(img, 0.05) for img in recortes.values()])
+    esperado = np.stack([mediana_adaptativa(quadro, modo="laco") for quadro in pilha])
+    assert np.array_equal(mediana_adaptativa(pilha), esperado)
@@ -0,0 +1,14 @@
+"""Métricas em lote contra as mesmas métricas calculadas imagem a imagem."""
+import cv2
+import numpy as np
+
+from estatisticas_locais import desvio_local
+from metricas import JANELA_CONTRASTE_LOCAL, contraste_local_lote
+
+
+def test_contraste_local_lote_igual_a_imagem_a_imagem(recortes):
+    pilha = [img for original in recortes.values() for img in (original, cv2.blur(original, (5, 5)))]
+    esperado = [desvio_local(img.astype(np.float32), JANELA_CONTRASTE_LOCAL, dtype=np.float64).mean() for img in pilha]
+    # Valores uint8: as somas das imagens integrais são exatas nos dois caminhos
+    assert np.array_equal(contraste_local_lote(pilha), esperado)
+    assert np.array_equal(contraste_local_lote(pilha[0]), esperado[:1])
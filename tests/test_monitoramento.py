@@ -0,0 +1,62 @@
+"""O monitor só marca como processado o arquivo que deu certo; as falhas ficam registradas e voltam a ser tentadas."""
+import json
+import os
+
+import cv2
+import numpy as np
+
+from monitoramento import Monitor
+
+
+def _processar_vazio_se_ruim(caminho, nome):
+    # Como Ruidos.realizar_analise_imagem: [] quando a imagem não pôde ser lida
+    return [] if nome.startswith("ruim") else [{"Arquivo": nome}]
+
+
+def _gravar(diretorio, nome):
+    caminho = os.path.join(diretorio, nome)
+    cv2.imwrite(caminho, np.zeros((4, 4), dtype=np.uint8))
+    return caminho
+
+
+def _monitor(diretorio, **opcoes):
+    return Monitor(str(diretorio), _processar_vazio_se_ruim, sucesso=bool, num_workers=1, **opcoes)
+
+
+def test_falha_fica_fora_do_estado_e_e_repetida(tmp_path):
+    boa = _gravar(tmp_path, "boa.png")
+    ruim = _gravar(tmp_path, "ruim.png")
+    concluidos = []
+
+    monitor = _monitor(tmp_path, tentativas_max=2)
+    monitor.ao_concluir = lambda caminho, nome, resultado: concluidos.append(nome)
+    monitor.executar(uma_vez=True)
+
+    with open(monitor.arquivo_estado, encoding="utf-8") as f:
+        estado = json.load(f)
+    assert list(estado["processados"]) == [boa]
+    assert estado["falhas"][ruim]["tentativas"] == 1
+    assert "RuntimeError" in estado["falhas"][ruim]["erro"]
+    assert concluidos == ["boa.png"]
+
+    # Reiniciado, o monitor tenta a falha de novo (e só ela) até esgotar as tentativas
+    concluidos.clear()
+    monitor = _monitor(tmp_path, tentativas_max=2)
+    monitor.ao_concluir = lambda caminho, nome, resultado: concluidos.append(nome)
+    monitor.executar(uma_vez=True)
+    assert monitor.falhas[ruim]["tentativas"] == 2
+    assert concluidos == []
+    assert monitor.novos_arquivos(exigir_estavel=False) == []
+
+    # Alterado, o arquivo volta a ser tentado mesmo com as tentativas esgotadas
+    cv2.imwrite(ruim, np.ones((5, 5), dtype=np.uint8))
+    monitor.executar(uma_vez=True)
+    assert monitor.falhas[ruim]["tentativas"] == 1
+
+    # --repetir-falhas
+    monitor.executar(uma_vez=True)
+    assert monitor.novos_arquivos(exigir_estavel=False) == []
+    monitor.repetir_falhas()
+    monitor.executar(uma_vez=True)
+    assert monitor.falhas[ruim]["tentativas"] == 1
+
@@ -0,0 +1,40 @@
+"""Filtragem em bandas paralelas contra a chamada única."""
+import numpy as np
+import pytest
+
+from paralelo_bandas import filtrar_em_bandas, filtrar_nome_em_bandas
+from processamento_blocos import FILTROS, filtro_em_blocos
+
+PARAMS = {"k": 5, "sigma": 1.6, "max_ksize": 7}
+DTYPES = (np.uint8, np.float32, np.float64)
+
+
+def _imagem(dtype):
+    base = np.random.default_rng(1).random((301, 257))
+    return (base * 255).astype(np.uint8) if dtype == np.uint8 else base.astype(dtype)
+
+
+@pytest.mark.parametrize("num_threads", (1, 3, 8))
+@pytest.mark.parametrize("dtype", DTYPES)
+@pytest.mark.parametrize("nome", FILTROS)
+def test_bandas_iguais_a_chamada_unica(nome, dtype, num_threads):
+    img = _imagem(dtype)
+    funcao, _ = filtro_em_blocos(nome, dtype=img.dtype, **PARAMS)
+    try:
+        esperado = funcao(img)
+    except Exception:
+        pytest.skip("o próprio filtro não aceita este dtype")
+    resultado = filtrar_nome_em_bandas(img, nome, num_threads, **PARAMS)
+    assert resultado.dtype == esperado.dtype
+    assert np.array_equal(resultado, esperado)
+
+    saida = np.empty_like(esperado)
+    assert filtrar_nome_em_bandas(img, nome, num_threads, out=saida, **PARAMS) is saida
+    assert np.array_equal(saida, esperado)
+
+
+def test_saida_alocada_com_canais():
+    img = _imagem(np.float32)
+    funcao = lambda banda: np.stack([banda, 2 * banda], axis=-1)  # noqa: E731
+    resultado = filtrar_em_bandas(img, funcao, 0, num_threads=4)
+    assert np.array_equal(resultado, funcao(img))
@@ -0,0 +1,88 @@
+"""Filtros de pilha (N, H, W) contra o mesmo filtro 2D aplicado quadro a quadro."""
+import cv2
+import numpy as np
+import pytest
+import skimage as ski
+from scipy import ndimage as ndi
+
+from pilhas import em_quadro_alto, gaussiano_pilha, media_pilha, mediana_pilha
+
+TAMANHOS = (3, 5, 9)
+
+
+@pytest.fixture(scope="module")
+def pilha(recortes):
+    return np.stack(list(recortes.values()))
+
+
+@pytest.mark.parametrize("k", TAMANHOS)
+def test_media_reflect101_igual_ao_cv2_blur(pilha, k):
+    for dtype in (np.uint8, np.float32, np.float64):
+        entrada = pilha if dtype == np.uint8 else (pilha / 255).astype(dtype)
+        resultado = media_pilha(entrada, k)
+        esperado = np.stack([cv2.blur(quadro, (k, k)) for quadro in entrada])
+        assert resultado.dtype == entrada.dtype
+        assert np.array_equal(resultado, esperado), f"{dtype.__name__}, k={k}"
+        # O mesmo quadro sozinho (2D) e dentro da pilha
+        assert np.array_equal(media_pilha(entrada[1], k), resultado[1])
+
+
+@pytest.mark.parametrize("k", TAMANHOS)
+def test_media_ignorar_igual_ao_rank_mean(pilha, k):
+    resultado = media_pilha(pilha, k, borda="ignorar")
+    esperado = np.stack([ski.filters.rank.mean(quadro, np.ones((k, k), dtype=np.uint8)) for quadro in pilha])
+    assert np.array_equal(resultado, esperado), f"k={k}"
+
+    entrada = pilha.astype(np.float64)
+    soma = ndi.uniform_filter(entrada, size=(1, k, k), mode="constant") * k * k
+    contagem = ndi.uniform_filter(np.ones_like(entrada), size=(1, k, k), mode="constant") * k * k
+    np.testing.assert_allclose(media_pilha(entrada, k, borda="ignorar"), soma / contagem, rtol=1e-10)
+
+
+@pytest.mark.parametrize("borda,modo", [("reflect101", "mirror"), ("ignorar", "constant")])
+def test_media_temporal(pilha, borda, modo):
+    entrada = pilha.astype(np.float64)
+    resultado = media_pilha(entrada, 3, temporal=3, borda=borda)
+    esperado = ndi.uniform_filter(entrada, size=(3, 3, 3), mode=modo)
+    if borda == "ignorar":
+        esperado = esperado / ndi.uniform_filter(np.ones_like(entrada), size=(3, 3, 3), mode=modo)
+    np.testing.assert_allclose(resultado, esperado, rtol=1e-10)
+
+
+@pytest.mark.parametrize("k", TAMANHOS)
+def test_mediana_igual_ao_cv2_median_blur(pilha, k):
+    resultado = mediana_pilha(pilha, k)
+    esperado = np.stack([cv2.medianBlur(quadro, k) for quadro in pilha])
+    assert np.array_equal(resultado, esperado), f"k={k}"
+    # Em float o caminho é o ndimage, com a mesma borda replicada
+    assert np.array_equal(mediana_pilha(pilha.astype(np.float32), k), esperado.astype(np.float32))
+
+
+@pytest.mark.parametrize("sigma", (1.0, 2.5))
+def test_gaussiano_sem_sigma_temporal_igual_quadro_a_quadro(pilha, sigma):
+    entrada = pilha.astype(np.float32)
+    resultado = gaussiano_pilha(entrada, sigma)
+    esperado = np.stack([ndi.gaussian_filter(quadro, sigma, mode="reflect") for quadro in entrada])
+    assert np.array_equal(resultado, esperado)
+
+
+def test_imagem_2d(pilha):
+    quadro = pilha[0]
+    assert np.array_equal(media_pilha(quadro, 5), cv2.blur(quadro, (5, 5)))
+    assert np.array_equal(mediana_pilha(quadro, 5), cv2.medianBlur(quadro, 5))
+    assert gaussiano_pilha(quadro.astype(np.float32), 1.0).shape == quadro.shape
+
+
+def test_em_quadro_alto_nao_mistura_quadros(pilha):
+    resultado = em_quadro_alto(lambda alto: cv2.GaussianBlur(alto, (7, 7), 0), pilha, 3, "reflect")
+    esperado = np.stack([cv2.GaussianBlur(quadro, (7, 7), 0) for quadro in pilha])
+    assert np.array_equal(resultado, esperado)
+
+
+def test_janelas_pares(pilha):
+    with pytest.raises(ValueError):
+        media_pilha(pilha, 4)
+    with pytest.raises(ValueError):
+        mediana_pilha(pilha, 3, temporal=2)
+    with pytest.raises(ValueError):
+        media_pilha(pilha, 3, borda="constante")
@@ -0,0 +1,105 @@
+"""Deriva entre as políticas float32 e float64 (FILTRAGEM_DTYPE) em cada filtro e métrica.
+
+Cada filtro roda nos recortes de imgs/ com a política em float32 e em float64 e
+os resultados são comparados pela maior diferença absoluta. As tolerâncias
+ficam algumas vezes acima da deriva medida (o épsilon do float32 é ~6e-8 em
+[0, 1]): uma mudança que some precisão além do arredondamento quebra o teste.
+"""
+import numpy as np
+import pytest
+
+from bordas import calcular_bordas
+from estatisticas_locais import desvio_local, media_local
+from metricas import calcular_metricas_lote, calcular_nitidez_contraste_lote
+from pilhas import gaussiano_pilha
+from piramide import piramide_laplaciana, reconstruir
+from precisao import dtype_float, para_float
+from realce_fundido import realcar
+from ruido import GeradorRuido
+from Ruidos import AMOUNT_SP_5, SEMENTE_RUIDO, SIGMA_GAUSSIANO, VAR_GAUSSIANO_NORMALIZADA, planejar_saidas
+
+# Pixels em [0, 1]: filtros lineares, estatísticas locais e ruído
+TOLERANCIA_PIXEL = 1e-6
+# Realce soma a máscara amplificada (high-boost 2.5x): um pouco mais de arredondamento
+TOLERANCIA_REALCE = 2e-6
+TOLERANCIA_PSNR_DB = 1e-4
+TOLERANCIA_SSIM = 1e-5
+# Métricas de nitidez e contraste, relativas ao valor
+TOLERANCIA_RELATIVA_NITIDEZ = 1e-5
+# Fração de pixels que pode mudar de lado no Sobel + Otsu
+TOLERANCIA_BINARIZACAO = 1e-3
+
+
+def _ruidosa(img):
+    return GeradorRuido(SEMENTE_RUIDO).gaussiano(img, VAR_GAUSSIANO_NORMALIZADA)
+
+
+FILTROS = {
+    "sobel": (lambda img: calcular_bordas(img)["sobel"], TOLERANCIA_PIXEL),
+    "prewitt": (lambda img: calcular_bordas(img)["prewitt"], TOLERANCIA_PIXEL),
+    "limiar_otsu": (lambda img: calcular_bordas(img)["limiar_otsu"], TOLERANCIA_PIXEL),
+    "media_reflect101": (lambda img: media_local(img, 5), TOLERANCIA_PIXEL),
+    "media_ignorar": (lambda img: media_local(img, 5, borda="ignorar"), TOLERANCIA_PIXEL),
+    "desvio_local": (lambda img: desvio_local(img, 7), TOLERANCIA_PIXEL),
+    "gaussiano": (lambda img: gaussiano_pilha(img, SIGMA_GAUSSIANO), TOLERANCIA_PIXEL),
+    "ruido_gaussiano": (_ruidosa, TOLERANCIA_PIXEL),
+    "ruido_sal_e_pimenta": (lambda img: GeradorRuido(SEMENTE_RUIDO).sal_e_pimenta(img, AMOUNT_SP_5), TOLERANCIA_PIXEL),
+    "piramide_laplaciana": (lambda img: reconstruir(piramide_laplaciana(img, 3, img.dtype)), TOLERANCIA_PIXEL),
+    "realce": (lambda img: np.stack(list(realcar(img).values())), TOLERANCIA_REALCE),
+    "psnr": (lambda img: calcular_metricas_lote(img, _ruidosa(img))["PSNR (dB)"], TOLERANCIA_PSNR_DB),
+    "ssim": (lambda img: calcular_metricas_lote(img, _ruidosa(img))["SSIM"], TOLERANCIA_SSIM),
+}
+
+
+def _nas_duas_politicas(politica, funcao, img_uint8):
+    resultados = []
+    for dtype in ("float32", "float64"):
+        politica(dtype)
+        img = para_float(img_uint8)
+        assert img.dtype == dtype_float()
+        resultados.append(np.asarray(funcao(img), dtype=np.float64))
+    return resultados
+
+
+@pytest.mark.parametrize("nome", FILTROS)
+def test_deriva_float32_float64(recortes, politica, nome):
+    funcao, tolerancia = FILTROS[nome]
+    for arquivo, img_uint8 in recortes.items():
+        em_float32, em_float64 = _nas_duas_politicas(politica, funcao, img_uint8)
+        deriva = np.max(np.abs(em_float32 - em_float64))
+        assert deriva <= tolerancia, f"{nome} em {arquivo}: deriva {deriva:.3g} > {tolerancia:.3g}"
+
+
+def test_deriva_nitidez_contraste(recortes, politica):
+    for arquivo, img_uint8 in recortes.items():
+        em_float32, em_float64 = _nas_duas_politicas(
+            politica, lambda img: list(calcular_nitidez_contraste_lote(img).values()), img_uint8)
+        np.testing.assert_allclose(em_float32, em_float64, rtol=TOLERANCIA_RELATIVA_NITIDEZ, err_msg=arquivo)
+
+
+def test_deriva_sobel_otsu(recortes, politica):
+    for arquivo, img_uint8 in recortes.items():
+        em_float32, em_float64 = _nas_duas_politicas(politica, lambda img: calcular_bordas(img)["sobel_otsu"], img_uint8)
+        assert np.mean(em_float32 != em_float64) <= TOLERANCIA_BINARIZACAO, arquivo
+
+
+def test_canny_nao_depende_da_politica(recortes, politica):
+    # Com a entrada uint8 carregada direto, o Canny é o mesmo nas duas políticas
+    for arquivo, img_uint8 in recortes.items():
+        em_float32, em_float64 = _nas_duas_politicas(
+            politica, lambda img: calcular_bordas(img, img_uint8=img_uint8)["canny"], img_uint8)
+        assert np.array_equal(em_float32, em_float64), arquivo
+
+
+def test_versao_do_manifesto_segue_a_politica(politica):
+    # Trocar a política em tempo de execução invalida as saídas do Ruidos.py gravadas na outra
+    versoes = []
+    for dtype in ("float32", "float64"):
+        politica(dtype)
+        saidas = planejar_saidas("imagem", "hash")
+        versoes.append({(ruido, filtro): desc["versao_codigo"] for ruido, itens in saidas.items()
+                        for filtro, (_, desc) in itens.items()})
+    assert versoes[0].keys() == versoes[1].keys()
+    for chave, versao in versoes[0].items():
+        assert "-float32" in versao and "-float64" in versoes[1][chave], chave
+        assert versao != versoes[1][chave], chave
@@ -0,0 +1,48 @@
+"""Filtragem por blocos com halo contra a chamada sobre a imagem inteira."""
+import numpy as np
+import pytest
+
+from processamento_blocos import FILTROS, exato_em_blocos, filtrar_arquivo_em_blocos, filtrar_em_blocos, filtro_em_blocos
+
+PARAMS = {"k": 5, "sigma": 1.6, "max_ksize": 7}
+# Blocos que não dividem a imagem (300 x 417): sobram blocos parciais na última linha e coluna
+BLOCO = (128, 100)
+DTYPES = (np.uint8, np.float32, np.float64)
+
+
+def _imagem(dtype):
+    base = np.random.default_rng(0).random((300, 417))
+    return (base * 255).astype(np.uint8) if dtype == np.uint8 else base.astype(dtype)
+
+
+@pytest.mark.parametrize("dtype", DTYPES)
+@pytest.mark.parametrize("nome", FILTROS)
+def test_blocos_iguais_a_chamada_unica(nome, dtype):
+    if not exato_em_blocos(nome, dtype):
+        pytest.skip("rejeitado no caminho por blocos")
+    img = _imagem(dtype)
+    funcao, raio = filtro_em_blocos(nome, dtype=img.dtype, **PARAMS)
+    try:
+        esperado = funcao(img)
+    except Exception:
+        pytest.skip("o próprio filtro não aceita este dtype")
+    saida = filtrar_em_blocos(img, np.empty_like(esperado), funcao, raio, *BLOCO)
+    assert np.array_equal(saida, esperado)
+
+
+def test_arquivo_por_blocos(tmp_path):
+    img = _imagem(np.float32)
+    entrada, saida = str(tmp_path / "entrada.npy"), str(tmp_path / "saida.npy")
+    np.save(entrada, img)
+    resultado = filtrar_arquivo_em_blocos(entrada, saida, "gaussiano_scipy", *BLOCO, sigma=2.0)
+    funcao, _ = filtro_em_blocos("gaussiano_scipy", sigma=2.0)
+    assert np.array_equal(np.load(saida), funcao(img))
+    assert np.array_equal(resultado, funcao(img))
+
+
+@pytest.mark.parametrize("nome", ["media", "gaussiano"])
+def test_arquivo_rejeita_cv2_em_float(tmp_path, nome):
+    entrada = str(tmp_path / "entrada.npy")
+    np.save(entrada, _imagem(np.float64))
+    with pytest.raises(ValueError):
+        filtrar_arquivo_em_blocos(entrada, str(tmp_path / "saida.npy"), nome, *BLOCO, **PARAMS)
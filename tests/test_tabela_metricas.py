@@ -0,0 +1,137 @@
+"""Tabela colunar de métricas: anexação, recuperação de uma anexação interrompida e agrupamento."""
+import csv
+import io
+import json
+
+import numpy as np
+import pytest
+
+from tabela_metricas import TabelaMetricas
+
+ESQUEMA = [("Execução", "i8"), ("Arquivo", "categoria"), ("Filtro", "categoria"), ("PSNR (dB)", "f8")]
+LINHAS = [
+    {"Execução": 1, "Arquivo": "a", "Filtro": "Media", "PSNR (dB)": 20.0},
+    {"Execução": 1, "Arquivo": "a", "Filtro": "Mediana", "PSNR (dB)": 30.0},
+    {"Execução": 1, "Arquivo": "b", "Filtro": "Media", "PSNR (dB)": 22.0},
+    {"Execução": 2, "Arquivo": "b", "Filtro": "Mediana", "PSNR (dB)": np.nan},
+    {"Execução": 2, "Arquivo": "a", "Filtro": "Media", "PSNR (dB)": 24.0},
+]
+
+
+@pytest.fixture
+def base(tmp_path):
+    return str(tmp_path / "metricas")
+
+
+def test_anexar_e_reabrir(base):
+    tabela = TabelaMetricas(base, ESQUEMA)
+    tabela.anexar(LINHAS[:3])
+    tabela.anexar(LINHAS[3:])
+    tabela.anexar([])
+
+    reaberta = TabelaMetricas(base)
+    assert reaberta.linhas == len(LINHAS)
+    assert reaberta.esquema == ESQUEMA
+    assert list(reaberta.coluna("Arquivo")) == [linha["Arquivo"] for linha in LINHAS]
+    assert list(reaberta.coluna("Execução")) == [linha["Execução"] for linha in LINHAS]
+    np.testing.assert_array_equal(reaberta.coluna("PSNR (dB)"), [linha["PSNR (dB)"] for linha in LINHAS])
+    # Códigos de categoria estáveis entre sessões
+    assert reaberta.categorias["Filtro"] == ["Media", "Mediana"]
+
+
+def test_colunas_ausentes(base):
+    tabela = TabelaMetricas(base, ESQUEMA)
+    tabela.anexar([{"Arquivo": "a"}])
+    assert tabela.coluna("Execução")[0] == 0
+    assert tabela.coluna("Filtro")[0] == ""
+    assert np.isnan(tabela.coluna("PSNR (dB)")[0])
+
+
+def test_esquema_diferente(base):
+    TabelaMetricas(base, ESQUEMA).anexar(LINHAS[:1])
+    with pytest.raises(ValueError):
+        TabelaMetricas(base, ESQUEMA[:-1])
+    with pytest.raises(FileNotFoundError):
+        TabelaMetricas(base + "_outra")
+
+
+def test_anexacao_interrompida(base):
+    tabela = TabelaMetricas(base, ESQUEMA)
+    tabela.anexar(LINHAS[:2])
+    # Processo morto no meio da escrita: bytes além das linhas válidas e cabeçalho antigo
+    with open(tabela.caminho_dados, "ab") as f:
+        f.write(b"\x07" * (tabela.dtype.itemsize + 5))
+
+    reaberta = TabelaMetricas(base)
+    assert reaberta.linhas == 2
+    assert len(reaberta.registros()) == 2
+    assert list(reaberta.coluna("Filtro")) == ["Media", "Mediana"]
+
+    # A próxima anexação descarta o resto e continua do ponto válido
+    reaberta.anexar(LINHAS[2:])
+    final = TabelaMetricas(base)
+    assert final.linhas == len(LINHAS)
+    assert list(final.coluna("Arquivo")) == [linha["Arquivo"] for linha in LINHAS]
+    with open(final.caminho_dados, "rb") as f:
+        assert len(f.read()) == len(LINHAS) * final.dtype.itemsize
+
+
+def test_cabecalho_gravado_depois_dos_dados(base):
+    tabela = TabelaMetricas(base, ESQUEMA)
+    tabela.anexar(LINHAS[:2])
+    with open(tabela.caminho_cabecalho, encoding="utf-8") as f:
+        assert json.load(f)["linhas"] == 2
+
+
+def _esperado(linhas, chaves, valor, agregar):
+    grupos = {}
+    for linha in linhas:
+        grupos.setdefault(tuple(linha[chave] for chave in chaves), []).append(linha[valor])
+    return {chave: agregar([v for v in valores if not np.isnan(v)]) for chave, valores in grupos.items()}
+
+
+def _por_grupo(grupos, chaves, coluna):
+    return {tuple(linha[:-1]): linha[-1] for linha in zip(*(grupos[chave] for chave in chaves), grupos[coluna])}
+
+
+@pytest.mark.parametrize("agregacao,agregar", [
+    ("media", lambda v: np.mean(v) if v else np.nan),
+    ("soma", lambda v: float(np.sum(v))),
+    ("contagem", len),
+    ("min", lambda v: min(v) if v else np.nan),
+    ("max", lambda v: max(v) if v else np.nan),
+])
+def test_agrupar(base, agregacao, agregar):
+    tabela = TabelaMetricas(base, ESQUEMA)
+    tabela.anexar(LINHAS)
+    por = ["Arquivo", "Filtro"]
+    grupos = tabela.agrupar(por, ["PSNR (dB)"], agregacao)
+
+    esperado = _esperado(LINHAS, por, "PSNR (dB)", agregar)
+    obtido = _por_grupo(grupos, por, "PSNR (dB)")
+    assert set(obtido) == set(esperado)
+    for chave, valor in esperado.items():
+        np.testing.assert_allclose(obtido[chave], valor, equal_nan=True, err_msg=str(chave))
+    contagens = _por_grupo(grupos, por, "contagem")
+    assert contagens == {chave: sum(1 for linha in LINHAS if tuple(linha[nome] for nome in por) == chave)
+                         for chave in esperado}
+
+def test_agrupar_com_mascara(base):
+    tabela = TabelaMetricas(base, ESQUEMA)
+    tabela.anexar(LINHAS)
+    grupos = tabela.agrupar(["Execução"], ["PSNR (dB)"], "media", tabela.mascara(Filtro="Media"))
+    assert list(grupos["Execução"]) == [1, 2]
+    np.testing.assert_allclose(grupos["PSNR (dB)"], [21.0, 24.0])
+    assert list(grupos["contagem"]) == [2, 1]
+
+    vazio = tabela.agrupar(["Arquivo"], ["PSNR (dB)"], mascara=tabela.mascara(Filtro="Inexistente"))
+    assert all(len(coluna) == 0 for coluna in vazio.values())
+    with pytest.raises(ValueError):
+        tabela.agrupar(["Arquivo"], ["PSNR (dB)"], "mediana")
+
+
+def test_para_csv(base):
+    tabela = TabelaMetricas(base, ESQUEMA)
+    tabela.anexar(LINHAS)
+    linhas = list(csv.reader(io.StringIO(tabela.para_csv(["Arquivo", "PSNR (dB)"], tabela.mascara(Arquivo="b")))))
+    assert linhas == [["Arquivo", "PSNR (dB)"], ["b", "22.0"], ["b", ""]]